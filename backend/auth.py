@@ -1,19 +1,211 @@
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Optional
+
 from fastapi import Depends, HTTPException, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
-from supabase import create_client, Client
+from jose import jwt, JWTError
+from pydantic import BaseModel
+from supabase import Client
 from config import settings
+from database import pool, ScopedSupabaseClient
 
 security = HTTPBearer()
 
+
+class AuthUser(BaseModel):
+    """JWTのクレームから構築する軽量なユーザー情報"""
+    id: str
+    email: Optional[str] = None
+    role: Optional[str] = None
+
+
+class _JwksCache:
+    """
+    Supabase Authの公開鍵（JWKS）をプロセス内にキャッシュする
+
+    - jwks_refresh_seconds ごとに再取得
+    - 未知のkidが来た場合は即時再取得（鍵のローテーション対応、最短30秒間隔）
+    """
+
+    MIN_FORCED_REFRESH_SECONDS = 30
+
+    def __init__(self):
+        self._keys: dict[str, dict] = {}
+        self._fetched_at = 0.0
+        self._lock = threading.Lock()
+
+    def _refresh(self) -> None:
+        response = pool.http_client.get(settings.jwks_endpoint)
+        response.raise_for_status()
+        self._keys = {
+            key['kid']: key
+            for key in response.json().get('keys', [])
+            if key.get('kid')
+        }
+        self._fetched_at = time.monotonic()
+
+    def get_key(self, kid: str) -> Optional[dict]:
+        with self._lock:
+            age = time.monotonic() - self._fetched_at
+            if age > settings.jwks_refresh_seconds:
+                self._refresh()
+            elif kid not in self._keys and age > self.MIN_FORCED_REFRESH_SECONDS:
+                self._refresh()
+            return self._keys.get(kid)
+
+
+_jwks_cache = _JwksCache()
+
+
+class TokenCache:
+    """
+    検証済みトークンのLRUキャッシュ（トークンのSHA-256ハッシュをキーとする）
+
+    - 各エントリはトークンのexpとTTLのうち早い方で失効
+    - max_sizeを超えた場合は最も古く使われたエントリを破棄
+    - ヒット・ミス・破棄の回数を記録
+    """
+
+    def __init__(self, max_size: int, ttl_seconds: int):
+        self.max_size = max_size
+        self.ttl_seconds = ttl_seconds
+        self._entries: OrderedDict[str, tuple[float, Any]] = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @staticmethod
+    def _key(token: str) -> str:
+        return hashlib.sha256(token.encode('utf-8')).hexdigest()
+
+    def get(self, token: str) -> Optional[Any]:
+        key = self._key(token)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+
+            expires_at, user = entry
+            if expires_at <= time.time():
+                del self._entries[key]
+                self.misses += 1
+                return None
+
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return user
+
+    def set(self, token: str, user: Any, exp: Optional[float] = None) -> None:
+        if self.ttl_seconds <= 0 or self.max_size <= 0:
+            return
+
+        expires_at = time.time() + self.ttl_seconds
+        if exp is not None:
+            expires_at = min(expires_at, exp)
+
+        key = self._key(token)
+        with self._lock:
+            self._entries[key] = (expires_at, user)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'size': len(self._entries),
+                'max_size': self.max_size,
+                'ttl_seconds': self.ttl_seconds,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'hit_rate': self.hits / lookups if lookups else 0.0,
+            }
+
+
+token_cache = TokenCache(
+    max_size=settings.auth_cache_max_size,
+    ttl_seconds=settings.auth_cache_ttl_seconds,
+)
+
+
+def _token_exp(token: str) -> Optional[float]:
+    """トークンのexpクレームを取得（署名は検証しない。検証済みトークンにのみ使用すること）"""
+    try:
+        exp = jwt.get_unverified_claims(token).get('exp')
+        return float(exp) if exp is not None else None
+    except JWTError:
+        return None
+
+
+# アルゴリズムの種類ごとのJWKの鍵の種類（kty）
+_JWK_KEY_TYPES = {'ES': 'EC', 'RS': 'RSA', 'PS': 'RSA'}
+
+
+def verify_token_locally(token: str) -> AuthUser:
+    """
+    JWTをローカルで検証してユーザー情報を返す（Supabase Authへの通信なし）
+
+    署名・有効期限・aud・issを検証する
+    HS256の場合はJWT Secret、それ以外（ES256/RS256）はJWKSの公開鍵を使用
+    アルゴリズムは設定値（JWT_ALGORITHM）に固定し、ヘッダーのalgが異なるトークンは拒否する
+    """
+    header = jwt.get_unverified_header(token)
+    algorithm = settings.jwt_algorithm
+    if header.get('alg') != algorithm:
+        raise JWTError("署名アルゴリズムが一致しません")
+
+    if algorithm.startswith('HS'):
+        if not settings.jwt_secret:
+            raise JWTError("JWT_SECRETが設定されていません")
+        key = settings.jwt_secret
+    else:
+        key = _jwks_cache.get_key(header.get('kid', ''))
+        if key is None:
+            raise JWTError("署名鍵が見つかりません")
+        # 公開鍵の種類とアルゴリズムが対応しない場合は拒否する
+        if key.get('kty') != _JWK_KEY_TYPES.get(algorithm[:2]):
+            raise JWTError("署名鍵の種類が一致しません")
+
+    claims = jwt.decode(
+        token,
+        key,
+        algorithms=[algorithm],
+        audience=settings.jwt_audience,
+        issuer=settings.jwt_issuer_url,
+    )
+
+    if not claims.get('sub'):
+        raise JWTError("subクレームがありません")
+
+    return AuthUser(
+        id=claims['sub'],
+        email=claims.get('email'),
+        role=claims.get('role'),
+    )
+
+
 def get_supabase_client(
     credentials: HTTPAuthorizationCredentials = Depends(security)
 ) -> Client:
-    """認証トークンを含むSupabaseクライアントを取得"""
+    """
+    認証トークンを含むSupabaseクライアントを取得
+
+    共有コネクションプール上に、トークンを設定したPostgRESTクライアントを生成する
+    """
     token = credentials.credentials
-    supabase = create_client(settings.supabase_url, settings.supabase_key)
-    # 認証トークンをPostgRESTセッションに設定
-    supabase.postgrest.auth(token)
-    return supabase
+    return ScopedSupabaseClient(token)
 
 def get_supabase_client_public() -> Client:
     """
@@ -22,11 +214,7 @@ def get_supabase_client_public() -> Client:
     サービスロールキーが設定されている場合はそれを使用し、RLSをバイパスする
     設定されていない場合は通常のanon keyを使用
     """
-    # サービスロールキーがある場合はそれを使用（RLSをバイパス）
-    if settings.supabase_service_role_key:
-        return create_client(settings.supabase_url, settings.supabase_service_role_key)
-    # なければ通常のanon keyを使用
-    return create_client(settings.supabase_url, settings.supabase_key)
+    return pool.public_client
 
 async def get_current_user(
     credentials: HTTPAuthorizationCredentials = Depends(security)
@@ -34,18 +222,29 @@ async def get_current_user(
     """JWTトークンからユーザーを取得"""
     token = credentials.credentials
 
+    # 検証済みトークンのキャッシュを確認
+    cached_user = token_cache.get(token)
+    if cached_user is not None:
+        return cached_user
+
     try:
-        # ユーザー情報を取得
-        supabase = create_client(settings.supabase_url, settings.supabase_key)
-        response = supabase.auth.get_user(token)
+        # ローカル検証モード（Supabase Authへの通信を省略）
+        if settings.auth_verify_mode == "local":
+            user = verify_token_locally(token)
+        else:
+            # ユーザー情報を取得（共有クライアントのAuth APIを使用）
+            response = pool.base_client.auth.get_user(token)
+
+            if not response.user:
+                raise HTTPException(
+                    status_code=status.HTTP_401_UNAUTHORIZED,
+                    detail="認証が必要です"
+                )
 
-        if not response.user:
-            raise HTTPException(
-                status_code=status.HTTP_401_UNAUTHORIZED,
-                detail="認証が必要です"
-            )
+            user = response.user
 
-        return response.user
+        token_cache.set(token, user, exp=_token_exp(token))
+        return user
 
     except HTTPException:
         raise
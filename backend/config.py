@@ -9,6 +9,73 @@ class Settings(BaseSettings):
     cors_origins: str = "http://localhost:3000,https://ai-study-quote-collector.vercel.app"
     environment: str = "development"  # development or production
 
+    # JWT検証設定
+    auth_verify_mode: str = "remote"  # remote（Supabase Auth APIに問い合わせ）or local（署名をローカル検証）
+    jwt_secret: Optional[str] = None  # SupabaseのJWT Secret（HS256で検証する場合）
+    jwt_algorithm: str = "HS256"
+    jwt_audience: str = "authenticated"
+    jwt_issuer: Optional[str] = None  # 未設定の場合は {supabase_url}/auth/v1
+    jwks_url: Optional[str] = None  # 未設定の場合は {supabase_url}/auth/v1/.well-known/jwks.json
+    jwks_refresh_seconds: int = 600  # JWKSの再取得間隔（秒）
+
+    # 検証済みトークンのキャッシュ設定
+    auth_cache_ttl_seconds: int = 60  # キャッシュの最大保持時間（秒）。0で無効
+    auth_cache_max_size: int = 1024  # キャッシュする最大トークン数
+
+    # 統計情報エンドポイント（GET /health/stats）のトークン
+    # 未設定の場合はエンドポイントを無効にする（404）。設定した場合は X-Stats-Token ヘッダーで一致を確認
+    health_stats_token: Optional[str] = None
+
+    # Supabase接続プール設定（プロセス全体で共有するHTTPクライアント）
+    supabase_http2: bool = True
+    supabase_pool_max_connections: int = 20
+    supabase_pool_max_keepalive_connections: int = 10
+    supabase_pool_keepalive_expiry: float = 30.0  # アイドル接続を保持する時間（秒）
+    supabase_timeout_seconds: float = 10.0
+    supabase_connect_timeout_seconds: float = 5.0
+
+    # IN句の分割設定（大量のIDを指定する取得をURLの長さの上限内に分割して並列実行）
+    in_list_chunk_size: int = 200  # 1回のリクエストで指定するIDの最大数
+    in_list_max_workers: int = 4  # 同時に実行するリクエスト数
+    in_list_page_size: int = 1000  # 分割したリクエストごとに1回で取得する最大行数（PostgRESTの max-rows 以下）
+
+    # フレーズ一覧キャッシュ設定（ユーザー単位、プロセス内）
+    quote_cache_max_bytes: int = 64 * 1024 * 1024  # キャッシュ全体の上限（JSON換算のバイト数）。0で無効
+    quote_cache_ttl_seconds: int = 300  # 各エントリの最大保持時間（秒）
+
+    # フレーズ検索インデックス設定（ユーザー単位のN-gramインデックス、フレーズ一覧キャッシュに格納）
+    search_index_enabled: bool = True  # falseの場合はDB側のILIKE検索を使用
+    search_index_batch_size: int = 1000  # インデックス構築時の1回あたりの取得件数
+    search_index_max_quotes: int = 20000  # これを超えるユーザーはDB側のILIKE検索を使用（メモリ使用量の上限）
+
+    # フレーズインポート設定（POST /api/quotes/import）
+    quote_import_chunk_size: int = 500  # 1回のDB登録（1トランザクション）あたりの件数
+    quote_import_max_line_bytes: int = 64 * 1024  # 1行の最大バイト数
+    quote_import_max_errors: int = 1000  # レスポンスに含めるエラーの最大件数
+
+    # 冪等キー設定（POST /api/quotes の Idempotency-Key ヘッダー）
+    idempotency_backend: str = "memory"  # memory（プロセス内）or sqlite（ファイル、同一ホストのワーカー間で共有）
+    idempotency_ttl_seconds: int = 24 * 60 * 60  # レスポンスの保存期間（秒）
+    idempotency_max_entries: int = 10000  # memoryの場合の最大保存件数
+    idempotency_sqlite_path: str = "idempotency.sqlite3"
+
+    # 公開フレーズキャッシュ設定（GET /api/quotes/public、プロセス内で全リクエストに共有）
+    public_feed_cache_ttl_seconds: int = 60  # この時間を過ぎたらバックグラウンドで再取得（秒）。0で無効
+    public_feed_cache_max_stale_seconds: int = 600  # 再取得に失敗し続けた場合に古い内容を返す上限（秒）
+    public_feed_pool_size: int = 500  # キャッシュするフレーズ数（この範囲内のページはDBにアクセスせずに返す）
+
+    # 公開フレーズスナップショット設定（静的JSONファイル、GET /api/quotes/public/snapshot/{page}）
+    public_feed_snapshot_enabled: bool = False  # trueの場合は起動中のプロセスで定期的に書き出す
+    public_feed_snapshot_dir: str = "snapshots/public_feed"
+    public_feed_snapshot_pages: int = 10  # 書き出すページ数
+    public_feed_snapshot_page_size: int = 50  # 1ページあたりのフレーズ数
+    public_feed_snapshot_interval_seconds: int = 300  # 書き出しの間隔（秒）。シードの切り替え・CDNのキャッシュ期間にも使用
+
+    # レスポンス高速化設定
+    # trueの場合、フレーズ一覧はDBの値を検証せずにモデル化し、response_modelの再検証も省略してJSON化する
+    # （日時はDBの文字列をそのまま返すため、タイムゾーン表記が "Z" ではなく "+00:00" になる）
+    fast_serialization: bool = False
+
     model_config = ConfigDict(
         env_file=".env",
         env_file_encoding='utf-8',
@@ -16,4 +83,14 @@ class Settings(BaseSettings):
         extra='ignore'  # 未定義のフィールドを無視（.envに古い設定があっても動作する）
     )
 
+    @property
+    def jwt_issuer_url(self) -> str:
+        """JWTのiss（発行者）として期待する値"""
+        return self.jwt_issuer or f"{self.supabase_url.rstrip('/')}/auth/v1"
+
+    @property
+    def jwks_endpoint(self) -> str:
+        """公開鍵（JWKS）の取得先URL"""
+        return self.jwks_url or f"{self.jwt_issuer_url}/.well-known/jwks.json"
+
 settings = Settings()
@@ -0,0 +1,185 @@
+"""
+Supabase/PostgRESTへの接続プール
+
+プロセス全体で1つのhttpx.Client（Keep-Alive・HTTP/2対応）を共有し、
+リクエストごとには認証トークンを設定した軽量なPostgRESTクライアントだけを生成する
+"""
+
+import threading
+from typing import Optional
+
+import httpx
+from postgrest import SyncPostgrestClient
+from postgrest.constants import DEFAULT_POSTGREST_CLIENT_HEADERS
+from supabase import create_client, Client, SupabaseAuthClient
+from supabase.lib.client_options import SyncClientOptions
+from config import settings
+
+
+class _PoolStats:
+    """共有コネクションプールの利用状況（接続の再利用率の確認用）"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.requests = 0
+        self.connections_opened = 0
+        self.errors = 0
+
+    def on_request(self, request: httpx.Request) -> None:
+        with self._lock:
+            self.requests += 1
+        # httpcoreのトレース機能で新規TCP接続の確立を検知する
+        request.extensions['trace'] = self._trace
+
+    def on_response(self, response: httpx.Response) -> None:
+        if response.is_server_error:
+            with self._lock:
+                self.errors += 1
+
+    def _trace(self, event_name: str, info: dict) -> None:
+        if event_name == 'connection.connect_tcp.started':
+            with self._lock:
+                self.connections_opened += 1
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            reused = max(self.requests - self.connections_opened, 0)
+            return {
+                'requests': self.requests,
+                'connections_opened': self.connections_opened,
+                'connection_reuse_rate': reused / self.requests if self.requests else 0.0,
+                'server_errors': self.errors,
+            }
+
+
+class SupabasePool:
+    """プロセス全体で共有するHTTPクライアントとSupabaseクライアント"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._http_client: Optional[httpx.Client] = None
+        self._base_client: Optional[Client] = None
+        self._public_client: Optional['ScopedSupabaseClient'] = None
+        self.stats = _PoolStats()
+
+    def start(self) -> None:
+        """接続プールを生成（起動時に呼び出す。未起動の場合は初回利用時に生成）"""
+        with self._lock:
+            if self._http_client is not None:
+                return
+
+            self._http_client = httpx.Client(
+                http2=settings.supabase_http2,
+                limits=httpx.Limits(
+                    max_connections=settings.supabase_pool_max_connections,
+                    max_keepalive_connections=settings.supabase_pool_max_keepalive_connections,
+                    keepalive_expiry=settings.supabase_pool_keepalive_expiry,
+                ),
+                timeout=httpx.Timeout(
+                    settings.supabase_timeout_seconds,
+                    connect=settings.supabase_connect_timeout_seconds,
+                ),
+                follow_redirects=True,
+                event_hooks={
+                    'request': [self.stats.on_request],
+                    'response': [self.stats.on_response],
+                },
+            )
+            self._base_client = create_client(
+                settings.supabase_url,
+                settings.supabase_key,
+                options=SyncClientOptions(httpx_client=self._http_client),
+            )
+            # 公開エンドポイント用（サービスロールキーがあればRLSをバイパス）
+            public_key = settings.supabase_service_role_key or settings.supabase_key
+            self._public_client = ScopedSupabaseClient(public_key, api_key=public_key)
+
+    def close(self) -> None:
+        """接続プールを閉じる（終了時に呼び出す）"""
+        with self._lock:
+            if self._http_client is not None:
+                self._http_client.close()
+            self._http_client = None
+            self._base_client = None
+            self._public_client = None
+
+    @property
+    def http_client(self) -> httpx.Client:
+        if self._http_client is None:
+            self.start()
+        return self._http_client
+
+    @property
+    def base_client(self) -> Client:
+        """anon keyで生成した共有クライアント（Auth APIの呼び出し等に使用）"""
+        if self._base_client is None:
+            self.start()
+        return self._base_client
+
+    @property
+    def public_client(self) -> 'ScopedSupabaseClient':
+        if self._public_client is None:
+            self.start()
+        return self._public_client
+
+    def pool_stats(self) -> dict:
+        stats = self.stats.snapshot()
+        stats.update({
+            'http2': settings.supabase_http2,
+            'max_connections': settings.supabase_pool_max_connections,
+            'max_keepalive_connections': settings.supabase_pool_max_keepalive_connections,
+        })
+        return stats
+
+
+pool = SupabasePool()
+
+
+class ScopedSupabaseClient:
+    """
+    共有コネクションプール上で動作するリクエスト単位のクライアント
+
+    ルーターが利用する table / from_ / rpc を提供する
+    生成時にHTTPセッションを作らないため、リクエストごとに生成しても低コスト
+    """
+
+    def __init__(self, token: str, api_key: Optional[str] = None):
+        self._token = token
+        self._api_key = api_key or settings.supabase_key
+        self.postgrest = SyncPostgrestClient(
+            f"{settings.supabase_url.rstrip('/')}/rest/v1",
+            headers={
+                **DEFAULT_POSTGREST_CLIENT_HEADERS,
+                'apikey': self._api_key,
+                'Authorization': f'Bearer {token}',
+            },
+            http_client=pool.http_client,
+        )
+
+    def table(self, table_name: str):
+        return self.postgrest.from_(table_name)
+
+    def from_(self, table_name: str):
+        return self.postgrest.from_(table_name)
+
+    def rpc(self, fn: str, params: Optional[dict] = None, **kwargs):
+        return self.postgrest.rpc(fn, params or {}, **kwargs)
+
+    @property
+    def auth(self) -> SupabaseAuthClient:
+        """
+        Auth APIのクライアント（参照ごとに新しく生成する）
+
+        共有クライアント（pool.base_client）のAuthはセッションをプロセス内で保持するため、
+        リクエスト間でセッションが共有されないよう、セッションを保存しないクライアントを返す
+        """
+        return SupabaseAuthClient(
+            url=f"{settings.supabase_url.rstrip('/')}/auth/v1",
+            headers={
+                'apikey': self._api_key,
+                'Authorization': f'Bearer {self._token}',
+            },
+            auto_refresh_token=False,
+            persist_session=False,
+            http_client=pool.http_client,
+        )
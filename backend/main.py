@@ -1,10 +1,42 @@
-from fastapi import FastAPI, Depends, HTTPException
+import asyncio
+import secrets
+from contextlib import asynccontextmanager
+from typing import Optional
+from fastapi import FastAPI, Depends, Header, HTTPException, Request, status
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.openapi.utils import get_openapi
-from auth import get_current_user, get_supabase_client
+from auth import get_current_user, get_supabase_client, token_cache
 from routes import activities, tags, books, sns_users, quotes, export, ocr
 from supabase import Client
 from config import settings
+from database import pool
+from services.quote_cache import quote_cache
+from services.data_version import CACHE_CONTROL
+from services.idempotency import idempotency_store
+from services.junction_stats import junction_change_stats
+from services.public_feed_cache import public_feed_cache
+from services.public_feed_snapshot import public_feed_snapshots
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # 起動時に共有コネクションプールを生成し、終了時に閉じる
+    pool.start()
+
+    # 公開フレーズのスナップショットを定期的に書き出す（services/public_feed_snapshot.py）
+    snapshot_task = None
+    if settings.public_feed_snapshot_enabled:
+        snapshot_task = asyncio.create_task(public_feed_snapshots.run_periodically(
+            lambda: quotes.render_public_feed_snapshot(pool.public_client),
+            settings.public_feed_snapshot_interval_seconds
+        ))
+
+    yield
+
+    if snapshot_task is not None:
+        snapshot_task.cancel()
+    pool.close()
+
 
 app = FastAPI(
     title="ことばアーカイブ API",
@@ -12,7 +44,8 @@ app = FastAPI(
     description="ことばアーカイブ アプリのバックエンド（API）をFastAPIで作成",
     swagger_ui_parameters={
         "persistAuthorization": True  # 認証情報を保持
-    }
+    },
+    lifespan=lifespan
 )
 
 # カスタムOpenAPIスキーマ（セキュリティスキームを明示的に定義）
@@ -60,6 +93,16 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# 条件付きGET対応の一覧APIのレスポンスにETagを付与（services/data_version.py）
+@app.middleware("http")
+async def add_etag_header(request: Request, call_next):
+    response = await call_next(request)
+    etag = getattr(request.state, 'etag', None)
+    if etag and response.status_code == 200:
+        response.headers['ETag'] = etag
+        response.headers['Cache-Control'] = CACHE_CONTROL
+    return response
+
 # ルーター登録
 app.include_router(activities.router)
 app.include_router(tags.router)
@@ -77,6 +120,30 @@ def root():
 def health_check():
     return {"status": "healthy"}
 
+def require_health_stats_token(
+    x_stats_token: Optional[str] = Header(None, alias="X-Stats-Token")
+) -> None:
+    """統計情報エンドポイントのアクセス制限（HEALTH_STATS_TOKEN 未設定の場合は無効）"""
+    if not settings.health_stats_token:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Not Found")
+
+    if x_stats_token is None or not secrets.compare_digest(x_stats_token, settings.health_stats_token):
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="アクセス権限がありません")
+
+
+@app.get("/health/stats", dependencies=[Depends(require_health_stats_token)])
+def health_stats():
+    """キャッシュ等の統計情報（効果測定用、内部向け）"""
+    return {
+        "auth_token_cache": token_cache.stats(),
+        "supabase_pool": pool.pool_stats(),
+        "quote_cache": quote_cache.stats(),
+        "idempotency": idempotency_store.stats(),
+        "quote_junction_changes": junction_change_stats.stats(),
+        "public_feed_cache": public_feed_cache.stats(),
+        "public_feed_snapshot": public_feed_snapshots.stats()
+    }
+
 @app.get("/api/me")
 async def get_me(user = Depends(get_current_user)):
     """認証テスト用エンドポイント"""
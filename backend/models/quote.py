@@ -110,6 +110,7 @@ class QuoteItemCreate(BaseModel):
     text: str = Field(..., min_length=1, max_length=10000)
     activity_ids: list[int] = Field(..., min_items=1)
     tag_ids: list[int] = Field(default_factory=list)
+    tag_names: list[str] = Field(default_factory=list, description="タグ名リスト（#は自動付与、未登録のタグは作成・削除済みのタグは復活）")
 
 
 class QuoteCreate(BaseModel):
@@ -124,6 +125,21 @@ class QuoteCreate(BaseModel):
     reference_link: Optional[str] = None
 
 
+class QuoteImportItem(BaseModel):
+    """インポートするフレーズ（NDJSONの1行分、出典はフレーズごとに指定）"""
+    text: str = Field(..., min_length=1, max_length=10000)
+    source_type: Literal["BOOK", "SNS", "OTHER"]
+    book_id: Optional[int] = None
+    sns_user_id: Optional[int] = None
+    page_number: Optional[int] = None
+    source_meta: Optional[dict] = None
+    is_public: bool = False
+    reference_link: Optional[str] = None
+    activity_ids: list[int] = Field(..., min_items=1)
+    tag_ids: list[int] = Field(default_factory=list)
+    tag_names: list[str] = Field(default_factory=list)
+
+
 class QuoteUpdate(BaseModel):
     """フレーズ更新リクエスト"""
     text: Optional[str] = Field(None, min_length=1, max_length=10000)
@@ -133,6 +149,22 @@ class QuoteUpdate(BaseModel):
     reference_link: Optional[str] = None
 
 
+class QuoteBulkUpdate(BaseModel):
+    """フレーズ一括更新リクエスト（指定したすべてのフレーズに同じ変更を適用）"""
+    quote_ids: list[int] = Field(..., min_items=1, max_items=1000)
+    is_public: Optional[bool] = None
+    reference_link: Optional[str] = None
+    add_activity_ids: list[int] = Field(default_factory=list)
+    remove_activity_ids: list[int] = Field(default_factory=list)
+    add_tag_ids: list[int] = Field(default_factory=list)
+    remove_tag_ids: list[int] = Field(default_factory=list)
+
+
+class QuoteBulkDelete(BaseModel):
+    """フレーズ一括削除リクエスト"""
+    quote_ids: list[int] = Field(..., min_items=1, max_items=1000)
+
+
 # ====================================
 # レスポンスモデル
 # ====================================
@@ -148,11 +180,45 @@ class QuotesCreateResponse(BaseModel):
     created_count: int
 
 
+class QuoteImportError(BaseModel):
+    """インポートのエラー（行番号は1始まり）"""
+    line: int
+    message: str
+
+
+class QuoteImportResponse(BaseModel):
+    """フレーズインポートレスポンス"""
+    imported_count: int
+    error_count: int
+    errors: list[QuoteImportError]  # 先頭から最大 quote_import_max_errors 件
+    elapsed_seconds: float
+    rows_per_second: float
+
+
 class QuoteDeleteResponse(BaseModel):
     """フレーズ削除レスポンス"""
     success: bool
 
 
+class QuoteBulkDeleteResponse(BaseModel):
+    """フレーズ一括削除レスポンス"""
+    deleted_count: int
+    not_found_ids: list[int]  # 存在しない・他ユーザー・削除済みのフレーズID
+
+
+class QuoteBulkUpdateResult(BaseModel):
+    """フレーズ一括更新の結果（フレーズ1件分）"""
+    id: int
+    status: Literal["updated", "not_found"]
+
+
+class QuoteBulkUpdateResponse(BaseModel):
+    """フレーズ一括更新レスポンス（結果はリクエストのquote_idsの順）"""
+    results: list[QuoteBulkUpdateResult]
+    updated_count: int
+    not_found_count: int
+
+
 # ====================================
 # グループ化レスポンスモデル
 # ====================================
@@ -189,6 +255,7 @@ class QuotesGroupedResponse(BaseModel):
     items: list[BookGroupItem | SnsGroupItem | OtherGroupItem]
     total: int
     has_more: bool
+    next_cursor: Optional[str] = None  # カーソルモードの次ページ取得用カーソル
 
 
 # ====================================
@@ -228,3 +295,4 @@ class PublicQuotesResponse(BaseModel):
     items: list[PublicQuoteItem]
     total: int
     has_more: bool
+    seed: Optional[int] = None  # 並び順のシード（次ページの取得時に指定すると同じ順序の続きを返す）
@@ -4,6 +4,7 @@ from pydantic import BaseModel
 from auth import get_current_user, get_supabase_client
 from models.book import Book, BookCreate, BooksResponse, BookResponse
 from services.amazon_scraper import AmazonScraper
+from services.data_version import check_not_modified
 
 router = APIRouter(
     prefix="/api/books",
@@ -21,7 +22,7 @@ class BookFromUrlResponse(BaseModel):
     book_info: dict
 
 
-@router.get("", response_model=BooksResponse)
+@router.get("", response_model=BooksResponse, dependencies=[Depends(check_not_modified)])
 async def get_books(
     limit: int = Query(50, ge=1, le=100, description="取得件数"),
     offset: int = Query(0, ge=0, description="オフセット"),
@@ -34,6 +35,7 @@ async def get_books(
     ユーザーの書籍一覧を取得
 
     - **認証**: 必須
+    - **ETag**: If-None-Match に前回のETagを指定すると、データに変更がない場合は 304 Not Modified を返す
     - **検索**: タイトルと著者名で部分一致
     - **ソート**: created_at降順
     - **ページネーション**: limit, offset
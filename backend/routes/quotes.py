@@ -1,12 +1,23 @@
-from fastapi import APIRouter, Depends, HTTPException, status, Query
+from fastapi import APIRouter, Depends, Header, HTTPException, status, Query, Request, Response
+from fastapi.responses import FileResponse, JSONResponse, StreamingResponse
+from postgrest.exceptions import APIError
+from pydantic import BaseModel
 from supabase import Client
 from auth import get_current_user, get_supabase_client, get_supabase_client_public
 from models.quote import (
     QuoteCreate,
+    QuoteImportItem,
+    QuoteImportError,
+    QuoteImportResponse,
     QuoteUpdate,
+    QuoteBulkUpdate,
+    QuoteBulkUpdateResult,
+    QuoteBulkUpdateResponse,
     QuotesCreateResponse,
     QuoteResponse,
     QuoteDeleteResponse,
+    QuoteBulkDelete,
+    QuoteBulkDeleteResponse,
     QuotesGroupedResponse,
     PublicQuotesResponse,
     PublicQuoteItem,
@@ -23,8 +34,25 @@ from models.quote import (
     Quote,
     QuoteWithDetails,
 )
-from typing import Optional, Literal
+from services.quote_cache import quote_cache
+from services.search_index import NgramIndex, split_terms
+from services.data_version import check_not_modified, etag_matches
+from services.quote_import import iter_ndjson_lines, parse_import_line
+from services.idempotency import IdempotencyKeyInUse, IdempotencyKeyMismatch, idempotency_store
+from services.junction_stats import junction_change_stats
+from services.public_feed_cache import PublicFeedPool, public_feed_cache
+from services.public_feed_snapshot import public_feed_snapshots
+from config import settings
+from typing import Any, Iterable, Iterator, Optional, Literal
 from collections import defaultdict
+from functools import lru_cache, partial
+import asyncio
+import base64
+import binascii
+import hashlib
+import json
+import os
+import time
 
 router = APIRouter(
     prefix="/api/quotes",
@@ -32,6 +60,149 @@ router = APIRouter(
 )
 
 
+def encode_cursor(created_at: str, quote_id: int, total: int) -> str:
+    """
+    キーセットページネーション用のカーソルを生成
+
+    (created_at, id) に加えて先頭ページで数えた総件数を保持し、
+    2ページ目以降は件数カウントを省略する
+    """
+    payload = json.dumps({'c': created_at, 'i': quote_id, 't': total}, separators=(',', ':'))
+    return base64.urlsafe_b64encode(payload.encode('utf-8')).decode('ascii').rstrip('=')
+
+
+def decode_cursor(cursor: str) -> tuple[str, int, int]:
+    """カーソルを (created_at, id, total) に復元（不正な場合はValueError）"""
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode('ascii')))
+        return str(payload['c']), int(payload['i']), int(payload['t'])
+    except (binascii.Error, UnicodeError, ValueError, KeyError, TypeError) as e:
+        raise ValueError("不正なカーソルです") from e
+
+
+def fetch_quotes_page(
+    supabase: Client,
+    user_id: str,
+    function_name: str,
+    params: dict,
+    data_version: Optional[int] = None,
+) -> dict:
+    """
+    フレーズ一覧のページをDB関数で取得（ユーザー単位のキャッシュを経由）
+
+    キャッシュはフレーズ・タグの更新時に quote_cache.invalidate_user で破棄される
+    他のインスタンスで更新された場合に備え、キーにはETagと同じデータバージョン
+    （check_not_modified の戻り値）を含める（バージョンが変わると別のエントリになる）
+    """
+    cache_key = (function_name, data_version, json.dumps(params, sort_keys=True))
+    page = quote_cache.get(user_id, cache_key)
+    if page is None:
+        page_response = supabase.rpc(function_name, params).execute()
+        page = page_response.data or {}
+        quote_cache.set(user_id, cache_key, page)
+    return page
+
+
+@lru_cache(maxsize=None)
+def _model_defaults(model: type[BaseModel]) -> dict[str, Any]:
+    """モデルのフィールドとデフォルト値（必須フィールドはNone）を定義順に返す"""
+    return {
+        name: None if field.is_required() else field.get_default(call_default_factory=True)
+        for name, field in model.model_fields.items()
+    }
+
+
+def build_model(model: type[BaseModel], **fields):
+    """
+    レスポンス用のモデルを生成
+
+    fast_serialization が有効な場合はDBの値を信頼して検証を省略し、
+    モデルと同じフィールド構成のdictを返す
+    """
+    if settings.fast_serialization:
+        return {**_model_defaults(model), **fields}
+    return model(**fields)
+
+
+def model_response(content):
+    """
+    レスポンスを返す
+
+    fast_serialization が有効な場合はJSONに変換したResponseを返し、
+    FastAPIによるresponse_modelの再検証・変換を省略する
+    """
+    if settings.fast_serialization:
+        return Response(
+            content=json.dumps(content, ensure_ascii=False, separators=(',', ':'), default=str),
+            media_type='application/json'
+        )
+    return content
+
+
+def search_index_cache_key(data_version: Optional[int]) -> tuple:
+    """検索インデックスのキャッシュキー（データバージョンごとに別のエントリ）"""
+    return ('search_index', data_version)
+
+
+def get_search_index(
+    supabase: Client,
+    user_id: str,
+    data_version: Optional[int] = None,
+) -> Optional[NgramIndex]:
+    """
+    ユーザーのフレーズ検索インデックスを取得（未構築の場合は構築してキャッシュ）
+
+    検索対象: フレーズテキスト、書籍タイトル・著者名、SNSアカウント名・表示名
+    フレーズ一覧キャッシュに格納するため、フレーズ・タグの更新時に同時に破棄される
+    （他のインスタンスでの更新は、キーに含めたデータバージョンの変化で別のエントリになる）
+    フレーズ数が上限を超える場合はNoneを返す（呼び出し側はDB側の検索を使用）
+    """
+    cache_key = search_index_cache_key(data_version)
+    index = quote_cache.get(user_id, cache_key)
+    if index is not None:
+        # Falseはインデックス対象外のユーザー
+        return None if index is False else index
+
+    index = NgramIndex()
+    batch_size = settings.search_index_batch_size
+    start = 0
+    while True:
+        response = supabase.table('quotes') \
+            .select(
+                'id, text, books(title, author), sns_users(handle, display_name)',
+                count='exact' if start == 0 else None,
+            ) \
+            .eq('user_id', user_id) \
+            .is_('deleted_at', 'null') \
+            .order('id') \
+            .range(start, start + batch_size - 1) \
+            .execute()
+
+        if start == 0 and (response.count or 0) > settings.search_index_max_quotes:
+            quote_cache.set(user_id, cache_key, False, size=1)
+            return None
+
+        rows = response.data or []
+        for row in rows:
+            book = row.get('books') or {}
+            sns_user = row.get('sns_users') or {}
+            index.add(row['id'], [
+                row.get('text'),
+                book.get('title'),
+                book.get('author'),
+                sns_user.get('handle'),
+                sns_user.get('display_name'),
+            ])
+
+        if len(rows) < batch_size:
+            break
+        start += batch_size
+
+    quote_cache.set(user_id, cache_key, index, size=index.estimated_bytes)
+    return index
+
+
 # ====================================
 # DELETE /api/quotes/{quote_id}
 # ====================================
@@ -48,34 +219,25 @@ async def delete_quote(
     - **quote_id**: フレーズID
     """
     try:
-        # フレーズの存在確認と権限チェック
-        existing_response = supabase.table('quotes') \
-            .select('id') \
-            .eq('id', quote_id) \
-            .eq('user_id', user.id) \
-            .is_('deleted_at', 'null') \
-            .execute()
-
-        if not existing_response.data or len(existing_response.data) == 0:
-            raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND,
-                detail="フレーズが見つかりません"
-            )
-
-        # ソフトデリート
+        # 本人の未削除フレーズのみを条件にソフトデリート（存在確認の事前クエリは行わない）
         from datetime import datetime
         delete_response = supabase.table('quotes') \
             .update({'deleted_at': datetime.now().isoformat()}) \
             .eq('id', quote_id) \
             .eq('user_id', user.id) \
+            .is_('deleted_at', 'null') \
+            .select('id') \
             .execute()
 
+        # 更新された行がない場合は存在しない・他ユーザー・削除済みのフレーズ
         if not delete_response.data:
             raise HTTPException(
-                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-                detail="フレーズの削除に失敗しました"
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="フレーズが見つかりません"
             )
 
+        quote_cache.invalidate_user(user.id)
+
         return QuoteDeleteResponse(success=True)
 
     except HTTPException:
@@ -88,6 +250,46 @@ async def delete_quote(
         )
 
 
+# ====================================
+# DELETE /api/quotes
+# ====================================
+@router.delete("", response_model=QuoteBulkDeleteResponse)
+async def bulk_delete_quotes(
+    quote_delete: QuoteBulkDelete,
+    user=Depends(get_current_user),
+    supabase: Client = Depends(get_supabase_client)
+):
+    """
+    複数のフレーズを一括削除（ソフトデリート）
+
+    - **認証**: 必須
+    - **quote_ids**: 削除するフレーズIDリスト（最大1000件）
+    - **not_found_ids**: 存在しない・削除済みのため削除されなかったフレーズID
+    """
+    try:
+        quote_ids = list(dict.fromkeys(quote_delete.quote_ids))
+
+        # 本人の未削除フレーズをDB関数で1トランザクションでまとめてソフトデリートし、削除したIDのみ取得
+        # （IDはURLではなくリクエストボディで渡すため、件数が多くてもURLの長さの上限を超えない）
+        delete_response = supabase.rpc('bulk_delete_quotes', {'p_quote_ids': quote_ids}).execute()
+
+        deleted_ids = set((delete_response.data or {}).get('deleted_ids') or [])
+        if deleted_ids:
+            quote_cache.invalidate_user(user.id)
+
+        return QuoteBulkDeleteResponse(
+            deleted_count=len(deleted_ids),
+            not_found_ids=[quote_id for quote_id in quote_ids if quote_id not in deleted_ids]
+        )
+
+    except Exception as e:
+        print(f"[ERROR] フレーズ一括削除エラー: {type(e).__name__}: {str(e)}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"サーバーエラーが発生しました: {str(e)}"
+        )
+
+
 # ====================================
 # PUT /api/quotes/{quote_id}
 # ====================================
@@ -107,108 +309,38 @@ async def update_quote(
     - **activity_ids**: 活動領域IDリスト（任意）
     - **tag_ids**: タグIDリスト（任意）
     - **is_public**: 公開フラグ（任意）
+    - **関連付け**: 現在の活動領域・タグとの差分のみ反映（変更がなければ書き込みは行わない）
     """
     try:
-        # フレーズの存在確認と権限チェック
-        existing_response = supabase.table('quotes') \
-            .select('id') \
-            .eq('id', quote_id) \
-            .eq('user_id', user.id) \
-            .is_('deleted_at', 'null') \
-            .execute()
-
-        if not existing_response.data or len(existing_response.data) == 0:
+        # フレーズと活動領域・タグの関連付けをDB関数で1トランザクションで更新し、
+        # 更新後のフレーズを出典・活動領域・タグ付きで取得
+        update_response = supabase.rpc('update_quote_with_relations', {
+            'p_quote_id': quote_id,
+            'p_text': quote_update.text,
+            'p_is_public': quote_update.is_public,
+            'p_reference_link': quote_update.reference_link,
+            'p_activity_ids': quote_update.activity_ids,
+            'p_tag_ids': quote_update.tag_ids,
+        }).execute()
+
+        # 存在しない・他ユーザー・削除済みのフレーズの場合はNULL
+        quote_data = update_response.data
+        if not quote_data:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail="フレーズが見つかりません"
             )
 
-        # テキスト、公開フラグ、またはリンクを更新
-        update_data = {}
-        if quote_update.text is not None:
-            update_data['text'] = quote_update.text
-        if quote_update.is_public is not None:
-            update_data['is_public'] = quote_update.is_public
-        if quote_update.reference_link is not None:
-            update_data['reference_link'] = quote_update.reference_link
-
-        if update_data:
-            update_response = supabase.table('quotes') \
-                .update(update_data) \
-                .eq('id', quote_id) \
-                .eq('user_id', user.id) \
-                .execute()
-
-            if not update_response.data:
-                raise HTTPException(
-                    status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-                    detail="フレーズの更新に失敗しました"
-                )
-
-        # 活動領域を更新
-        if quote_update.activity_ids is not None:
-            # 既存の活動領域を削除
-            supabase.table('quote_activities') \
-                .delete() \
-                .eq('quote_id', quote_id) \
-                .execute()
-
-            # 新しい活動領域を挿入
-            if len(quote_update.activity_ids) > 0:
-                activity_inserts = [
-                    {'quote_id': quote_id, 'activity_id': activity_id}
-                    for activity_id in quote_update.activity_ids
-                ]
-                activity_response = supabase.table('quote_activities') \
-                    .insert(activity_inserts) \
-                    .execute()
-
-                if not activity_response.data:
-                    raise HTTPException(
-                        status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-                        detail="活動領域の更新に失敗しました"
-                    )
-
-        # タグを更新
-        if quote_update.tag_ids is not None:
-            # 既存のタグを削除
-            supabase.table('quote_tags') \
-                .delete() \
-                .eq('quote_id', quote_id) \
-                .execute()
-
-            # 新しいタグを挿入
-            if len(quote_update.tag_ids) > 0:
-                tag_inserts = [
-                    {'quote_id': quote_id, 'tag_id': tag_id}
-                    for tag_id in quote_update.tag_ids
-                ]
-                tag_response = supabase.table('quote_tags') \
-                    .insert(tag_inserts) \
-                    .execute()
-
-                if not tag_response.data:
-                    raise HTTPException(
-                        status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-                        detail="タグの更新に失敗しました"
-                    )
+        # 関連付けは現在の行との差分のみ反映される（反映した行数を集計）
+        # 活動領域・タグを指定しなかった更新（テキスト・公開設定のみ）は集計しない
+        junction_changes = quote_data.pop('junction_changes', None)
+        relations_submitted = quote_update.activity_ids is not None or quote_update.tag_ids is not None
+        if junction_changes is not None and relations_submitted:
+            junction_change_stats.record(junction_changes)
 
-        # 更新後のフレーズを取得
-        # Supabaseの機能で関連データを取得
-        quote_response = supabase.table('quotes') \
-            .select('id, text, page_number, is_public, reference_link, created_at, quote_activities(activities(id, name, icon)), quote_tags(tags(id, name))') \
-            .eq('id', quote_id) \
-            .single() \
-            .execute()
-
-        if not quote_response.data:
-            raise HTTPException(
-                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-                detail="更新後のフレーズの取得に失敗しました"
-            )
+        quote_cache.invalidate_user(user.id)
 
         # レスポンスを構築
-        quote_data = quote_response.data
         activities = [
             ActivityNested(**qa['activities'])
             for qa in quote_data.get('quote_activities', [])
@@ -241,12 +373,83 @@ async def update_quote(
         )
 
 
+# ====================================
+# PATCH /api/quotes
+# ====================================
+@router.patch("", response_model=QuoteBulkUpdateResponse)
+async def bulk_update_quotes(
+    quote_update: QuoteBulkUpdate,
+    user=Depends(get_current_user),
+    supabase: Client = Depends(get_supabase_client)
+):
+    """
+    複数のフレーズを一括更新（すべてのフレーズに同じ変更を適用）
+
+    - **認証**: 必須
+    - **quote_ids**: 対象のフレーズIDリスト（最大1000件）
+    - **is_public**: 公開フラグ（任意）
+    - **reference_link**: 参照リンク（任意）
+    - **add_activity_ids / remove_activity_ids**: 追加・解除する活動領域IDリスト（任意）
+    - **add_tag_ids / remove_tag_ids**: 追加・解除するタグIDリスト（任意）
+    - **結果**: フレーズごとに updated / not_found（存在しない・削除済み）を返す
+    """
+    if set(quote_update.add_activity_ids) & set(quote_update.remove_activity_ids):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="同じ活動領域を追加と解除の両方に指定することはできません"
+        )
+
+    if set(quote_update.add_tag_ids) & set(quote_update.remove_tag_ids):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="同じタグを追加と解除の両方に指定することはできません"
+        )
+
+    try:
+        # 対象のフレーズ全体に集合演算で変更を適用（1回のRPC・1トランザクション）
+        quote_ids = list(dict.fromkeys(quote_update.quote_ids))
+        update_response = supabase.rpc('bulk_update_quotes', {
+            'p_quote_ids': quote_ids,
+            'p_is_public': quote_update.is_public,
+            'p_reference_link': quote_update.reference_link,
+            'p_add_activity_ids': quote_update.add_activity_ids,
+            'p_remove_activity_ids': quote_update.remove_activity_ids,
+            'p_add_tag_ids': quote_update.add_tag_ids,
+            'p_remove_tag_ids': quote_update.remove_tag_ids,
+        }).execute()
+
+        updated_ids = set((update_response.data or {}).get('updated_ids') or [])
+        if updated_ids:
+            quote_cache.invalidate_user(user.id)
+
+        results = [
+            QuoteBulkUpdateResult(id=quote_id, status="updated" if quote_id in updated_ids else "not_found")
+            for quote_id in quote_ids
+        ]
+
+        return QuoteBulkUpdateResponse(
+            results=results,
+            updated_count=len(updated_ids),
+            not_found_count=len(results) - len(updated_ids)
+        )
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        print(f"[ERROR] フレーズ一括更新エラー: {type(e).__name__}: {str(e)}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"サーバーエラーが発生しました: {str(e)}"
+        )
+
+
 # ====================================
 # POST /api/quotes
 # ====================================
 @router.post("", response_model=QuotesCreateResponse, status_code=status.HTTP_201_CREATED)
 async def create_quotes(
     quote_create: QuoteCreate,
+    idempotency_key: Optional[str] = Header(None, alias="Idempotency-Key", max_length=255),
     user=Depends(get_current_user),
     supabase: Client = Depends(get_supabase_client)
 ):
@@ -254,13 +457,37 @@ async def create_quotes(
     フレーズを一括登録
 
     - **認証**: 必須
-    - **quotes**: フレーズリスト（各フレーズにtext, activity_ids, tag_ids）
+    - **quotes**: フレーズリスト（各フレーズにtext, activity_ids, tag_ids, tag_names）
+    - **tag_names**: タグ名で指定（#は自動付与）。未登録のタグは作成、削除済みのタグは復活させて関連付ける
     - **source_type**: 出典タイプ（BOOK, SNS, OTHER）
     - **book_id**: 書籍ID（source_type=BOOKの場合必須）
     - **sns_user_id**: SNSユーザーID（source_type=SNSの場合必須）
     - **page_number**: ページ番号（任意）
     - **source_meta**: その他の出典情報（source_type=OTHERの場合使用）
+    - **Idempotency-Key**: 任意のヘッダー。同じキーで再送した場合は登録を行わず、最初のレスポンスを返す
     """
+    if idempotency_key:
+        fingerprint = hashlib.sha256(quote_create.model_dump_json().encode('utf-8')).hexdigest()
+        try:
+            stored = idempotency_store.begin(user.id, idempotency_key, fingerprint)
+        except IdempotencyKeyInUse:
+            raise HTTPException(
+                status_code=status.HTTP_409_CONFLICT,
+                detail="同じIdempotency-Keyのリクエストを処理中です"
+            )
+        except IdempotencyKeyMismatch:
+            raise HTTPException(
+                status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+                detail="Idempotency-Keyが異なる内容のリクエストで使用されています"
+            )
+
+        if stored is not None:
+            return JSONResponse(
+                content=stored.body,
+                status_code=stored.status_code,
+                headers={'Idempotent-Replayed': 'true'}
+            )
+
     try:
         # source_typeに応じたバリデーション
         if quote_create.source_type == "BOOK" and not quote_create.book_id:
@@ -275,88 +502,54 @@ async def create_quotes(
                 detail="source_typeがSNSの場合、sns_user_idが必要です"
             )
 
-        created_quotes = []
-
-        # 各フレーズを登録
-        for quote_item in quote_create.quotes:
-            # フレーズを登録
-            quote_data = {
-                'user_id': user.id,
-                'text': quote_item.text,
-                'source_type': quote_create.source_type,
-                'book_id': quote_create.book_id if quote_create.source_type == "BOOK" else None,
-                'sns_user_id': quote_create.sns_user_id if quote_create.source_type == "SNS" else None,
-                'page_number': quote_create.page_number,
-                'source_meta': quote_create.source_meta if quote_create.source_type == "OTHER" else None,
-                'is_public': quote_create.is_public,
-                'reference_link': quote_create.reference_link,
-            }
-
-            # Phase 3-3で確立したパターン: insert後に別途select
-            insert_response = supabase.table('quotes').insert(quote_data).execute()
-
-            if not insert_response.data or len(insert_response.data) == 0:
-                raise HTTPException(
-                    status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-                    detail="フレーズの登録に失敗しました"
-                )
-
-            quote_id = insert_response.data[0]['id']
-
-            # 活動領域を関連付け
-            activity_inserts = [
-                {'quote_id': quote_id, 'activity_id': activity_id}
-                for activity_id in quote_item.activity_ids
-            ]
-            activity_response = supabase.table('quote_activities') \
-                .insert(activity_inserts) \
-                .execute()
-
-            if not activity_response.data:
-                # ロールバック: 登録したフレーズを削除
-                supabase.table('quotes').delete().eq('id', quote_id).execute()
-                raise HTTPException(
-                    status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-                    detail="活動領域の関連付けに失敗しました"
-                )
-
-            # タグを関連付け
-            if quote_item.tag_ids and len(quote_item.tag_ids) > 0:
-                tag_inserts = [
-                    {'quote_id': quote_id, 'tag_id': tag_id}
-                    for tag_id in quote_item.tag_ids
-                ]
-                tag_response = supabase.table('quote_tags') \
-                    .insert(tag_inserts) \
-                    .execute()
-
-                if not tag_response.data:
-                    # ロールバック: 登録したフレーズと活動領域を削除
-                    supabase.table('quote_activities').delete().eq('quote_id', quote_id).execute()
-                    supabase.table('quotes').delete().eq('id', quote_id).execute()
-                    raise HTTPException(
-                        status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-                        detail="タグの関連付けに失敗しました"
-                    )
+        # フレーズと活動領域・タグの関連付けをDB関数で1トランザクションで登録
+        # （途中で失敗した場合はDB側ですべてロールバックされる）
+        create_response = supabase.rpc('create_quotes_with_relations', {
+            'p_quotes': [
+                {
+                    'text': quote_item.text,
+                    'activity_ids': quote_item.activity_ids,
+                    'tag_ids': quote_item.tag_ids,
+                    'tag_names': quote_item.tag_names,
+                }
+                for quote_item in quote_create.quotes
+            ],
+            'p_source_type': quote_create.source_type,
+            'p_book_id': quote_create.book_id,
+            'p_sns_user_id': quote_create.sns_user_id,
+            'p_page_number': quote_create.page_number,
+            'p_source_meta': quote_create.source_meta,
+            'p_is_public': quote_create.is_public,
+            'p_reference_link': quote_create.reference_link,
+        }).execute()
+
+        if not create_response.data or len(create_response.data) != len(quote_create.quotes):
+            raise HTTPException(
+                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                detail="フレーズの登録に失敗しました"
+            )
 
-            # 登録したフレーズを取得（別途select）
-            select_response = supabase.table('quotes') \
-                .select('*') \
-                .eq('id', quote_id) \
-                .single() \
-                .execute()
+        created_quotes = [Quote(**row) for row in create_response.data]
 
-            if select_response.data:
-                created_quotes.append(Quote(**select_response.data))
+        quote_cache.invalidate_user(user.id)
 
-        return QuotesCreateResponse(
+        response = QuotesCreateResponse(
             quotes=created_quotes,
             created_count=len(created_quotes)
         )
+        if idempotency_key:
+            idempotency_store.complete(
+                user.id, idempotency_key, status.HTTP_201_CREATED, response.model_dump(mode='json')
+            )
+        return response
 
     except HTTPException:
+        if idempotency_key:
+            idempotency_store.release(user.id, idempotency_key)
         raise
     except Exception as e:
+        if idempotency_key:
+            idempotency_store.release(user.id, idempotency_key)
         print(f"[ERROR] フレーズ作成エラー: {type(e).__name__}: {str(e)}")
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -364,6 +557,197 @@ async def create_quotes(
         )
 
 
+# ====================================
+# POST /api/quotes/import
+# ====================================
+@router.post("/import", response_model=QuoteImportResponse)
+async def import_quotes(
+    request: Request,
+    user=Depends(get_current_user),
+    supabase: Client = Depends(get_supabase_client)
+):
+    """
+    フレーズをNDJSON形式で一括インポート
+
+    - **認証**: 必須
+    - **リクエストボディ**: 1行に1フレーズのJSON（Content-Type: application/x-ndjson）
+      - text, source_type, activity_ids（必須）
+      - book_id, sns_user_id, page_number, source_meta, is_public, reference_link, tag_ids, tag_names（任意）
+
+    ボディを受信しながら1行ずつ検証し、quote_import_chunk_size 件ごとにDBへ登録する
+    - 不正な行はスキップし、行番号とエラー内容を errors に含める
+    - 登録はチャンク単位のトランザクションで行う。DBが拒否したチャンク（他ユーザーの書籍・タグの指定等）は
+      半分ずつに分けて登録し直し、拒否された行のみをエラーとする
+    """
+    started_at = time.perf_counter()
+    imported_count = 0
+    error_count = 0
+    errors: list[QuoteImportError] = []
+    chunk: list[tuple[int, QuoteImportItem]] = []
+
+    def add_error(line: int, message: str) -> None:
+        nonlocal error_count
+        error_count += 1
+        if len(errors) < settings.quote_import_max_errors:
+            errors.append(QuoteImportError(line=line, message=message))
+
+    def insert(items: list[tuple[int, QuoteImportItem]]) -> None:
+        nonlocal imported_count
+        try:
+            create_response = supabase.rpc('create_quotes_with_relations', {
+                'p_quotes': [item.model_dump() for _, item in items],
+                'p_source_type': None,
+            }).execute()
+            imported_count += len(create_response.data or [])
+        except APIError as e:
+            # DBが拒否した行を特定するため、半分ずつに分けて登録し直す
+            # （拒否された行が少なければ、登録のリクエスト数は行数ではなく log2(チャンクの件数) 程度の増加で済む）
+            if len(items) > 1:
+                middle = len(items) // 2
+                insert(items[:middle])
+                insert(items[middle:])
+                return
+            print(f"[ERROR] フレーズインポートエラー: {type(e).__name__}: {str(e)}")
+            add_error(items[0][0], f"登録に失敗しました: {e.message or str(e)}")
+        except Exception as e:
+            # 通信エラー等はチャンクの行をすべてエラーとする
+            print(f"[ERROR] フレーズインポートエラー: {type(e).__name__}: {str(e)}")
+            for line, _ in items:
+                add_error(line, f"登録に失敗しました: {str(e)}")
+
+    def flush() -> None:
+        if not chunk:
+            return
+        insert(list(chunk))
+        chunk.clear()
+
+    try:
+        async for line, content in iter_ndjson_lines(request.stream(), settings.quote_import_max_line_bytes):
+            if content is None:
+                add_error(line, f"1行の最大サイズ（{settings.quote_import_max_line_bytes}バイト）を超えています")
+                continue
+
+            try:
+                chunk.append((line, parse_import_line(content)))
+            except ValueError as e:
+                add_error(line, str(e))
+                continue
+
+            if len(chunk) >= settings.quote_import_chunk_size:
+                flush()
+
+        flush()
+
+    except Exception as e:
+        print(f"[ERROR] フレーズインポートエラー: {type(e).__name__}: {str(e)}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"サーバーエラーが発生しました: {str(e)}"
+        )
+    finally:
+        if imported_count:
+            quote_cache.invalidate_user(user.id)
+
+    elapsed = time.perf_counter() - started_at
+    return QuoteImportResponse(
+        imported_count=imported_count,
+        error_count=error_count,
+        errors=errors,
+        elapsed_seconds=round(elapsed, 3),
+        rows_per_second=round(imported_count / elapsed, 1) if elapsed > 0 else 0.0
+    )
+
+
+def dump_json(content) -> str:
+    """モデル（またはfast_serialization時のdict）をJSON文字列に変換"""
+    if isinstance(content, BaseModel):
+        return content.model_dump_json()
+    return json.dumps(content, ensure_ascii=False, separators=(',', ':'), default=str)
+
+
+def streaming_list_response(items: Iterable, **fields) -> StreamingResponse:
+    """
+    一覧レスポンスを逐次書き出すStreamingResponseを返す
+
+    items を1件ずつJSON化して書き出し、続けて total 等のフィールドを書き出す
+    （JSONの形は通常のレスポンスと同じ）
+    """
+    def generate() -> Iterator[str]:
+        try:
+            yield '{"items":['
+            for i, item in enumerate(items):
+                yield (',' if i else '') + dump_json(item)
+            yield '],' + json.dumps(fields, ensure_ascii=False, separators=(',', ':'))[1:]
+        except Exception as e:
+            # ヘッダー送信後のためステータスコードは変更できない（接続を切断する）
+            print(f"[ERROR] ストリーミングレスポンスエラー: {type(e).__name__}: {str(e)}")
+            raise
+
+    return StreamingResponse(generate(), media_type='application/json')
+
+
+def _quote_in_group(q: dict, page_number: Optional[int]):
+    return build_model(
+        QuoteInGroup,
+        id=q['id'],
+        text=q['text'],
+        page_number=page_number,
+        is_public=q.get('is_public', False),
+        reference_link=q.get('reference_link'),
+        activities=[build_model(ActivityNested, **qa['activities']) for qa in q.get('quote_activities', [])],
+        tags=[build_model(TagNested, **qt['tags']) for qt in q.get('quote_tags', [])],
+        created_at=q['created_at']
+    )
+
+
+def iter_quote_groups(quotes: list[dict]) -> Iterator:
+    """
+    フレーズを出典ごとにグループ化して1グループずつ返す
+
+    - BOOK: 書籍単位でグループ化
+    - SNS: SNSユーザー単位でグループ化
+    - OTHER: 出典とメモの組み合わせでグループ化
+
+    書籍グループ → SNSグループ → その他グループの順に、各グループ内の最初のフレーズの順で返す
+    グループの振り分けはフレーズの参照のみで行い、レスポンス用のモデルは返す直前に生成する
+    """
+    book_groups = defaultdict(list)
+    sns_groups = defaultdict(list)
+    other_groups = defaultdict(list)
+    for quote in quotes:
+        if quote['source_type'] == 'BOOK' and quote['book_id']:
+            book_groups[quote['book_id']].append(quote)
+        elif quote['source_type'] == 'SNS' and quote['sns_user_id']:
+            sns_groups[quote['sns_user_id']].append(quote)
+        elif quote['source_type'] == 'OTHER':
+            source_meta = quote.get('source_meta') or {}
+            source = source_meta.get('source', '') or ''
+            note = source_meta.get('note', '') or ''
+            # sourceとnoteの組み合わせでグループ化
+            other_groups[(source, note)].append(quote)
+
+    for book_quotes in book_groups.values():
+        yield build_model(
+            BookGroupItem,
+            book=build_model(BookNested, **book_quotes[0]['books']),
+            quotes=[_quote_in_group(q, q.get('page_number')) for q in book_quotes]
+        )
+
+    for sns_quotes in sns_groups.values():
+        yield build_model(
+            SnsGroupItem,
+            sns_user=build_model(SnsUserNested, **sns_quotes[0]['sns_users']),
+            quotes=[_quote_in_group(q, None) for q in sns_quotes]
+        )
+
+    for (source, note), other_quotes in other_groups.items():
+        yield build_model(
+            OtherGroupItem,
+            source_info=build_model(OtherSource, source=source if source else None, note=note if note else None),
+            quotes=[_quote_in_group(q, q.get('page_number')) for q in other_quotes]
+        )
+
+
 # ====================================
 # GET /api/quotes/grouped
 # ====================================
@@ -375,6 +759,10 @@ async def get_quotes_grouped(
     source_type: Optional[Literal["BOOK", "SNS", "OTHER"]] = Query(None),
     activity_ids: Optional[str] = Query(None),
     tag_ids: Optional[str] = Query(None),
+    pagination: Literal["offset", "cursor"] = Query("offset"),
+    cursor: Optional[str] = Query(None),
+    stream: bool = Query(False, description="レスポンスを逐次書き出す"),
+    data_version: Optional[int] = Depends(check_not_modified),
     user=Depends(get_current_user),
     supabase: Client = Depends(get_supabase_client)
 ):
@@ -382,9 +770,13 @@ async def get_quotes_grouped(
     フレーズ一覧を取得（グループ化あり）
 
     - **認証**: 必須
+    - **ETag**: If-None-Match に前回のETagを指定すると、データに変更がない場合は 304 Not Modified を返す
     - **limit**: 取得件数（デフォルト: 50、最大: 100）
-    - **offset**: オフセット（デフォルト: 0）
-    - **search**: 検索キーワード（フレーズテキストで部分一致）
+    - **offset**: オフセット（デフォルト: 0、オフセットモードのみ）
+    - **pagination**: ページネーション方式（offset, cursor）
+    - **cursor**: 前ページの next_cursor（指定時はカーソルモード）
+    - **stream**: trueの場合はグループを1件ずつ逐次書き出す（JSONの形は同じ）
+    - **search**: 検索キーワード（フレーズテキスト・出典で部分一致。スペース区切りでAND検索）
     - **source_type**: 出典タイプフィルター（BOOK, SNS, OTHER）
     - **activity_ids**: 活動領域IDフィルター（カンマ区切り）
     - **tag_ids**: タグIDフィルター（カンマ区切り）
@@ -393,231 +785,90 @@ async def get_quotes_grouped(
     - BOOK: 書籍単位でグループ化
     - SNS: SNSユーザー単位でグループ化
     - OTHER: グループ化なし（個別表示）
+
+    **カーソルモード**:
+    - 登録日時の降順にフレーズ単位でページングし、ページ内でグループ化する
+    - 同じ書籍・SNSユーザーのグループが複数ページにまたがる場合がある
+    - 次ページは next_cursor を cursor に指定して取得する
     """
     try:
-        # フレーズを取得
-        quotes_query = supabase.table('quotes') \
-            .select('''
-                id,
-                text,
-                source_type,
-                book_id,
-                sns_user_id,
-                page_number,
-                source_meta,
-                is_public,
-                reference_link,
-                created_at,
-                books(id, title, author, cover_image_url),
-                sns_users(id, platform, handle, display_name),
-                quote_activities(activities(id, name, icon)),
-                quote_tags(tags(id, name))
-            ''') \
-            .eq('user_id', user.id) \
-            .is_('deleted_at', 'null')
-
-        # 出典タイプフィルター
-        if source_type:
-            quotes_query = quotes_query.eq('source_type', source_type)
-
-        # 並び順
-        quotes_query = quotes_query.order('created_at', desc=True)
-
-        quotes_response = quotes_query.execute()
-
-        if not quotes_response.data:
-            return QuotesGroupedResponse(items=[], total=0, has_more=False)
-
-        quotes = quotes_response.data
-
-        # 検索条件（クライアント側で実施）
-        # フレーズテキスト、本のタイトル・著者名、SNSのアカウント名・表示名で部分一致検索
-        if search:
-            search_lower = search.lower()
-            filtered_quotes = []
-
-            for quote in quotes:
-                # フレーズテキストで検索
-                if search_lower in quote.get('text', '').lower():
-                    filtered_quotes.append(quote)
-                    continue
-
-                # 書籍タイトル・著者名で検索
-                if quote.get('books'):
-                    book = quote['books']
-                    if (book.get('title') and search_lower in book['title'].lower()) or \
-                       (book.get('author') and search_lower in book['author'].lower()):
-                        filtered_quotes.append(quote)
-                        continue
-
-                # SNSアカウント名・表示名で検索
-                if quote.get('sns_users'):
-                    sns_user = quote['sns_users']
-                    if (sns_user.get('handle') and search_lower in sns_user['handle'].lower()) or \
-                       (sns_user.get('display_name') and search_lower in sns_user['display_name'].lower()):
-                        filtered_quotes.append(quote)
-                        continue
-
-            quotes = filtered_quotes
-
-        # 活動領域フィルター（クライアント側で実施）
-        if activity_ids:
-            activity_id_list = [int(id) for id in activity_ids.split(',')]
-            quotes = [
-                quote for quote in quotes
-                if any(
-                    qa['activities']['id'] in activity_id_list
-                    for qa in quote.get('quote_activities', [])
-                )
-            ]
-
-        # タグフィルター（クライアント側で実施）
-        if tag_ids:
-            tag_id_list = [int(id) for id in tag_ids.split(',')]
-            quotes = [
-                quote for quote in quotes
-                if any(
-                    qt['tags']['id'] in tag_id_list
-                    for qt in quote.get('quote_tags', [])
-                )
-            ]
-
-        # グループ化処理
-        grouped_items = []
-
-        # 書籍単位でグループ化
-        book_groups = defaultdict(list)
-        for quote in quotes:
-            if quote['source_type'] == 'BOOK' and quote['book_id']:
-                book_groups[quote['book_id']].append(quote)
-
-        for book_id, book_quotes in book_groups.items():
-            first_quote = book_quotes[0]
-            book_data = first_quote['books']
-
-            quote_list = [
-                QuoteInGroup(
-                    id=q['id'],
-                    text=q['text'],
-                    page_number=q.get('page_number'),
-                    is_public=q.get('is_public', False),
-                    reference_link=q.get('reference_link'),
-                    activities=[ActivityNested(**qa['activities']) for qa in q.get('quote_activities', [])],
-                    tags=[TagNested(**qt['tags']) for qt in q.get('quote_tags', [])],
-                    created_at=q['created_at']
-                )
-                for q in book_quotes
-            ]
-
-            grouped_items.append(
-                BookGroupItem(
-                    book=BookNested(**book_data),
-                    quotes=quote_list
-                )
-            )
-
-        # SNSユーザー単位でグループ化
-        sns_groups = defaultdict(list)
-        for quote in quotes:
-            if quote['source_type'] == 'SNS' and quote['sns_user_id']:
-                sns_groups[quote['sns_user_id']].append(quote)
-
-        for sns_user_id, sns_quotes in sns_groups.items():
-            first_quote = sns_quotes[0]
-            sns_user_data = first_quote['sns_users']
-
-            quote_list = [
-                QuoteInGroup(
-                    id=q['id'],
-                    text=q['text'],
-                    page_number=None,
-                    is_public=q.get('is_public', False),
-                    reference_link=q.get('reference_link'),
-                    activities=[ActivityNested(**qa['activities']) for qa in q.get('quote_activities', [])],
-                    tags=[TagNested(**qt['tags']) for qt in q.get('quote_tags', [])],
-                    created_at=q['created_at']
-                )
-                for q in sns_quotes
-            ]
-
-            grouped_items.append(
-                SnsGroupItem(
-                    sns_user=SnsUserNested(**sns_user_data),
-                    quotes=quote_list
-                )
+        # 絞り込み・件数カウント・ページングはDB側の関数で実行し、
+        # 要求されたページに含まれるフレーズと総件数のみを取得する
+        params = {
+            'p_limit': limit,
+            'p_search': search or None,
+            'p_source_type': source_type,
+            'p_activity_ids': [int(id) for id in activity_ids.split(',')] if activity_ids else None,
+            'p_tag_ids': [int(id) for id in tag_ids.split(',')] if tag_ids else None,
+        }
+        next_cursor = None
+
+        # 検索はN-gramインデックスで一致するフレーズIDを求め、DB側ではIDで絞り込む
+        index = None
+        if search and split_terms(search) and settings.search_index_enabled:
+            index = get_search_index(supabase, user.id, data_version)
+        if index is not None:
+            matched_ids = index.search(search)
+            if not matched_ids:
+                return QuotesGroupedResponse(items=[], total=0, has_more=False)
+            params['p_search'] = None
+            params['p_quote_ids'] = sorted(matched_ids)
+
+        if pagination == "cursor" or cursor:
+            # カーソルモード: (created_at, id) のキーセットで次ページを取得
+            if cursor:
+                try:
+                    cursor_created_at, cursor_id, total = decode_cursor(cursor)
+                except ValueError as e:
+                    raise HTTPException(
+                        status_code=status.HTTP_400_BAD_REQUEST,
+                        detail=str(e)
+                    )
+                params.update({
+                    'p_cursor_created_at': cursor_created_at,
+                    'p_cursor_id': cursor_id,
+                    'p_with_total': False,
+                })
+
+            page = fetch_quotes_page(supabase, user.id, 'get_quotes_cursor_page', params, data_version)
+
+            quotes = page.get('quotes') or []
+            if not cursor:
+                total = page.get('total') or 0
+            has_more = bool(page.get('has_more'))
+
+            if has_more and quotes:
+                last_quote = quotes[-1]
+                next_cursor = encode_cursor(last_quote['created_at'], last_quote['id'], total)
+        else:
+            params['p_offset'] = offset
+            page = fetch_quotes_page(supabase, user.id, 'get_quotes_grouped_page', params, data_version)
+
+            quotes = page.get('quotes') or []
+            total = page.get('total', 0)
+            # ページ範囲のグループはDB側で選択済み
+            has_more = page.get('page_end', offset) < total
+
+        if not quotes:
+            return QuotesGroupedResponse(items=[], total=total, has_more=False)
+
+        if stream:
+            return streaming_list_response(
+                iter_quote_groups(quotes),
+                total=total,
+                has_more=has_more,
+                next_cursor=next_cursor
             )
 
-        # その他のフレーズ（出典とメモでグループ化）
-        other_groups = defaultdict(list)
-        for quote in quotes:
-            if quote['source_type'] == 'OTHER':
-                source_meta = quote.get('source_meta') or {}
-                source = source_meta.get('source', '') or ''
-                note = source_meta.get('note', '') or ''
-                # sourceとnoteの組み合わせでグループ化
-                group_key = (source, note)
-                other_groups[group_key].append(quote)
-
-        for (source, note), other_quotes in other_groups.items():
-            quote_list = [
-                QuoteInGroup(
-                    id=q['id'],
-                    text=q['text'],
-                    page_number=q.get('page_number'),
-                    is_public=q.get('is_public', False),
-                    reference_link=q.get('reference_link'),
-                    activities=[ActivityNested(**qa['activities']) for qa in q.get('quote_activities', [])],
-                    tags=[TagNested(**qt['tags']) for qt in q.get('quote_tags', [])],
-                    created_at=q['created_at']
-                )
-                for q in other_quotes
-            ]
-
-            grouped_items.append(
-                OtherGroupItem(
-                    source_info=OtherSource(source=source if source else None, note=note if note else None),
-                    quotes=quote_list
-                )
-            )
+        grouped_items = list(iter_quote_groups(quotes))
 
-        # ページネーション適用（フレーズ単位）
-        total = len(quotes)
-
-        # フレーズ数を累積しながらグループを選択
-        paginated_items = []
-        quote_count = 0
-        start_counting = False
-
-        for item in grouped_items:
-            # 各グループのフレーズ数を取得
-            if hasattr(item, 'quotes'):
-                group_quote_count = len(item.quotes)
-            else:
-                group_quote_count = 1  # OTHER typeは1件
-
-            # offsetに達するまでスキップ
-            if not start_counting:
-                if quote_count + group_quote_count > offset:
-                    start_counting = True
-                else:
-                    quote_count += group_quote_count
-                    continue
-
-            # limitに達したら終了（ただし現在のグループは含める）
-            if start_counting:
-                paginated_items.append(item)
-                quote_count += group_quote_count
-
-                if quote_count >= offset + limit:
-                    break
-
-        has_more = quote_count < total
-
-        return QuotesGroupedResponse(
-            items=paginated_items,
+        return model_response(build_model(
+            QuotesGroupedResponse,
+            items=grouped_items,
             total=total,
-            has_more=has_more
-        )
+            has_more=has_more,
+            next_cursor=next_cursor
+        ))
 
     except HTTPException:
         raise
@@ -634,10 +885,83 @@ async def get_quotes_grouped(
 # ====================================
 # GET /api/quotes/public
 # ====================================
+PUBLIC_SEED_RANGE = 2 ** 31  # シードの範囲（0以上この値未満、DB関数には0以上1未満に変換して渡す）
+# オフセットの上限（DB関数の p_offset + p_limit がINTの範囲を超えないようにする）
+PUBLIC_OFFSET_MAX = 1_000_000
+
+
+def fetch_public_quotes_page(supabase: Client, limit: int, offset: int, seed: int) -> tuple[int, list[dict]]:
+    """シードで決まる並び順の offset 件目から limit 件の公開フレーズを取得（推定件数, フレーズ）"""
+    sample_response = supabase.rpc('get_public_quotes_sample', {
+        'p_limit': limit,
+        'p_offset': offset,
+        'p_seed': seed / PUBLIC_SEED_RANGE,
+    }).execute()
+
+    sample = sample_response.data or {}
+    return sample.get('total') or 0, sample.get('quotes') or []
+
+
+def load_public_feed_pool(supabase: Client) -> PublicFeedPool:
+    """公開フレーズキャッシュに格納するフレーズを新しいシードで取得"""
+    import random
+
+    seed = random.randrange(PUBLIC_SEED_RANGE)
+    total, quotes = fetch_public_quotes_page(supabase, settings.public_feed_pool_size, 0, seed)
+    return PublicFeedPool(
+        seed=seed,
+        total=total,
+        quotes=quotes,
+        complete=len(quotes) < settings.public_feed_pool_size
+    )
+
+def build_public_quote_item(quote: dict):
+    """フレーズ（quote_detail_json の形式）を公開フレーズアイテムに変換"""
+    # 出典情報の構築
+    source_type = quote['source_type']
+    source_data = {
+        'type': source_type,
+        'page_number': quote.get('page_number')
+    }
+
+    if source_type == 'BOOK' and quote.get('books'):
+        book = quote['books']
+        source_data['book_title'] = book.get('title')
+        source_data['book_author'] = book.get('author')
+    elif source_type == 'SNS' and quote.get('sns_users'):
+        sns_user = quote['sns_users']
+        source_data['sns_platform'] = sns_user.get('platform')
+        source_data['sns_handle'] = sns_user.get('handle')
+        source_data['sns_display_name'] = sns_user.get('display_name')
+    elif source_type == 'OTHER':
+        source_meta = quote.get('source_meta') or {}
+        source_data['other_source'] = source_meta.get('source')
+        source_data['other_note'] = source_meta.get('note')
+
+    return build_model(
+        PublicQuoteItem,
+        id=quote['id'],
+        text=quote['text'],
+        source=build_model(PublicQuoteSource, **source_data),
+        reference_link=quote.get('reference_link'),
+        activities=[
+            build_model(ActivityNested, **qa['activities'])
+            for qa in quote.get('quote_activities', []) if qa.get('activities')
+        ],
+        tags=[
+            build_model(TagNested, **qt['tags'])
+            for qt in quote.get('quote_tags', []) if qt.get('tags')
+        ],
+        created_at=quote['created_at']
+    )
+
+
 @router.get("/public", response_model=PublicQuotesResponse)
 async def get_public_quotes(
     limit: int = Query(50, ge=1, le=100, description="取得件数"),
-    offset: int = Query(0, ge=0, description="オフセット"),
+    offset: int = Query(0, ge=0, le=PUBLIC_OFFSET_MAX, description="オフセット"),
+    seed: Optional[int] = Query(None, ge=0, lt=PUBLIC_SEED_RANGE, description="並び順のシード"),
+    stream: bool = Query(False, description="レスポンスを逐次書き出す"),
     supabase: Client = Depends(get_supabase_client_public)
 ):
     """
@@ -645,136 +969,61 @@ async def get_public_quotes(
 
     - **認証**: 不要
     - **limit**: 取得件数（デフォルト: 50）
-    - **offset**: オフセット（デフォルト: 0）
+    - **offset**: オフセット（デフォルト: 0、最大: 1000000）
+    - **seed**: 並び順のシード（省略時はランダム）。レスポンスの seed を次ページの取得時に指定すると、
+      同じ並び順の続きを重複・欠落なく取得できる
+    - **stream**: trueの場合はフレーズを逐次書き出す（JSONの形は同じ）
 
     is_public = true のフレーズをランダムな順序で返す
     出典情報、活動領域、タグを含む
+    並び順はシードで決まり、ページの取得はDB関数で行う（ページ分のフレーズのみを取得する）
+    （totalは公開フレーズ数の推定値）
+    並び順は登録時に決まる random_key の循環順序をシードの位置から切り出したもので、
+    シードが変わっても隣り合うフレーズの組み合わせは同じ（リクエストごとの完全なシャッフルではない）
+    シードの指定がない場合は共有キャッシュのシードを使い、キャッシュの範囲内のページはDBにアクセスせずに返す
     """
     try:
         import random
 
-        # 公開フレーズを取得（全件）
-        # ジャンクションテーブル経由のリレーションシップは別クエリで取得
-        quotes_query = supabase.table('quotes') \
-            .select('*') \
-            .eq('is_public', True) \
-            .is_('deleted_at', 'null') \
-            .execute()
-
-        if not quotes_query.data:
-            return PublicQuotesResponse(items=[], total=0, has_more=False)
-
-        quotes = quotes_query.data
-        total = len(quotes)
-
-        # 各quoteのIDを収集
-        quote_ids = [q['id'] for q in quotes]
-
-        # book_idとsns_user_idを収集
-        book_ids = [q['book_id'] for q in quotes if q.get('book_id')]
-        sns_user_ids = [q['sns_user_id'] for q in quotes if q.get('sns_user_id')]
-
-        # booksとsns_usersを別クエリで取得
-        books_map = {}
-        if book_ids:
-            books_query = supabase.table('books') \
-                .select('id, title, author, cover_image_url') \
-                .in_('id', book_ids) \
-                .execute()
-            for book in books_query.data or []:
-                books_map[book['id']] = book
-
-        sns_users_map = {}
-        if sns_user_ids:
-            sns_users_query = supabase.table('sns_users') \
-                .select('id, platform, handle, display_name') \
-                .in_('id', sns_user_ids) \
-                .execute()
-            for sns_user in sns_users_query.data or []:
-                sns_users_map[sns_user['id']] = sns_user
-
-        # activitiesとtagsを別クエリで取得
-        # quote_activitiesとactivitiesをJOINして取得
-        activities_query = supabase.table('quote_activities') \
-            .select('quote_id, activities(id, name, icon)') \
-            .in_('quote_id', quote_ids) \
-            .execute()
+        pool = None
+        if seed is None or seed == public_feed_cache.seed:
+            # シードの指定がない・キャッシュと同じシードの場合は共有キャッシュを使う
+            # （キャッシュの取得を待つ場合はイベントループを止めないようスレッドで実行）
+            loader = partial(load_public_feed_pool, supabase)
+            pool = public_feed_cache.get_nowait(loader)
+            if pool is None and public_feed_cache.enabled:
+                pool = await asyncio.to_thread(public_feed_cache.get, loader)
+            if pool is not None and seed is not None and seed != pool.seed:
+                # 取得中にキャッシュが新しいシードで更新された
+                pool = None
+            if pool is not None:
+                seed = pool.seed
+
+        if pool is not None and pool.covers(offset + limit):
+            total = pool.total
+            quotes = pool.quotes[offset:offset + limit]
+        else:
+            if seed is None:
+                seed = random.randrange(PUBLIC_SEED_RANGE)
+            total, quotes = fetch_public_quotes_page(supabase, limit, offset, seed)
 
-        # quote_tagsとtagsをJOINして取得
-        tags_query = supabase.table('quote_tags') \
-            .select('quote_id, tags(id, name)') \
-            .in_('quote_id', quote_ids) \
-            .execute()
+        has_more = offset + limit < total
 
-        # quote_id -> activities のマッピングを作成
-        activities_map = defaultdict(list)
-        for qa in activities_query.data or []:
-            if qa.get('activities'):
-                activities_map[qa['quote_id']].append(qa['activities'])
-
-        # quote_id -> tags のマッピングを作成
-        tags_map = defaultdict(list)
-        for qt in tags_query.data or []:
-            if qt.get('tags'):
-                tags_map[qt['quote_id']].append(qt['tags'])
-
-        # quotesにbooks, sns_users, activities, tagsを追加
-        for quote in quotes:
-            if quote.get('book_id'):
-                quote['books'] = books_map.get(quote['book_id'])
-            if quote.get('sns_user_id'):
-                quote['sns_users'] = sns_users_map.get(quote['sns_user_id'])
-            quote['_activities'] = activities_map.get(quote['id'], [])
-            quote['_tags'] = tags_map.get(quote['id'], [])
-
-        # ランダムにシャッフル
-        random.shuffle(quotes)
-
-        # フラットなフレーズリストに変換
-        public_quotes = []
-        for quote in quotes:
-            # 出典情報の構築
-            source_type = quote['source_type']
-            source_data = {
-                'type': source_type,
-                'page_number': quote.get('page_number')
-            }
-
-            if source_type == 'BOOK' and quote.get('books'):
-                book = quote['books']
-                source_data['book_title'] = book.get('title')
-                source_data['book_author'] = book.get('author')
-            elif source_type == 'SNS' and quote.get('sns_users'):
-                sns_user = quote['sns_users']
-                source_data['sns_platform'] = sns_user.get('platform')
-                source_data['sns_handle'] = sns_user.get('handle')
-                source_data['sns_display_name'] = sns_user.get('display_name')
-            elif source_type == 'OTHER':
-                source_meta = quote.get('source_meta') or {}
-                source_data['other_source'] = source_meta.get('source')
-                source_data['other_note'] = source_meta.get('note')
-
-            # PublicQuoteItemを構築
-            public_quote = PublicQuoteItem(
-                id=quote['id'],
-                text=quote['text'],
-                source=PublicQuoteSource(**source_data),
-                reference_link=quote.get('reference_link'),
-                activities=[ActivityNested(**a) for a in quote.get('_activities', [])],
-                tags=[TagNested(**t) for t in quote.get('_tags', [])],
-                created_at=quote['created_at']
+        if stream:
+            return streaming_list_response(
+                (build_public_quote_item(quote) for quote in quotes),
+                total=total,
+                has_more=has_more,
+                seed=seed
             )
-            public_quotes.append(public_quote)
 
-        # ページネーション適用
-        paginated_quotes = public_quotes[offset:offset + limit]
-        has_more = offset + limit < total
-
-        return PublicQuotesResponse(
-            items=paginated_quotes,
+        return model_response(build_model(
+            PublicQuotesResponse,
+            items=[build_public_quote_item(quote) for quote in quotes],
             total=total,
-            has_more=has_more
-        )
+            has_more=has_more,
+            seed=seed
+        ))
 
     except Exception as e:
         print(f"[ERROR] 公開フレーズ取得エラー: {type(e).__name__}: {str(e)}")
@@ -784,3 +1033,81 @@ async def get_public_quotes(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"サーバーエラーが発生しました: {str(e)}"
         )
+
+
+# ====================================
+# GET /api/quotes/public/snapshot/{page}
+# ====================================
+def public_feed_snapshot_seed(now: float) -> int:
+    """
+    スナップショットのシード（書き出し間隔の区切りから決める）
+
+    同じ区切りの間はすべてのインスタンスで同じシードになり、どのインスタンスが応答しても
+    ページの並び順が揃う
+    """
+    bucket = int(now // settings.public_feed_snapshot_interval_seconds)
+    digest = hashlib.sha256(f'public-feed-snapshot:{bucket}'.encode('utf-8')).digest()
+    return int.from_bytes(digest[:8], 'big') % PUBLIC_SEED_RANGE
+
+
+def render_public_feed_snapshot(supabase: Client, seed: Optional[int] = None) -> list[bytes]:
+    """
+    公開フレーズのスナップショット（シードの先頭から public_feed_snapshot_pages ページ分）を生成
+
+    各ページは GET /api/quotes/public と同じ形式のJSON（seed を指定すると続きのページを取得できる）
+    シードを省略した場合は現在の書き出し間隔の区切りから決める
+    """
+    pages = settings.public_feed_snapshot_pages
+    page_size = settings.public_feed_snapshot_page_size
+    if seed is None:
+        seed = public_feed_snapshot_seed(time.time())
+    total, quotes = fetch_public_quotes_page(supabase, pages * page_size, 0, seed)
+
+    contents = []
+    for page in range(pages):
+        offset = page * page_size
+        response = build_model(
+            PublicQuotesResponse,
+            items=[build_public_quote_item(quote) for quote in quotes[offset:offset + page_size]],
+            total=total,
+            has_more=offset + page_size < total,
+            seed=seed
+        )
+        contents.append(dump_json(response).encode('utf-8'))
+    return contents
+
+
+@router.get("/public/snapshot/{page}", response_model=PublicQuotesResponse)
+async def get_public_quotes_snapshot(page: int, request: Request):
+    """
+    公開フレーズのスナップショットを取得（認証不要）
+
+    - **認証**: 不要
+    - **page**: ページ番号（0始まり、public_feed_snapshot_pages 未満）
+    - **キャッシュ**: Cache-Control・ETag付き（CDNでキャッシュ可能）。If-None-Match が一致する場合は 304 Not Modified
+
+    定期的に書き出した静的JSONファイルをそのまま返す（DBにはアクセスしない）
+    スナップショットがない場合は404（GET /api/quotes/public を使用する）
+    """
+    path = public_feed_snapshots.path_for(page)
+    try:
+        stat_result = os.stat(path) if path is not None else None
+    except FileNotFoundError:
+        stat_result = None
+
+    if stat_result is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="スナップショットが見つかりません"
+        )
+
+    interval = settings.public_feed_snapshot_interval_seconds
+    headers = {
+        'ETag': public_feed_snapshots.etag_for(path, stat_result),
+        'Cache-Control': f'public, max-age=60, s-maxage={interval}, stale-while-revalidate={interval}',
+    }
+
+    if etag_matches(request.headers.get('if-none-match'), headers['ETag']):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+
+    return FileResponse(path, media_type='application/json', headers=headers, stat_result=stat_result)
@@ -4,6 +4,7 @@ from pydantic import BaseModel
 from auth import get_current_user, get_supabase_client
 from models.sns_user import SnsUser, SnsUserCreate, SnsUsersResponse, SnsUserResponse, SnsUserWithMetadata
 from services.sns_scraper import SnsUrlParser, SnsScraper
+from services.data_version import check_not_modified
 
 router = APIRouter(
     prefix="/api/sns-users",
@@ -23,7 +24,7 @@ class SnsUserFromUrlResponse(BaseModel):
     warning: str | None = None
 
 
-@router.get("", response_model=SnsUsersResponse)
+@router.get("", response_model=SnsUsersResponse, dependencies=[Depends(check_not_modified)])
 async def get_sns_users(
     limit: int = Query(50, ge=1, le=100, description="取得件数"),
     offset: int = Query(0, ge=0, description="オフセット"),
@@ -36,6 +37,7 @@ async def get_sns_users(
     ユーザーのSNSユーザー一覧を取得
 
     - **認証**: 必須
+    - **ETag**: If-None-Match に前回のETagを指定すると、データに変更がない場合は 304 Not Modified を返す
     - **フィルター**: プラットフォーム、検索キーワード
     - **検索**: ハンドルと表示名で部分一致
     - **ソート**: created_at降順
@@ -67,17 +69,20 @@ async def get_sns_users(
                 detail="SNSユーザーの取得に失敗しました"
             )
 
-        # 各SNSユーザーのメタデータ（使用数）を取得
+        # ページ内のSNSユーザーの使用数をDB側で集計（削除済みフレーズを除外）
+        # フレーズの行は取得せず、SNSユーザーごとの件数のみを受け取る
+        usage_counts = {}
+        if response.data:
+            counts_response = supabase.rpc(
+                'count_quotes_by_sns_user',
+                {'p_sns_user_ids': [sns_user['id'] for sns_user in response.data]}
+            ).execute()
+            usage_counts = {row['sns_user_id']: row['usage_count'] for row in counts_response.data or []}
+
+        # 各SNSユーザーのメタデータ（使用数）を付与
         sns_users_with_metadata = []
         for sns_user in response.data:
-            # 使用数を取得（削除済みフレーズを除外）
-            count_response = supabase.table('quotes') \
-                .select('id', count='exact', head=True) \
-                .eq('sns_user_id', sns_user['id']) \
-                .is_('deleted_at', 'null') \
-                .execute()
-
-            usage_count = count_response.count or 0
+            usage_count = usage_counts.get(sns_user['id'], 0)
 
             sns_users_with_metadata.append(
                 SnsUserWithMetadata(
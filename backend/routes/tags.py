@@ -1,4 +1,5 @@
 from fastapi import APIRouter, Depends, HTTPException, status, Query
+from postgrest.exceptions import APIError
 from supabase import Client
 from auth import get_current_user, get_supabase_client
 from models.tag import (
@@ -6,15 +7,23 @@ from models.tag import (
     TagCreate, TagUpdate, TagMerge,
     TagDeleteResponse, TagMergeResponse, TagMergeResult
 )
+from services.quote_cache import quote_cache
+from services.data_version import check_not_modified
+from services.chunked_query import execute_in_chunks
+from config import settings
 from typing import Optional
+from collections import defaultdict
 
 router = APIRouter(
     prefix="/api/tags",
     tags=["tags"]
 )
 
+# PostgreSQLの一意制約違反のエラーコード
+UNIQUE_VIOLATION = '23505'
 
-@router.get("", response_model=TagsResponse)
+
+@router.get("", response_model=TagsResponse, dependencies=[Depends(check_not_modified)])
 async def get_tags(
     search: Optional[str] = Query(None, description="タグ名検索"),
     sort: str = Query("created_at", description="ソート項目（created_at, name, usage_count）"),
@@ -26,6 +35,7 @@ async def get_tags(
     タグ一覧を取得
 
     - **認証**: 必須
+    - **ETag**: If-None-Match に前回のETagを指定すると、データに変更がない場合は 304 Not Modified を返す
     - **検索**: タグ名で部分一致検索
     - **ソート**: created_at, name, usage_count
     - **メタデータ**: 各タグの使用数と活動領域別分布を含む
@@ -56,44 +66,39 @@ async def get_tags(
 
         tags = response.data
 
-        # 各タグのメタデータを取得
-        tags_with_metadata = []
-        for tag in tags:
-            # 使用数を取得（削除済みフレーズを除外）
-            count_response = supabase.table('quote_tags') \
-                .select('*, quotes!inner(id)', count='exact', head=True) \
-                .eq('tag_id', tag['id']) \
-                .is_('quotes.deleted_at', 'null') \
-                .execute()
-
-            usage_count = count_response.count or 0
-
-            # 活動領域別分布を取得（削除済みフレーズを除外）
-            # quote_tags -> quotes -> quote_activities -> activity_id
-            distribution_response = supabase.table('quote_tags') \
-                .select('quote_id, quotes!inner(deleted_at, quote_activities!inner(activity_id))') \
-                .eq('tag_id', tag['id']) \
-                .is_('quotes.deleted_at', 'null') \
-                .execute()
+        # 全タグのフレーズへの関連付けをまとめて取得（削除済みフレーズを除外）
+        # quote_tags -> quotes -> quote_activities -> activity_id
+        quote_tags = execute_in_chunks(
+            lambda tag_ids: supabase.table('quote_tags')
+                .select('tag_id, quotes!inner(deleted_at, quote_activities(activity_id))')
+                .in_('tag_id', tag_ids)
+                .is_('quotes.deleted_at', 'null')
+                .order('id'),
+            [tag['id'] for tag in tags],
+            page_size=settings.in_list_page_size
+        )
 
-            # 活動領域別にカウント
-            activity_distribution = {}
-            if distribution_response.data:
-                for item in distribution_response.data:
-                    if item.get('quotes') and item['quotes'].get('quote_activities'):
-                        for qa in item['quotes']['quote_activities']:
-                            activity_id = qa['activity_id']
-                            activity_distribution[activity_id] = activity_distribution.get(activity_id, 0) + 1
-
-            tags_with_metadata.append(
-                TagWithMetadata(
-                    id=tag['id'],
-                    name=tag['name'],
-                    created_at=tag['created_at'],
-                    usage_count=usage_count,
-                    activity_distribution=activity_distribution
-                )
+        # 使用数と活動領域別分布をタグごとに集計
+        usage_counts = defaultdict(int)
+        activity_distributions = defaultdict(dict)
+        for item in quote_tags:
+            tag_id = item['tag_id']
+            usage_counts[tag_id] += 1
+            for qa in (item.get('quotes') or {}).get('quote_activities') or []:
+                activity_id = qa['activity_id']
+                distribution = activity_distributions[tag_id]
+                distribution[activity_id] = distribution.get(activity_id, 0) + 1
+
+        tags_with_metadata = [
+            TagWithMetadata(
+                id=tag['id'],
+                name=tag['name'],
+                created_at=tag['created_at'],
+                usage_count=usage_counts[tag['id']],
+                activity_distribution=activity_distributions[tag['id']]
             )
+            for tag in tags
+        ]
 
         # usage_countでソートする場合
         if sort == 'usage_count':
@@ -235,48 +240,33 @@ async def update_tag(
         # タグ名が#で始まっていない場合は追加
         tag_name = tag_data.name if tag_data.name.startswith('#') else f'#{tag_data.name}'
 
-        # タグの存在確認と権限チェック
-        existing_tag_response = supabase.table('tags') \
-            .select('id') \
-            .eq('id', tag_id) \
-            .eq('user_id', user.id) \
-            .is_('deleted_at', 'null') \
-            .execute()
+        # 本人の未削除タグのみを条件に更新（存在確認・重複チェックの事前クエリは行わない）
+        try:
+            update_response = supabase.table('tags') \
+                .update({'name': tag_name}) \
+                .eq('id', tag_id) \
+                .eq('user_id', user.id) \
+                .is_('deleted_at', 'null') \
+                .select('id, name, created_at, updated_at') \
+                .execute()
+        except APIError as e:
+            # (user_id, name) の一意制約違反は同名のタグが存在する
+            if e.code == UNIQUE_VIOLATION:
+                raise HTTPException(
+                    status_code=status.HTTP_409_CONFLICT,
+                    detail="同じ名前のタグが既に存在します"
+                )
+            raise
 
-        if not existing_tag_response.data or len(existing_tag_response.data) == 0:
+        # 更新された行がない場合は存在しない・他ユーザー・削除済みのタグ
+        if not update_response.data or len(update_response.data) == 0:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail="タグが見つかりません"
             )
 
-        # 同名の別タグが存在しないかチェック
-        duplicate_response = supabase.table('tags') \
-            .select('id') \
-            .eq('user_id', user.id) \
-            .eq('name', tag_name) \
-            .neq('id', tag_id) \
-            .is_('deleted_at', 'null') \
-            .execute()
-
-        if duplicate_response.data and len(duplicate_response.data) > 0:
-            raise HTTPException(
-                status_code=status.HTTP_409_CONFLICT,
-                detail="同じ名前のタグが既に存在します"
-            )
-
-        # タグ名を更新
-        update_response = supabase.table('tags') \
-            .update({'name': tag_name}) \
-            .eq('id', tag_id) \
-            .eq('user_id', user.id) \
-            .select('id, name, created_at, updated_at') \
-            .execute()
-
-        if not update_response.data or len(update_response.data) == 0:
-            raise HTTPException(
-                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-                detail="タグの更新に失敗しました"
-            )
+        # タグ名はフレーズ一覧にも含まれるためキャッシュを破棄
+        quote_cache.invalidate_user(user.id)
 
         return TagResponse(tag=Tag(**update_response.data[0]))
 
@@ -304,39 +294,17 @@ async def delete_tag(
     - **関連削除**: quote_tagsテーブルの関連レコードも削除
     """
     try:
-        # タグの存在確認と権限チェック
-        existing_tag_response = supabase.table('tags') \
-            .select('id') \
-            .eq('id', tag_id) \
-            .eq('user_id', user.id) \
-            .is_('deleted_at', 'null') \
-            .execute()
+        # 本人の未削除タグのソフトデリートと関連付けの削除をDB関数で1トランザクションで実行
+        delete_response = supabase.rpc('delete_tag', {'p_tag_id': tag_id}).execute()
 
-        if not existing_tag_response.data or len(existing_tag_response.data) == 0:
+        # FALSEの場合は存在しない・他ユーザー・削除済みのタグ
+        if not delete_response.data:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail="タグが見つかりません"
             )
 
-        # quote_tagsテーブルから関連レコードを削除
-        supabase.table('quote_tags') \
-            .delete() \
-            .eq('tag_id', tag_id) \
-            .execute()
-
-        # ソフトデリート（deleted_atに現在時刻を設定）
-        from datetime import datetime
-        delete_response = supabase.table('tags') \
-            .update({'deleted_at': datetime.utcnow().isoformat()}) \
-            .eq('id', tag_id) \
-            .eq('user_id', user.id) \
-            .execute()
-
-        if not delete_response.data or len(delete_response.data) == 0:
-            raise HTTPException(
-                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-                detail="タグの削除に失敗しました"
-            )
+        quote_cache.invalidate_user(user.id)
 
         return TagDeleteResponse(success=True)
 
@@ -375,95 +343,30 @@ async def merge_tag(
                 detail="同じタグ同士を統合することはできません"
             )
 
-        # sourceタグの存在確認と権限チェック
-        source_tag_response = supabase.table('tags') \
-            .select('id, name') \
-            .eq('id', source_tag_id) \
-            .eq('user_id', user.id) \
-            .is_('deleted_at', 'null') \
-            .execute()
+        # 存在確認・付け替え・統合元の削除をDB関数で1トランザクションで実行
+        merge_response = supabase.rpc('merge_tags', {
+            'p_source_tag_id': source_tag_id,
+            'p_target_tag_id': target_tag_id,
+        }).execute()
 
-        if not source_tag_response.data or len(source_tag_response.data) == 0:
+        result = merge_response.data or {}
+        if result.get('not_found') == 'source':
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail="統合元のタグが見つかりません"
             )
-
-        # targetタグの存在確認と権限チェック
-        target_tag_response = supabase.table('tags') \
-            .select('id, name') \
-            .eq('id', target_tag_id) \
-            .eq('user_id', user.id) \
-            .is_('deleted_at', 'null') \
-            .execute()
-
-        if not target_tag_response.data or len(target_tag_response.data) == 0:
+        if result.get('not_found') == 'target':
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail="統合先のタグが見つかりません"
             )
 
-        # sourceタグが使用されているquote_tagsを取得
-        source_quote_tags_response = supabase.table('quote_tags') \
-            .select('quote_id') \
-            .eq('tag_id', source_tag_id) \
-            .execute()
-
-        merged_count = 0
-
-        if source_quote_tags_response.data:
-            for quote_tag in source_quote_tags_response.data:
-                quote_id = quote_tag['quote_id']
-
-                # targetタグが既に存在するかチェック
-                existing_response = supabase.table('quote_tags') \
-                    .select('quote_id') \
-                    .eq('quote_id', quote_id) \
-                    .eq('tag_id', target_tag_id) \
-                    .execute()
-
-                if not existing_response.data or len(existing_response.data) == 0:
-                    # 存在しない場合は更新
-                    update_response = supabase.table('quote_tags') \
-                        .update({'tag_id': target_tag_id}) \
-                        .eq('quote_id', quote_id) \
-                        .eq('tag_id', source_tag_id) \
-                        .execute()
-
-                    if update_response.data:
-                        merged_count += 1
-                else:
-                    # 既に存在する場合はsourceを削除
-                    supabase.table('quote_tags') \
-                        .delete() \
-                        .eq('quote_id', quote_id) \
-                        .eq('tag_id', source_tag_id) \
-                        .execute()
-
-        # sourceタグを削除（ソフトデリート）
-        from datetime import datetime
-        supabase.table('tags') \
-            .update({'deleted_at': datetime.utcnow().isoformat()}) \
-            .eq('id', source_tag_id) \
-            .eq('user_id', user.id) \
-            .execute()
-
-        # targetタグの使用数を取得
-        count_response = supabase.table('quote_tags') \
-            .select('*', count='exact', head=True) \
-            .eq('tag_id', target_tag_id) \
-            .execute()
-
-        target_tag = target_tag_response.data[0]
+        quote_cache.invalidate_user(user.id)
 
         return TagMergeResponse(
             success=True,
-            merged_count=merged_count,
-            target_tag=TagMergeResult(
-                id=target_tag['id'],
-                name=target_tag['name'],
-                usage_count=count_response.count or 0
-            )
+            merged_count=result['merged_count'],
+            target_tag=TagMergeResult(**result['target_tag'])
         )
 
     except HTTPException:
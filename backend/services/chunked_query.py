@@ -0,0 +1,62 @@
+"""
+IN句に大量のIDを指定するクエリの分割実行
+
+PostgRESTではIN句の値がURLのクエリパラメータになるため、IDが多いとURLの長さの上限を超える
+IDを一定数ずつに分割したクエリを同時実行数を制限して並列に実行し、結果を結合して返す
+分割したクエリは別々のトランザクションになるため、参照（SELECT）のみに使用する
+（更新を分割すると途中で失敗した場合に一部だけが反映される）
+"""
+
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Iterable, Optional
+
+from config import settings
+
+
+def execute_in_chunks(
+    build_query: Callable[[list], Any],
+    values: Iterable,
+    chunk_size: Optional[int] = None,
+    max_workers: Optional[int] = None,
+    page_size: Optional[int] = None,
+) -> list[dict]:
+    """
+    values を chunk_size 件ずつに分割して build_query(chunk) のクエリを実行し、全件の行を返す
+
+    Args:
+        build_query: 分割したIDのリストから実行前のクエリを生成する関数
+                     （例: lambda ids: supabase.table('quote_tags').select('*').in_('tag_id', ids)）
+        values: IN句に指定する値（重複は除外する）
+        chunk_size: 1回のクエリで指定する値の最大数（省略時は設定値）
+        max_workers: 同時に実行するクエリの最大数（省略時は設定値）
+        page_size: 指定した場合、分割したクエリごとにこの行数ずつ取得を繰り返す
+                   （PostgRESTの max-rows による打ち切りを避ける。build_query で並び順を指定すること）
+
+    結果の順序は分割した順（分割内はクエリの並び順）
+    """
+    values = list(dict.fromkeys(values))
+    if not values:
+        return []
+
+    chunk_size = chunk_size or settings.in_list_chunk_size
+    max_workers = max_workers or settings.in_list_max_workers
+    chunks = [values[start:start + chunk_size] for start in range(0, len(values), chunk_size)]
+
+    def run(chunk: list) -> list[dict]:
+        if page_size is None:
+            return build_query(chunk).execute().data or []
+
+        rows = []
+        while True:
+            page = build_query(chunk).range(len(rows), len(rows) + page_size - 1).execute().data or []
+            rows.extend(page)
+            if len(page) < page_size:
+                return rows
+
+    if len(chunks) == 1:
+        return run(chunks[0])
+
+    with ThreadPoolExecutor(max_workers=min(max_workers, len(chunks))) as executor:
+        results = list(executor.map(run, chunks))
+
+    return [row for rows in results for row in rows]
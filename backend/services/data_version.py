@@ -0,0 +1,84 @@
+"""
+一覧APIの条件付きGET（ETag / If-None-Match）
+
+ユーザーのデータバージョン（user_data_versions テーブル、データ変更時にトリガーで更新）から
+ETagを生成し、クライアントが保持しているETagと一致する場合は一覧を取得せずに
+304 Not Modified を返す
+"""
+
+import hashlib
+from typing import Optional
+
+from fastapi import Depends, HTTPException, Request, status
+from supabase import Client
+
+from auth import get_current_user, get_supabase_client
+
+CACHE_CONTROL = 'private, no-cache'
+
+
+def get_data_version(supabase: Client, user_id: str) -> int:
+    """ユーザーのデータバージョンを取得（一度も変更がない場合は0）"""
+    response = supabase.table('user_data_versions') \
+        .select('version') \
+        .eq('user_id', user_id) \
+        .execute()
+    rows = response.data or []
+    return rows[0]['version'] if rows else 0
+
+
+def build_etag(user_id: str, version: int, request: Request) -> str:
+    """
+    ETagを生成
+
+    ユーザー・バージョン・リクエストのパスとクエリから生成する
+    （同じブラウザでユーザーを切り替えた場合に別ユーザーのETagと一致しないようにする）
+    """
+    source = f"{user_id}:{version}:{request.url.path}?{request.url.query}"
+    return f'W/"{hashlib.sha256(source.encode("utf-8")).hexdigest()[:32]}"'
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """If-None-Matchヘッダーが指定のETagと一致するか（弱い比較）"""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == '*':
+        return True
+
+    def opaque(tag: str) -> str:
+        tag = tag.strip()
+        return tag[2:] if tag.startswith('W/') else tag
+
+    return any(opaque(tag) == opaque(etag) for tag in if_none_match.split(','))
+
+
+async def check_not_modified(
+    request: Request,
+    user=Depends(get_current_user),
+    supabase: Client = Depends(get_supabase_client)
+) -> Optional[int]:
+    """
+    一覧APIの依存関係: データが変更されていなければ 304 Not Modified を返す
+
+    一覧の取得より前に実行され、変更がある場合はETagの生成に使ったデータバージョンを返す
+    （取得できなかった場合はNone。レスポンスへのETagヘッダーの付与は main.py のミドルウェアで行う）
+    一覧をキャッシュするルートは、返されたバージョンをキャッシュキーに含めること
+    （他のインスタンスでの更新はこのインスタンスのキャッシュを破棄しないため、
+    古いキャッシュが新しいバージョンのETagで返されるのを防ぐ）
+    """
+    try:
+        version = get_data_version(supabase, user.id)
+    except Exception as e:
+        # バージョンが取得できない場合は条件付きGETを行わずに通常どおり処理する
+        print(f"[ERROR] データバージョン取得エラー: {type(e).__name__}: {str(e)}")
+        return None
+
+    etag = build_etag(user.id, version, request)
+    if etag_matches(request.headers.get('if-none-match'), etag):
+        raise HTTPException(
+            status_code=status.HTTP_304_NOT_MODIFIED,
+            headers={'ETag': etag, 'Cache-Control': CACHE_CONTROL}
+        )
+
+    request.state.etag = etag
+    return version
@@ -0,0 +1,212 @@
+"""
+冪等キー（Idempotency-Key）の保存
+
+POST /api/quotes のリトライで同じフレーズが重複登録されないよう、
+ユーザー・キーごとに最初のリクエストのレスポンスを一定時間保存し、
+同じキーのリクエストには保存したレスポンスをそのまま返す
+
+- memory: プロセス内に保存（単一インスタンス構成向け）
+- sqlite: SQLiteファイルに保存（同じホストの複数ワーカー・再起動後も共有）
+"""
+
+import json
+import sqlite3
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Optional
+
+from config import settings
+
+# 処理中のキーの保持時間（秒）。処理中にプロセスが停止した場合でもこの時間で解放される
+IN_FLIGHT_TTL_SECONDS = 60
+
+
+class IdempotencyKeyInUse(Exception):
+    """同じキーのリクエストが処理中"""
+
+
+class IdempotencyKeyMismatch(Exception):
+    """同じキーが異なる内容のリクエストで使用された"""
+
+
+@dataclass
+class StoredResponse:
+    status_code: int
+    body: Any
+
+
+class IdempotencyStore(ABC):
+    """冪等キーの保存先の共通処理（begin / complete / release は保存先ごとに実装する）"""
+
+    def __init__(self, ttl_seconds: int):
+        self.ttl_seconds = ttl_seconds
+        self.replays = 0
+
+    @abstractmethod
+    def begin(self, user_id: str, key: str, fingerprint: str) -> Optional[StoredResponse]:
+        """
+        リクエストの処理を開始
+
+        保存済みのレスポンスがあればそれを返す（処理は不要）
+        ない場合はキーを処理中として登録してNoneを返す
+
+        Raises:
+            IdempotencyKeyInUse: 同じキーのリクエストが処理中
+            IdempotencyKeyMismatch: 同じキーが異なる内容のリクエストで使用済み
+        """
+
+    @abstractmethod
+    def complete(self, user_id: str, key: str, status_code: int, body: Any) -> None:
+        """処理が成功したレスポンスを保存"""
+
+    @abstractmethod
+    def release(self, user_id: str, key: str) -> None:
+        """処理が失敗した場合にキーを解放（同じキーで再実行できるようにする）"""
+
+    def stats(self) -> dict:
+        return {'backend': type(self).__name__, 'replays': self.replays}
+
+
+class MemoryIdempotencyStore(IdempotencyStore):
+    """プロセス内に保存する冪等キーストア（件数の上限を超えると古いものから破棄）"""
+
+    def __init__(self, ttl_seconds: int, max_entries: int):
+        super().__init__(ttl_seconds)
+        self.max_entries = max_entries
+        # (user_id, key) -> (expires_at, fingerprint, StoredResponse | None（処理中）)
+        self._entries: OrderedDict[tuple[str, str], tuple[float, str, Optional[StoredResponse]]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def begin(self, user_id: str, key: str, fingerprint: str) -> Optional[StoredResponse]:
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get((user_id, key))
+            if entry is not None and entry[0] > now:
+                _, stored_fingerprint, response = entry
+                if stored_fingerprint != fingerprint:
+                    raise IdempotencyKeyMismatch()
+                if response is None:
+                    raise IdempotencyKeyInUse()
+                self.replays += 1
+                return response
+
+            self._entries[(user_id, key)] = (now + IN_FLIGHT_TTL_SECONDS, fingerprint, None)
+            self._entries.move_to_end((user_id, key))
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+            return None
+
+    def complete(self, user_id: str, key: str, status_code: int, body: Any) -> None:
+        with self._lock:
+            entry = self._entries.get((user_id, key))
+            if entry is None:
+                return
+            self._entries[(user_id, key)] = (
+                time.time() + self.ttl_seconds, entry[1], StoredResponse(status_code, body)
+            )
+
+    def release(self, user_id: str, key: str) -> None:
+        with self._lock:
+            self._entries.pop((user_id, key), None)
+
+    def stats(self) -> dict:
+        stats = super().stats()
+        with self._lock:
+            stats['entries'] = len(self._entries)
+        return stats
+
+
+class SqliteIdempotencyStore(IdempotencyStore):
+    """SQLiteファイルに保存する冪等キーストア"""
+
+    # 期限切れの行を削除する間隔（begin の呼び出し回数）
+    PURGE_INTERVAL = 100
+
+    def __init__(self, ttl_seconds: int, path: str):
+        super().__init__(ttl_seconds)
+        self._connection = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._connection.execute('PRAGMA journal_mode=WAL')
+        self._connection.execute('PRAGMA busy_timeout=5000')
+        self._connection.execute('''
+            CREATE TABLE IF NOT EXISTS idempotency_keys (
+                user_id TEXT NOT NULL,
+                key TEXT NOT NULL,
+                fingerprint TEXT NOT NULL,
+                status_code INTEGER,
+                body TEXT,
+                expires_at REAL NOT NULL,
+                PRIMARY KEY (user_id, key)
+            )
+        ''')
+        self._connection.execute(
+            'CREATE INDEX IF NOT EXISTS idempotency_keys_expires_idx ON idempotency_keys(expires_at)'
+        )
+        self._lock = threading.Lock()
+        self._calls = 0
+
+    def begin(self, user_id: str, key: str, fingerprint: str) -> Optional[StoredResponse]:
+        now = time.time()
+        with self._lock:
+            self._calls += 1
+            # 他のワーカープロセスと同時に同じキーを登録しないよう書き込みロックを取得
+            self._connection.execute('BEGIN IMMEDIATE')
+            try:
+                if self._calls % self.PURGE_INTERVAL == 0:
+                    self._connection.execute('DELETE FROM idempotency_keys WHERE expires_at <= ?', (now,))
+
+                row = self._connection.execute(
+                    'SELECT fingerprint, status_code, body FROM idempotency_keys '
+                    'WHERE user_id = ? AND key = ? AND expires_at > ?',
+                    (user_id, key, now)
+                ).fetchone()
+
+                if row is not None:
+                    stored_fingerprint, status_code, body = row
+                    if stored_fingerprint != fingerprint:
+                        raise IdempotencyKeyMismatch()
+                    if status_code is None:
+                        raise IdempotencyKeyInUse()
+                    self.replays += 1
+                    return StoredResponse(status_code, json.loads(body))
+
+                self._connection.execute(
+                    'INSERT OR REPLACE INTO idempotency_keys (user_id, key, fingerprint, status_code, body, expires_at) '
+                    'VALUES (?, ?, ?, NULL, NULL, ?)',
+                    (user_id, key, fingerprint, now + IN_FLIGHT_TTL_SECONDS)
+                )
+                return None
+            finally:
+                self._connection.execute('COMMIT')
+
+    def complete(self, user_id: str, key: str, status_code: int, body: Any) -> None:
+        with self._lock:
+            self._connection.execute(
+                'UPDATE idempotency_keys SET status_code = ?, body = ?, expires_at = ? '
+                'WHERE user_id = ? AND key = ?',
+                (status_code, json.dumps(body, ensure_ascii=False), time.time() + self.ttl_seconds, user_id, key)
+            )
+
+    def release(self, user_id: str, key: str) -> None:
+        with self._lock:
+            self._connection.execute(
+                'DELETE FROM idempotency_keys WHERE user_id = ? AND key = ? AND status_code IS NULL',
+                (user_id, key)
+            )
+
+
+def create_idempotency_store() -> IdempotencyStore:
+    if settings.idempotency_backend == 'sqlite':
+        return SqliteIdempotencyStore(
+            ttl_seconds=settings.idempotency_ttl_seconds,
+            path=settings.idempotency_sqlite_path,
+        )
+    return MemoryIdempotencyStore(
+        ttl_seconds=settings.idempotency_ttl_seconds,
+        max_entries=settings.idempotency_max_entries,
+    )
+
+
+idempotency_store = create_idempotency_store()
@@ -0,0 +1,44 @@
+"""
+フレーズ更新時の関連付け（quote_activities / quote_tags）の変更行数の集計
+
+update_quote_with_relations が返す junction_changes を累積し、
+/health/stats で差分更新の効果（書き込みを省略できた更新の割合など）を確認できるようにする
+活動領域・タグを指定した更新のみを記録する（テキスト等のみの更新は対象外）
+"""
+
+import threading
+
+CHANGE_KEYS = ('activities_added', 'activities_removed', 'tags_added', 'tags_removed')
+
+
+class JunctionChangeStats:
+    """関連付けの追加・削除行数を累積するカウンター"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        # 活動領域・タグを指定した更新の回数
+        self.updates = 0
+        # 指定した関連付けが現在と同じで書き込みを行わなかった更新の回数
+        self.unchanged_updates = 0
+        self._totals = {key: 0 for key in CHANGE_KEYS}
+
+    def record(self, changes: dict) -> None:
+        counts = {key: int(changes.get(key) or 0) for key in CHANGE_KEYS}
+        with self._lock:
+            self.updates += 1
+            if not any(counts.values()):
+                self.unchanged_updates += 1
+            for key, count in counts.items():
+                self._totals[key] += count
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                'updates': self.updates,
+                'unchanged_updates': self.unchanged_updates,
+                'rows_written': sum(self._totals.values()),
+                **self._totals,
+            }
+
+
+junction_change_stats = JunctionChangeStats()
@@ -0,0 +1,165 @@
+"""
+公開フレーズのキャッシュ（プロセス内で全リクエストに共有）
+
+GET /api/quotes/public の並び順の先頭（1つのシードで pool_size 件）を出典・活動領域・タグ付きで保持し、
+その範囲内のページはDBにアクセスせずに返す
+- TTLを過ぎた場合は古い内容を返しながらバックグラウンドで再取得する（stale-while-revalidate）
+- キャッシュがない場合の同時リクエストは、最初のリクエストの取得完了を待って同じ結果を使う
+- 再取得に失敗し続けた場合、max_stale_seconds を過ぎた内容は返さない
+"""
+
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Callable, Optional
+
+from config import settings
+
+
+@dataclass
+class PublicFeedPool:
+    """キャッシュする公開フレーズ（シード順の先頭から）"""
+    seed: int
+    total: int
+    quotes: list[dict]
+    # 公開フレーズをすべて含む（pool_size 未満しか存在しない）
+    complete: bool
+    fetched_at: float = field(default_factory=time.time)
+
+    def covers(self, end: int) -> bool:
+        """先頭から end 件目までのページをキャッシュから返せるか"""
+        return self.complete or end <= len(self.quotes)
+
+
+class PublicFeedCache:
+    """stale-while-revalidate 方式の公開フレーズキャッシュ"""
+
+    def __init__(self, ttl_seconds: int, max_stale_seconds: int):
+        self.ttl_seconds = ttl_seconds
+        self.max_stale_seconds = max_stale_seconds
+        self._pool: Optional[PublicFeedPool] = None
+        # 取得処理の直列化（同時に複数の取得を行わない）
+        self._load_lock = threading.Lock()
+        self._state_lock = threading.Lock()
+        self._refresh_thread: Optional[threading.Thread] = None
+        self.hits = 0
+        self.stale_hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self.refreshes = 0
+        self.refresh_errors = 0
+        self.last_refresh_ms: Optional[float] = None
+
+    @property
+    def enabled(self) -> bool:
+        return self.ttl_seconds > 0
+
+    @property
+    def seed(self) -> Optional[int]:
+        """キャッシュしているフレーズのシード（キャッシュがない場合はNone）"""
+        pool = self._pool
+        return pool.seed if pool is not None else None
+
+    def get_nowait(self, loader: Callable[[], PublicFeedPool]) -> Optional[PublicFeedPool]:
+        """
+        ロック・DBアクセスなしで返せるキャッシュを取得（ない場合・無効な場合はNone）
+
+        TTLを過ぎた内容を返す場合は loader による再取得をバックグラウンドで開始する
+        イベントループ上から呼び出してよい（Noneの場合は get をスレッドで呼び出す）
+        """
+        if not self.enabled:
+            return None
+
+        pool = self._pool
+        if pool is not None:
+            age = time.time() - pool.fetched_at
+            if age < self.ttl_seconds:
+                self.hits += 1
+                return pool
+            if age < self.max_stale_seconds:
+                self.stale_hits += 1
+                self._refresh_in_background(loader)
+                return pool
+        return None
+
+    def get(self, loader: Callable[[], PublicFeedPool]) -> Optional[PublicFeedPool]:
+        """
+        キャッシュを取得（無効な場合はNone）
+
+        キャッシュがない・古すぎる場合は loader で取得する（取得のエラーはそのまま送出）
+        取得中のロック待ちと loader の実行でブロックするため、イベントループ上からは
+        asyncio.to_thread で呼び出すこと
+        """
+        if not self.enabled:
+            return None
+
+        pool = self.get_nowait(loader)
+        if pool is not None:
+            return pool
+
+        with self._load_lock:
+            # 待っている間に他のリクエストが取得した場合はその結果を使う
+            pool = self._pool
+            if pool is not None and time.time() - pool.fetched_at < self.ttl_seconds:
+                self.coalesced += 1
+                return pool
+
+            self.misses += 1
+            return self._load(loader)
+
+    def clear(self) -> None:
+        with self._load_lock:
+            self._pool = None
+
+    def stats(self) -> dict:
+        pool = self._pool
+        return {
+            'enabled': self.enabled,
+            'hits': self.hits,
+            'stale_hits': self.stale_hits,
+            'misses': self.misses,
+            'coalesced': self.coalesced,
+            'refreshes': self.refreshes,
+            'refresh_errors': self.refresh_errors,
+            'last_refresh_ms': self.last_refresh_ms,
+            'pool_quotes': len(pool.quotes) if pool is not None else 0,
+            'age_seconds': round(time.time() - pool.fetched_at, 1) if pool is not None else None,
+        }
+
+    def _load(self, loader: Callable[[], PublicFeedPool]) -> PublicFeedPool:
+        start = time.perf_counter()
+        try:
+            pool = loader()
+        except Exception:
+            self.refresh_errors += 1
+            raise
+
+        self._pool = pool
+        self.refreshes += 1
+        self.last_refresh_ms = round((time.perf_counter() - start) * 1000, 1)
+        return pool
+
+    def _refresh_in_background(self, loader: Callable[[], PublicFeedPool]) -> None:
+        with self._state_lock:
+            if self._refresh_thread is not None and self._refresh_thread.is_alive():
+                return
+
+            def refresh():
+                try:
+                    with self._load_lock:
+                        # 待っている間に取得済みの場合は何もしない
+                        pool = self._pool
+                        if pool is not None and time.time() - pool.fetched_at < self.ttl_seconds:
+                            return
+                        self._load(loader)
+                except Exception as e:
+                    print(f"[ERROR] 公開フレーズキャッシュ更新エラー: {type(e).__name__}: {str(e)}")
+
+            self._refresh_thread = threading.Thread(target=refresh, daemon=True)
+            self._refresh_thread.start()
+
+
+public_feed_cache = PublicFeedCache(
+    ttl_seconds=settings.public_feed_cache_ttl_seconds,
+    max_stale_seconds=settings.public_feed_cache_max_stale_seconds,
+)
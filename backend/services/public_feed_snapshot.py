@@ -0,0 +1,115 @@
+"""
+公開フレーズのスナップショット（静的JSONファイル）
+
+バックグラウンドで定期的に GET /api/quotes/public の先頭ページ（1つのシードで pages ページ分）を
+JSONファイルに書き出し、GET /api/quotes/public/snapshot/{page} でファイルをそのまま返す
+（Cache-Control・ETag付きのため、CDN（Vercelのエッジ）でキャッシュでき、アクセスが集中してもDBにアクセスしない）
+
+- ファイルはすべてのページを一時ファイルに書き出してから置き換える（書き込み途中のファイルは返さない）
+- 書き出しは書き出し間隔の区切り（時刻を間隔で割った値）ごとに行い、シードは区切りから決める
+  （複数のインスタンスがそれぞれ書き出しても、同じ区切りでは同じ並び順になる）
+- ETagはファイルの内容のハッシュから生成する（内容が同じであればインスタンスによらず同じ値になる）
+"""
+
+import asyncio
+import hashlib
+import os
+import tempfile
+import time
+from pathlib import Path
+from typing import Callable, Optional
+
+from config import settings
+
+
+class PublicFeedSnapshots:
+    """公開フレーズのスナップショットファイルの書き出しと参照"""
+
+    def __init__(self, directory: str, pages: int):
+        self.directory = Path(directory)
+        self.pages = pages
+        # ファイルごとのETag（パス -> (更新日時, サイズ, ETag)）。内容が変わった場合のみハッシュを再計算する
+        self._etags: dict[Path, tuple[int, int, str]] = {}
+        self.writes = 0
+        self.write_errors = 0
+        self.last_write_ms: Optional[float] = None
+        self.last_written_at: Optional[float] = None
+
+    def path_for(self, page: int) -> Optional[Path]:
+        """ページのスナップショットファイル（範囲外・未作成の場合はNone）"""
+        if not 0 <= page < self.pages:
+            return None
+        path = self.directory / f'public-{page}.json'
+        return path if path.is_file() else None
+
+    def etag_for(self, path: Path, stat_result: os.stat_result) -> str:
+        """ファイルの内容のハッシュから生成したETag"""
+        cached = self._etags.get(path)
+        if cached is not None and cached[:2] == (stat_result.st_mtime_ns, stat_result.st_size):
+            return cached[2]
+
+        etag = f'"{hashlib.sha256(path.read_bytes()).hexdigest()[:32]}"'
+        self._etags[path] = (stat_result.st_mtime_ns, stat_result.st_size, etag)
+        return etag
+
+    def write(self, contents: list[bytes]) -> None:
+        """各ページのJSONをファイルに書き出す（contents[i] が i ページ目）"""
+        self.directory.mkdir(parents=True, exist_ok=True)
+
+        temp_paths = []
+        try:
+            for content in contents:
+                fd, temp_path = tempfile.mkstemp(dir=self.directory, prefix='.public-', suffix='.tmp')
+                temp_paths.append(temp_path)
+                with os.fdopen(fd, 'wb') as f:
+                    f.write(content)
+
+            # すべてのページを書き出してから置き換える（ページ間でシードが混在する時間を短くする）
+            for page, temp_path in enumerate(temp_paths):
+                os.replace(temp_path, self.directory / f'public-{page}.json')
+        except Exception:
+            for temp_path in temp_paths:
+                if os.path.exists(temp_path):
+                    os.remove(temp_path)
+            raise
+
+    def refresh(self, render: Callable[[], list[bytes]]) -> None:
+        """スナップショットを生成して書き出す"""
+        start = time.perf_counter()
+        try:
+            self.write(render())
+        except Exception:
+            self.write_errors += 1
+            raise
+
+        self.writes += 1
+        self.last_write_ms = round((time.perf_counter() - start) * 1000, 1)
+        self.last_written_at = time.time()
+
+    async def run_periodically(self, render: Callable[[], list[bytes]], interval_seconds: int) -> None:
+        """
+        起動時と interval_seconds の区切りごとにスナップショットを更新
+        （生成はスレッドで実行し、イベントループを止めない）
+        """
+        while True:
+            try:
+                await asyncio.to_thread(self.refresh, render)
+            except Exception as e:
+                print(f"[ERROR] 公開フレーズスナップショット作成エラー: {type(e).__name__}: {str(e)}")
+            # 次の区切りまで待つ（インスタンス間で書き出しのタイミングとシードを揃える）
+            await asyncio.sleep(interval_seconds - time.time() % interval_seconds)
+
+    def stats(self) -> dict:
+        return {
+            'enabled': settings.public_feed_snapshot_enabled,
+            'writes': self.writes,
+            'write_errors': self.write_errors,
+            'last_write_ms': self.last_write_ms,
+            'age_seconds': round(time.time() - self.last_written_at, 1) if self.last_written_at else None,
+        }
+
+
+public_feed_snapshots = PublicFeedSnapshots(
+    directory=settings.public_feed_snapshot_dir,
+    pages=settings.public_feed_snapshot_pages,
+)
@@ -0,0 +1,127 @@
+"""
+ユーザー単位のフレーズ一覧キャッシュ
+
+/api/quotes/grouped の取得結果（DB関数の戻り値）をユーザー・検索条件ごとに保持する
+（ユーザーの検索インデックスも同じキャッシュに格納する）
+- 合計サイズ（JSON換算のバイト数）で上限を設け、最も古く使われたエントリから破棄
+- フレーズ・タグ等の更新時はそのユーザーのエントリをすべて破棄（write-through invalidation）
+- 複数インスタンス構成での不整合を抑えるため、各エントリはTTLで失効
+"""
+
+import json
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Hashable, Optional
+
+from config import settings
+
+
+class UserQuoteCache:
+    """ユーザー単位でまとめて破棄できるLRUキャッシュ"""
+
+    def __init__(self, max_bytes: int, ttl_seconds: int):
+        self.max_bytes = max_bytes
+        self.ttl_seconds = ttl_seconds
+        # (user_id, key) -> (expires_at, size, value)
+        self._entries: OrderedDict[tuple[str, Hashable], tuple[float, int, Any]] = OrderedDict()
+        # user_id -> そのユーザーのキー集合（ユーザー単位の破棄用）
+        self._user_keys: dict[str, set[Hashable]] = {}
+        self._total_bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_bytes > 0 and self.ttl_seconds > 0
+
+    def get(self, user_id: str, key: Hashable) -> Optional[Any]:
+        if not self.enabled:
+            return None
+
+        with self._lock:
+            entry = self._entries.get((user_id, key))
+            if entry is None:
+                self.misses += 1
+                return None
+
+            expires_at, _, value = entry
+            if expires_at <= time.time():
+                self._remove((user_id, key))
+                self.misses += 1
+                return None
+
+            self._entries.move_to_end((user_id, key))
+            self.hits += 1
+            return value
+
+    def set(self, user_id: str, key: Hashable, value: Any, size: Optional[int] = None) -> None:
+        """値を保存（sizeを省略した場合はJSON換算のバイト数で計算）"""
+        if not self.enabled:
+            return
+
+        if size is None:
+            size = len(json.dumps(value, ensure_ascii=False, default=str).encode('utf-8'))
+        if size > self.max_bytes:
+            return
+
+        with self._lock:
+            if (user_id, key) in self._entries:
+                self._remove((user_id, key))
+
+            self._entries[(user_id, key)] = (time.time() + self.ttl_seconds, size, value)
+            self._user_keys.setdefault(user_id, set()).add(key)
+            self._total_bytes += size
+
+            while self._total_bytes > self.max_bytes:
+                oldest = next(iter(self._entries))
+                self._remove(oldest)
+                self.evictions += 1
+
+    def invalidate_user(self, user_id: str) -> None:
+        """ユーザーのキャッシュをすべて破棄（データ更新時に呼び出す）"""
+        with self._lock:
+            for key in list(self._user_keys.get(user_id, ())):
+                self._remove((user_id, key))
+            self.invalidations += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._user_keys.clear()
+            self._total_bytes = 0
+
+    def _remove(self, entry_key: tuple[str, Hashable]) -> None:
+        _, size, _ = self._entries.pop(entry_key)
+        self._total_bytes -= size
+
+        user_id, key = entry_key
+        keys = self._user_keys.get(user_id)
+        if keys is not None:
+            keys.discard(key)
+            if not keys:
+                del self._user_keys[user_id]
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'entries': len(self._entries),
+                'users': len(self._user_keys),
+                'bytes': self._total_bytes,
+                'max_bytes': self.max_bytes,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'invalidations': self.invalidations,
+                'hit_rate': self.hits / lookups if lookups else 0.0,
+            }
+
+
+quote_cache = UserQuoteCache(
+    max_bytes=settings.quote_cache_max_bytes,
+    ttl_seconds=settings.quote_cache_ttl_seconds,
+)
@@ -0,0 +1,80 @@
+"""
+フレーズインポート（NDJSON）の読み込み
+
+リクエストボディを受信しながら1行ずつ取り出して検証する（ボディ全体をメモリに保持しない）
+"""
+
+from typing import AsyncIterator, Optional
+
+from pydantic import TypeAdapter, ValidationError
+
+from models.quote import QuoteImportItem
+
+# 行ごとに生成するとコストが大きいため、検証用のTypeAdapterはモジュールで1つだけ生成する
+_item_adapter = TypeAdapter(QuoteImportItem)
+
+
+async def iter_ndjson_lines(
+    chunks: AsyncIterator[bytes],
+    max_line_bytes: int
+) -> AsyncIterator[tuple[int, Optional[bytes]]]:
+    """
+    受信したチャンクから (行番号, 行) を順に返す（行番号は1始まり、空行は除く）
+
+    max_line_bytes を超える行は読み捨てて None を返す
+    """
+    buffer = bytearray()
+    line_number = 0
+    skipping = False
+
+    async for chunk in chunks:
+        start = 0
+        while True:
+            end = chunk.find(b'\n', start)
+            if end == -1:
+                if not skipping:
+                    buffer += chunk[start:]
+                    if len(buffer) > max_line_bytes:
+                        # 改行が来るまで読み捨てる
+                        buffer.clear()
+                        skipping = True
+                break
+
+            line_number += 1
+            if skipping:
+                skipping = False
+                yield line_number, None
+            else:
+                buffer += chunk[start:end]
+                if len(buffer) > max_line_bytes:
+                    yield line_number, None
+                elif buffer.strip():
+                    yield line_number, bytes(buffer)
+                buffer.clear()
+            start = end + 1
+
+    line_number += 1
+    if skipping:
+        yield line_number, None
+    elif buffer.strip():
+        yield line_number, bytes(buffer)
+
+
+def parse_import_line(line: bytes) -> QuoteImportItem:
+    """1行分のJSONを検証してフレーズに変換（不正な場合はValueError）"""
+    try:
+        item = _item_adapter.validate_json(line)
+    except ValidationError as e:
+        messages = [
+            f"{'.'.join(str(loc) for loc in error['loc']) or 'line'}: {error['msg']}"
+            for error in e.errors()
+        ]
+        raise ValueError('; '.join(messages)) from e
+
+    # source_typeに応じたバリデーション（POST /api/quotes と同じ）
+    if item.source_type == "BOOK" and not item.book_id:
+        raise ValueError("source_typeがBOOKの場合、book_idが必要です")
+    if item.source_type == "SNS" and not item.sns_user_id:
+        raise ValueError("source_typeがSNSの場合、sns_user_idが必要です")
+
+    return item
@@ -0,0 +1,109 @@
+"""
+フレーズ検索用のN-gram転置インデックス
+
+日本語は単語境界で分割できないため、文字バイグラム（2文字単位）で転置インデックスを作成する
+- 検索語のバイグラムをすべて含むフレーズを候補とし、部分一致を確認して確定
+- 1文字の検索語はユニグラムの転置リストで検索
+- スペース区切りの複数語はAND検索
+- 全角・半角や大文字・小文字の違いはNFKC正規化と小文字化で吸収
+"""
+
+import unicodedata
+from collections import defaultdict
+from typing import Iterable, Optional
+
+# フィールド間の区切り文字（検索語には含まれないため、フィールドをまたいだ一致を防ぐ）
+FIELD_SEPARATOR = '\n'
+
+_EMPTY: frozenset[int] = frozenset()
+
+
+def normalize_text(text: str) -> str:
+    """検索用にテキストを正規化（NFKC + 小文字化）"""
+    return unicodedata.normalize('NFKC', text).casefold()
+
+
+def split_terms(query: str) -> list[str]:
+    """検索クエリを正規化してスペース区切りの検索語に分割"""
+    return normalize_text(query).split()
+
+
+class NgramIndex:
+    """フレーズIDをキーとするバイグラム転置インデックス"""
+
+    def __init__(self):
+        self._docs: dict[int, str] = {}
+        self._postings: dict[str, set[int]] = defaultdict(set)
+
+    def __len__(self) -> int:
+        return len(self._docs)
+
+    @staticmethod
+    def _grams(text: str) -> set[str]:
+        grams = set(text)
+        grams.update(text[i:i + 2] for i in range(len(text) - 1))
+        grams.discard(FIELD_SEPARATOR)
+        return grams
+
+    def add(self, doc_id: int, fields: Iterable[Optional[str]]) -> None:
+        """フレーズを登録（フレーズテキスト、書籍タイトル等の検索対象フィールドを渡す）"""
+        if doc_id in self._docs:
+            self.remove(doc_id)
+
+        text = FIELD_SEPARATOR.join(normalize_text(field) for field in fields if field)
+        self._docs[doc_id] = text
+        for gram in self._grams(text):
+            self._postings[gram].add(doc_id)
+
+    def remove(self, doc_id: int) -> None:
+        text = self._docs.pop(doc_id, None)
+        if text is None:
+            return
+
+        for gram in self._grams(text):
+            postings = self._postings.get(gram)
+            if postings is not None:
+                postings.discard(doc_id)
+                if not postings:
+                    del self._postings[gram]
+
+    def _candidates(self, term: str) -> set[int] | frozenset[int]:
+        if len(term) == 1:
+            return self._postings.get(term, _EMPTY)
+
+        grams = {term[i:i + 2] for i in range(len(term) - 1)}
+        postings = sorted((self._postings.get(gram, _EMPTY) for gram in grams), key=len)
+        candidates = set(postings[0])
+        for posting in postings[1:]:
+            candidates &= posting
+            if not candidates:
+                break
+        return candidates
+
+    def search(self, query: str) -> set[int]:
+        """
+        検索語をすべて含むフレーズのIDを返す（スペース区切りでAND検索）
+
+        検索語が空の場合は空集合を返す
+        """
+        terms = sorted(set(split_terms(query)), key=len, reverse=True)
+        if not terms:
+            return set()
+
+        result: Optional[set[int]] = None
+        for term in terms:
+            candidates = self._candidates(term)
+            if result is not None:
+                candidates = result & candidates
+            result = {doc_id for doc_id in candidates if term in self._docs[doc_id]}
+            if not result:
+                break
+
+        return result or set()
+
+    @property
+    def estimated_bytes(self) -> int:
+        """インデックスのおおよそのメモリ使用量（キャッシュ容量の計算用）"""
+        text_bytes = sum(len(text) * 2 + 80 for text in self._docs.values())
+        posting_bytes = sum(len(ids) for ids in self._postings.values()) * 55
+        return text_bytes + posting_bytes + len(self._postings) * 250
@@ -0,0 +1,111 @@
+"""
+認証（auth.py）のテスト
+"""
+
+import time
+
+import pytest
+from jose import jwt, JWTError
+
+from auth import TokenCache, verify_token_locally
+from config import settings
+
+
+SECRET = "test-jwt-secret"
+
+
+def make_token(**overrides):
+    """テスト用のHS256トークンを生成"""
+    claims = {
+        "sub": "11111111-2222-3333-4444-555555555555",
+        "email": "test@example.com",
+        "role": "authenticated",
+        "aud": settings.jwt_audience,
+        "iss": settings.jwt_issuer_url,
+        "exp": int(time.time()) + 3600,
+    }
+    claims.update(overrides)
+    return jwt.encode(claims, SECRET, algorithm="HS256")
+
+
+@pytest.fixture(autouse=True)
+def jwt_secret(monkeypatch):
+    monkeypatch.setattr(settings, "jwt_secret", SECRET)
+
+
+def test_verify_token_locally_returns_user():
+    """有効なトークンからid/emailを持つユーザーが構築される"""
+    user = verify_token_locally(make_token())
+
+    assert user.id == "11111111-2222-3333-4444-555555555555"
+    assert user.email == "test@example.com"
+
+
+def test_verify_token_locally_rejects_expired_token():
+    """有効期限切れのトークンは拒否される"""
+    with pytest.raises(JWTError):
+        verify_token_locally(make_token(exp=int(time.time()) - 10))
+
+
+def test_verify_token_locally_rejects_wrong_audience_and_issuer():
+    """aud・issが一致しないトークンは拒否される"""
+    with pytest.raises(JWTError):
+        verify_token_locally(make_token(aud="anon-other"))
+
+    with pytest.raises(JWTError):
+        verify_token_locally(make_token(iss="https://evil.example.com/auth/v1"))
+
+
+def test_verify_token_locally_rejects_bad_signature():
+    """別の鍵で署名されたトークンは拒否される"""
+    token = jwt.encode(
+        {"sub": "x", "aud": settings.jwt_audience, "iss": settings.jwt_issuer_url,
+         "exp": int(time.time()) + 60},
+        "another-secret",
+        algorithm="HS256",
+    )
+
+    with pytest.raises(JWTError):
+        verify_token_locally(token)
+
+
+def test_verify_token_locally_rejects_unexpected_algorithm():
+    """設定と異なるalgのトークンは、正しい鍵で署名されていても拒否される"""
+    token = jwt.encode(
+        {"sub": "x", "aud": settings.jwt_audience, "iss": settings.jwt_issuer_url,
+         "exp": int(time.time()) + 60},
+        SECRET,
+        algorithm="HS512",
+    )
+
+    with pytest.raises(JWTError):
+        verify_token_locally(token)
+
+
+def test_token_cache_hit_miss_and_eviction():
+    """キャッシュのヒット・ミス・LRU破棄が記録される"""
+    cache = TokenCache(max_size=2, ttl_seconds=60)
+
+    assert cache.get("token-a") is None
+    cache.set("token-a", "user-a")
+    cache.set("token-b", "user-b")
+    assert cache.get("token-a") == "user-a"
+
+    # token-bが最も古く使われたエントリなので破棄される
+    cache.set("token-c", "user-c")
+    assert cache.get("token-b") is None
+
+    stats = cache.stats()
+    assert stats["size"] == 2
+    assert stats["hits"] == 1
+    assert stats["misses"] == 2
+    assert stats["evictions"] == 1
+
+
+def test_token_cache_expires_at_token_exp():
+    """エントリはTTLより早いトークンのexpで失効する"""
+    cache = TokenCache(max_size=10, ttl_seconds=3600)
+
+    cache.set("token", "user", exp=time.time() - 1)
+
+    assert cache.get("token") is None
@@ -0,0 +1,638 @@
+"""
+フレーズAPI（/api/quotes）のテスト
+"""
+
+from types import SimpleNamespace
+
+import pytest
+
+from routes.quotes import encode_cursor, decode_cursor
+
+
+def test_cursor_round_trip():
+    """カーソルから (created_at, id, total) が復元できる"""
+    cursor = encode_cursor("2025-11-16T12:34:56.123456+00:00", 42, 1234)
+
+    assert decode_cursor(cursor) == ("2025-11-16T12:34:56.123456+00:00", 42, 1234)
+
+
+def test_cursor_is_url_safe():
+    """カーソルはクエリパラメータにそのまま使える"""
+    cursor = encode_cursor("2025-11-16T12:34:56+09:00", 1, 1)
+
+    assert "=" not in cursor
+    assert "+" not in cursor
+    assert "/" not in cursor
+
+
+@pytest.mark.parametrize("cursor", ["", "not-a-cursor", "e30"])
+def test_decode_cursor_rejects_invalid_values(cursor):
+    """不正なカーソルはValueError"""
+    with pytest.raises(ValueError):
+        decode_cursor(cursor)
+
+
+class _FakeRpc:
+    def __init__(self, data):
+        self.data = data
+
+    def execute(self):
+        return self
+
+
+class _FakeSupabase:
+    def __init__(self, page):
+        self.page = page
+
+    def rpc(self, fn, params):
+        return _FakeRpc(self.page)
+
+
+def test_quotes_page_cache_is_keyed_by_data_version():
+    """データバージョンが変わった場合（他のインスタンスでの更新）はキャッシュを使わずに再取得する"""
+    from routes.quotes import fetch_quotes_page
+    from services.quote_cache import quote_cache
+
+    quote_cache.clear()
+    supabase = _FakeSupabase({'total': 1, 'quotes': []})
+    params = {'p_limit': 50, 'p_offset': 0}
+
+    assert fetch_quotes_page(supabase, 'user-1', 'get_quotes_grouped_page', params, 1) == {'total': 1, 'quotes': []}
+
+    supabase.page = {'total': 2, 'quotes': []}
+    assert fetch_quotes_page(supabase, 'user-1', 'get_quotes_grouped_page', params, 1)['total'] == 1
+    assert fetch_quotes_page(supabase, 'user-1', 'get_quotes_grouped_page', params, 2)['total'] == 2
+    quote_cache.clear()
+
+
+def _quote(quote_id, source_type, book=None, sns_user=None, source_meta=None):
+    return {
+        'id': quote_id,
+        'text': f'フレーズ{quote_id}',
+        'source_type': source_type,
+        'book_id': book['id'] if book else None,
+        'sns_user_id': sns_user['id'] if sns_user else None,
+        'page_number': 10 if book else None,
+        'source_meta': source_meta,
+        'is_public': False,
+        'reference_link': None,
+        'created_at': f'2025-11-16T12:34:{quote_id:02d}',
+        'books': book,
+        'sns_users': sns_user,
+        'quote_activities': [{'activities': {'id': 1, 'name': '仕事', 'icon': '💼'}}],
+        'quote_tags': [{'tags': {'id': 2, 'name': '#習慣'}}],
+    }
+
+
+def test_fast_serialization_matches_validated_response(monkeypatch):
+    """fast_serialization の有無でレスポンスのJSONが変わらない"""
+    import asyncio
+    import json
+
+    from config import settings
+    from routes.quotes import get_quotes_grouped
+    from services.quote_cache import quote_cache
+
+    book = {'id': 1, 'title': '書籍', 'author': '著者', 'cover_image_url': None}
+    sns_user = {'id': 1, 'platform': 'X', 'handle': 'taro', 'display_name': None}
+    quotes = [
+        _quote(3, 'BOOK', book=book),
+        _quote(2, 'SNS', sns_user=sns_user),
+        _quote(1, 'OTHER', source_meta={'source': '講演', 'note': None}),
+    ]
+    supabase = _FakeSupabase({'total': 3, 'page_end': 3, 'quotes': quotes})
+    user = SimpleNamespace(id='user-1')
+
+    def call():
+        quote_cache.clear()
+        return asyncio.run(get_quotes_grouped(
+            limit=50, offset=0, search=None, source_type=None, activity_ids=None,
+            tag_ids=None, pagination='offset', cursor=None, stream=False, data_version=1,
+            user=user, supabase=supabase,
+        ))
+
+    monkeypatch.setattr(settings, 'fast_serialization', False)
+    expected = call().model_dump(mode='json')
+
+    monkeypatch.setattr(settings, 'fast_serialization', True)
+    response = call()
+
+    assert response.media_type == 'application/json'
+    assert json.loads(response.body) == expected
+
+
+def test_streaming_response_matches_regular_response(monkeypatch):
+    """stream=true でもレスポンスのJSONが変わらない"""
+    import asyncio
+    import json
+
+    from config import settings
+    from routes.quotes import get_quotes_grouped
+    from services.quote_cache import quote_cache
+
+    book = {'id': 1, 'title': '書籍', 'author': '著者', 'cover_image_url': None}
+    quotes = [
+        _quote(3, 'BOOK', book=book),
+        _quote(2, 'BOOK', book=book),
+        _quote(1, 'OTHER', source_meta={'source': '講演', 'note': None}),
+    ]
+    supabase = _FakeSupabase({'total': 3, 'page_end': 3, 'quotes': quotes})
+    user = SimpleNamespace(id='user-1')
+    monkeypatch.setattr(settings, 'fast_serialization', False)
+
+    def call(stream):
+        quote_cache.clear()
+        return asyncio.run(get_quotes_grouped(
+            limit=50, offset=0, search=None, source_type=None, activity_ids=None,
+            tag_ids=None, pagination='offset', cursor=None, stream=stream, data_version=1,
+            user=user, supabase=supabase,
+        ))
+
+    async def read_body(response):
+        return ''.join([chunk async for chunk in response.body_iterator])
+
+    expected = call(False).model_dump(mode='json')
+    response = call(True)
+
+    assert response.media_type == 'application/json'
+    assert json.loads(asyncio.run(read_body(response))) == expected
+
+
+class _RecordingSupabase:
+    """RPC呼び出しを記録し、DB関数の戻り値を模したデータを返す"""
+
+    def __init__(self, result=None):
+        self.calls = []
+        self.result = result
+
+    def rpc(self, fn, params):
+        self.calls.append((fn, params))
+        if fn == 'create_quotes_with_relations':
+            data = [
+                {
+                    'id': i + 1,
+                    'user_id': 'user-1',
+                    'text': item['text'],
+                    'source_type': item.get('source_type', params['p_source_type']),
+                    'book_id': item.get('book_id', params.get('p_book_id')),
+                    'created_at': '2025-11-16T12:34:56+00:00',
+                    'updated_at': '2025-11-16T12:34:56+00:00',
+                }
+                for i, item in enumerate(params['p_quotes'])
+            ]
+        else:
+            data = self.result
+        return _FakeRpc(data)
+
+
+class _FakeTableQuery:
+    """テーブル操作のメソッド呼び出しを記録し、指定したデータを返す"""
+
+    def __init__(self, supabase, table):
+        self.supabase = supabase
+        self.supabase.queries.append((table, []))
+
+    def __getattr__(self, name):
+        def method(*args, **kwargs):
+            self.supabase.queries[-1][1].append((name, args))
+            return self
+        return method
+
+    def execute(self):
+        return SimpleNamespace(data=self.supabase.rows, count=None)
+
+
+class _TableSupabase:
+    """テーブル操作のたびに rows を返す"""
+
+    def __init__(self, rows):
+        self.rows = rows
+        self.queries = []
+
+    def table(self, name):
+        return _FakeTableQuery(self, name)
+
+
+def test_create_quotes_uses_single_rpc():
+    """一括登録は件数によらず1回のRPC（1トランザクション）で行う"""
+    import asyncio
+
+    from models.quote import QuoteCreate
+    from routes.quotes import create_quotes
+
+    supabase = _RecordingSupabase()
+    quote_create = QuoteCreate(
+        quotes=[
+            {'text': f'フレーズ{i}', 'activity_ids': [1, 2], 'tag_ids': [3] if i % 2 else []}
+            for i in range(30)
+        ] + [
+            {'text': 'タグ名指定', 'activity_ids': [1], 'tag_names': ['新しいタグ', '#既存タグ']}
+        ],
+        source_type='BOOK',
+        book_id=5,
+    )
+
+    response = asyncio.run(create_quotes(
+        quote_create=quote_create, idempotency_key=None, user=SimpleNamespace(id='user-1'), supabase=supabase,
+    ))
+
+    assert [fn for fn, _ in supabase.calls] == ['create_quotes_with_relations']
+    _, params = supabase.calls[0]
+    assert len(params['p_quotes']) == 31
+    assert params['p_quotes'][1] == {'text': 'フレーズ1', 'activity_ids': [1, 2], 'tag_ids': [3], 'tag_names': []}
+    # タグ名はDB関数でまとめて解決する（タグ作成のための個別のリクエストは行わない）
+    assert params['p_quotes'][30]['tag_names'] == ['新しいタグ', '#既存タグ']
+    assert response.created_count == 31
+    assert [quote.text for quote in response.quotes] == [f'フレーズ{i}' for i in range(30)] + ['タグ名指定']
+
+
+def test_update_quote_returns_hydrated_quote():
+    """更新はDB関数の戻り値から活動領域・タグ付きのフレーズを返す"""
+    import asyncio
+
+    from models.quote import QuoteUpdate
+    from routes.quotes import update_quote
+
+    from services.junction_stats import junction_change_stats
+
+    changes = {'activities_added': 0, 'activities_removed': 0, 'tags_added': 1, 'tags_removed': 2}
+    supabase = _RecordingSupabase(result={**_quote(7, 'OTHER'), 'junction_changes': changes})
+    before = junction_change_stats.stats()
+
+    response = asyncio.run(update_quote(
+        quote_id=7, quote_update=QuoteUpdate(tag_ids=[2]),
+        user=SimpleNamespace(id='user-1'), supabase=supabase,
+    ))
+
+    fn, params = supabase.calls[0]
+    assert fn == 'update_quote_with_relations'
+    assert params['p_tag_ids'] == [2]
+    assert params['p_activity_ids'] is None
+    assert response.quote.id == 7
+    assert [tag.name for tag in response.quote.tags] == ['#習慣']
+    # DB関数が反映した関連付けの行数を集計する
+    after = junction_change_stats.stats()
+    assert after['updates'] == before['updates'] + 1
+    assert after['rows_written'] == before['rows_written'] + 3
+
+
+def test_update_quote_without_relations_is_not_counted():
+    """活動領域・タグを指定しない更新は関連付けの集計に含めない"""
+    import asyncio
+
+    from models.quote import QuoteUpdate
+    from routes.quotes import update_quote
+    from services.junction_stats import junction_change_stats
+
+    changes = {'activities_added': 0, 'activities_removed': 0, 'tags_added': 0, 'tags_removed': 0}
+    supabase = _RecordingSupabase(result={**_quote(7, 'OTHER'), 'junction_changes': changes})
+    before = junction_change_stats.stats()
+
+    asyncio.run(update_quote(
+        quote_id=7, quote_update=QuoteUpdate(text='新しいテキスト'),
+        user=SimpleNamespace(id='user-1'), supabase=supabase,
+    ))
+
+    assert junction_change_stats.stats() == before
+
+
+def test_update_quote_not_found():
+    """対象のフレーズが存在しない場合は404"""
+    import asyncio
+
+    from fastapi import HTTPException
+    from models.quote import QuoteUpdate
+    from routes.quotes import update_quote
+
+    supabase = _RecordingSupabase(result=None)
+
+    with pytest.raises(HTTPException) as exc_info:
+        asyncio.run(update_quote(
+            quote_id=7, quote_update=QuoteUpdate(text='新しいテキスト'),
+            user=SimpleNamespace(id='user-1'), supabase=supabase,
+        ))
+
+    assert exc_info.value.status_code == 404
+
+
+def test_bulk_update_quotes_reports_per_id_results():
+    """一括更新は1回のRPCで適用し、フレーズごとの結果をリクエストの順に返す"""
+    import asyncio
+
+    from models.quote import QuoteBulkUpdate
+    from routes.quotes import bulk_update_quotes
+
+    quote_ids = list(range(1, 201))
+    supabase = _RecordingSupabase(result={'updated_ids': [id for id in quote_ids if id != 50]})
+
+    response = asyncio.run(bulk_update_quotes(
+        quote_update=QuoteBulkUpdate(quote_ids=quote_ids, is_public=True, add_tag_ids=[3], remove_tag_ids=[4]),
+        user=SimpleNamespace(id='user-1'), supabase=supabase,
+    ))
+
+    assert len(supabase.calls) == 1
+    fn, params = supabase.calls[0]
+    assert fn == 'bulk_update_quotes'
+    assert params['p_quote_ids'] == quote_ids
+    assert params['p_add_tag_ids'] == [3]
+    assert response.updated_count == 199
+    assert response.not_found_count == 1
+    assert [result.id for result in response.results] == quote_ids
+    assert response.results[49].status == 'not_found'
+
+
+def test_bulk_update_quotes_rejects_conflicting_patch():
+    """同じタグを追加と解除の両方に指定した場合は400"""
+    import asyncio
+
+    from fastapi import HTTPException
+    from models.quote import QuoteBulkUpdate
+    from routes.quotes import bulk_update_quotes
+
+    supabase = _RecordingSupabase()
+
+    with pytest.raises(HTTPException) as exc_info:
+        asyncio.run(bulk_update_quotes(
+            quote_update=QuoteBulkUpdate(quote_ids=[1], add_tag_ids=[3], remove_tag_ids=[3]),
+            user=SimpleNamespace(id='user-1'), supabase=supabase,
+        ))
+
+    assert exc_info.value.status_code == 400
+    assert supabase.calls == []
+
+
+def test_delete_quote_not_found_without_existence_check():
+    """削除は1回の条件付き更新で行い、対象がない場合は404"""
+    import asyncio
+
+    from fastapi import HTTPException
+    from routes.quotes import delete_quote
+
+    supabase = _TableSupabase(rows=[])
+
+    with pytest.raises(HTTPException) as exc_info:
+        asyncio.run(delete_quote(quote_id=7, user=SimpleNamespace(id='user-1'), supabase=supabase))
+
+    assert exc_info.value.status_code == 404
+    assert len(supabase.queries) == 1
+    assert [name for name, _ in supabase.queries[0][1]] == ['update', 'eq', 'eq', 'is_', 'select']
+
+
+def test_bulk_delete_quotes_uses_single_rpc():
+    """一括削除は1回のRPC（IDはリクエストボディ）で行い、削除されなかったIDを返す"""
+    import asyncio
+
+    from models.quote import QuoteBulkDelete
+    from routes.quotes import bulk_delete_quotes
+
+    supabase = _RecordingSupabase(result={'deleted_ids': [1, 3]})
+
+    response = asyncio.run(bulk_delete_quotes(
+        quote_delete=QuoteBulkDelete(quote_ids=[1, 2, 3, 2]),
+        user=SimpleNamespace(id='user-1'), supabase=supabase,
+    ))
+
+    assert supabase.calls == [('bulk_delete_quotes', {'p_quote_ids': [1, 2, 3]})]
+    assert response.deleted_count == 2
+    assert response.not_found_ids == [2]
+
+
+def test_public_quotes_fetches_only_sampled_page(monkeypatch):
+    """公開フレーズはDB関数でランダムに選ばれたページ分だけを取得する"""
+    import asyncio
+
+    from routes.quotes import get_public_quotes
+    from services.public_feed_cache import public_feed_cache
+
+    monkeypatch.setattr(public_feed_cache, 'ttl_seconds', 0)
+
+    book = {'id': 5, 'title': '習慣の本', 'author': '著者', 'cover_image_url': None}
+    supabase = _RecordingSupabase(result={'total': 1000, 'quotes': [_quote(2, 'BOOK', book=book), _quote(1, 'OTHER')]})
+
+    response = asyncio.run(get_public_quotes(limit=2, offset=0, seed=None, stream=False, supabase=supabase))
+
+    assert [fn for fn, _ in supabase.calls] == ['get_public_quotes_sample']
+    assert supabase.calls[0][1]['p_limit'] == 2
+    assert response.total == 1000
+    assert response.has_more is True
+    assert [item.id for item in response.items] == [2, 1]
+    assert response.items[0].source.book_title == '習慣の本'
+    assert [tag.name for tag in response.items[0].tags] == ['#習慣']
+
+
+def test_public_quotes_next_page_uses_returned_seed(monkeypatch):
+    """レスポンスのシードを指定すると同じ並び順の続きのページを取得する"""
+    import asyncio
+
+    from routes.quotes import get_public_quotes
+    from services.public_feed_cache import public_feed_cache
+
+    monkeypatch.setattr(public_feed_cache, 'ttl_seconds', 0)
+
+    supabase = _RecordingSupabase(result={'total': 10, 'quotes': [_quote(1, 'OTHER')]})
+
+    first = asyncio.run(get_public_quotes(limit=5, offset=0, seed=None, stream=False, supabase=supabase))
+    asyncio.run(get_public_quotes(limit=5, offset=5, seed=first.seed, stream=False, supabase=supabase))
+
+    (_, first_params), (_, next_params) = supabase.calls
+    assert first.seed is not None
+    assert next_params['p_seed'] == first_params['p_seed']
+    assert 0 <= next_params['p_seed'] < 1
+    assert next_params['p_offset'] == 5
+
+
+def test_public_quotes_rejects_too_large_offset():
+    """DB関数でINTがオーバーフローするオフセットは422"""
+    from fastapi.testclient import TestClient
+
+    from main import app
+
+    response = TestClient(app).get('/api/quotes/public', params={'offset': 2 ** 31 - 1})
+
+    assert response.status_code == 422
+
+
+def test_public_quotes_served_from_shared_cache(monkeypatch):
+    """シードの指定がない・キャッシュと同じシードのページは共有キャッシュから返す"""
+    import asyncio
+
+    from config import settings
+    from routes.quotes import get_public_quotes
+    from services.public_feed_cache import public_feed_cache
+
+    monkeypatch.setattr(settings, 'public_feed_pool_size', 4)
+    public_feed_cache.clear()
+    pool_quotes = [_quote(i, 'OTHER') for i in range(1, 5)]
+    supabase = _RecordingSupabase(result={'total': 100, 'quotes': pool_quotes})
+
+    try:
+        first = asyncio.run(get_public_quotes(limit=2, offset=0, seed=None, stream=False, supabase=supabase))
+        second = asyncio.run(get_public_quotes(limit=2, offset=2, seed=first.seed, stream=False, supabase=supabase))
+        # キャッシュの範囲外のページはDBから取得する（同じシード）
+        asyncio.run(get_public_quotes(limit=2, offset=4, seed=None, stream=False, supabase=supabase))
+    finally:
+        public_feed_cache.clear()
+
+    assert [item.id for item in first.items] == [1, 2]
+    assert [item.id for item in second.items] == [3, 4]
+    assert second.seed == first.seed
+    assert [params['p_limit'] for _, params in supabase.calls] == [4, 2]
+    assert supabase.calls[0][1]['p_seed'] == supabase.calls[1][1]['p_seed']
+
+
+def test_public_snapshot_served_from_file_with_cache_headers(monkeypatch, tmp_path):
+    """スナップショットはファイルをそのまま返し、ETagが一致する場合は304"""
+    from fastapi.testclient import TestClient
+
+    from config import settings
+    from main import app
+    from routes.quotes import render_public_feed_snapshot
+    from services.public_feed_snapshot import public_feed_snapshots
+
+    monkeypatch.setattr(settings, 'public_feed_snapshot_pages', 2)
+    monkeypatch.setattr(settings, 'public_feed_snapshot_page_size', 2)
+    monkeypatch.setattr(public_feed_snapshots, 'directory', tmp_path)
+    monkeypatch.setattr(public_feed_snapshots, 'pages', 2)
+    supabase = _RecordingSupabase(result={'total': 3, 'quotes': [_quote(i, 'OTHER') for i in range(1, 4)]})
+
+    public_feed_snapshots.refresh(lambda: render_public_feed_snapshot(supabase))
+
+    client = TestClient(app)
+    first = client.get('/api/quotes/public/snapshot/1')
+    cached = client.get('/api/quotes/public/snapshot/1', headers={'If-None-Match': first.headers['etag']})
+    missing = client.get('/api/quotes/public/snapshot/2')
+
+    # 全ページを1回のRPCで取得する
+    assert [params['p_limit'] for _, params in supabase.calls] == [4]
+    assert first.status_code == 200
+    assert [item['id'] for item in first.json()['items']] == [3]
+    assert first.json()['has_more'] is False
+    assert 's-maxage=' in first.headers['cache-control']
+    assert cached.status_code == 304
+    assert missing.status_code == 404
+
+
+def test_public_snapshot_seed_is_shared_within_interval(monkeypatch):
+    """スナップショットのシードは書き出し間隔の区切りごとに決まる（インスタンスによらない）"""
+    from config import settings
+    from routes.quotes import PUBLIC_SEED_RANGE, public_feed_snapshot_seed
+
+    monkeypatch.setattr(settings, 'public_feed_snapshot_interval_seconds', 300)
+
+    assert public_feed_snapshot_seed(600.0) == public_feed_snapshot_seed(899.9)
+    assert public_feed_snapshot_seed(600.0) != public_feed_snapshot_seed(900.0)
+    assert 0 <= public_feed_snapshot_seed(600.0) < PUBLIC_SEED_RANGE
+
+
+def test_import_quotes_commits_in_chunks(monkeypatch):
+    """インポートは chunk_size 件ごとに登録し、不正な行はエラーとして報告する"""
+    import json
+
+    from fastapi.testclient import TestClient
+
+    from auth import get_current_user, get_supabase_client
+    from config import settings
+    from main import app
+
+    supabase = _RecordingSupabase()
+    monkeypatch.setattr(settings, 'quote_import_chunk_size', 2)
+    app.dependency_overrides[get_current_user] = lambda: SimpleNamespace(id='user-1')
+    app.dependency_overrides[get_supabase_client] = lambda: supabase
+
+    lines = [
+        json.dumps({'text': f'フレーズ{i}', 'source_type': 'OTHER', 'activity_ids': [1]}, ensure_ascii=False)
+        for i in range(5)
+    ]
+    lines.insert(2, '{"text": ""}')
+    body = ('\n'.join(lines) + '\n').encode('utf-8')
+
+    try:
+        response = TestClient(app).post(
+            '/api/quotes/import',
+            content=iter([body[:7], body[7:]]),
+            headers={'Content-Type': 'application/x-ndjson'},
+        )
+    finally:
+        app.dependency_overrides.clear()
+
+    assert response.status_code == 200
+    result = response.json()
+    assert result['imported_count'] == 5
+    assert result['error_count'] == 1
+    assert result['errors'][0]['line'] == 3
+    assert [len(params['p_quotes']) for _, params in supabase.calls] == [2, 2, 1]
+
+
+def test_import_quotes_rejects_only_failing_rows(monkeypatch):
+    """DBが拒否したチャンクは分割して登録し直し、拒否された行のみをエラーとする"""
+    import json
+
+    from fastapi.testclient import TestClient
+    from postgrest.exceptions import APIError
+
+    from auth import get_current_user, get_supabase_client
+    from config import settings
+    from main import app
+
+    class _RejectingSupabase(_RecordingSupabase):
+        def rpc(self, fn, params):
+            if any(item.get('book_id') == 99 for item in params['p_quotes']):
+                self.calls.append((fn, params))
+                raise APIError({'code': '42501', 'message': '他ユーザーの書籍です'})
+            return super().rpc(fn, params)
+
+    supabase = _RejectingSupabase()
+    monkeypatch.setattr(settings, 'quote_import_chunk_size', 4)
+    app.dependency_overrides[get_current_user] = lambda: SimpleNamespace(id='user-1')
+    app.dependency_overrides[get_supabase_client] = lambda: supabase
+
+    lines = [
+        json.dumps({
+            'text': f'フレーズ{i}', 'source_type': 'BOOK', 'book_id': 99 if i == 2 else 1, 'activity_ids': [1],
+        }, ensure_ascii=False)
+        for i in range(4)
+    ]
+    body = ('\n'.join(lines) + '\n').encode('utf-8')
+
+    try:
+        response = TestClient(app).post(
+            '/api/quotes/import', content=body, headers={'Content-Type': 'application/x-ndjson'},
+        )
+    finally:
+        app.dependency_overrides.clear()
+
+    result = response.json()
+    assert result['imported_count'] == 3
+    assert result['error_count'] == 1
+    assert result['errors'][0]['line'] == 3
+    assert [len(params['p_quotes']) for _, params in supabase.calls] == [4, 2, 2, 1, 1]
+
+
+def test_create_quotes_replays_idempotent_request():
+    """同じIdempotency-Keyの再送は登録を行わずに最初のレスポンスを返す"""
+    from fastapi.testclient import TestClient
+
+    from auth import get_current_user, get_supabase_client
+    from main import app
+
+    supabase = _RecordingSupabase()
+    app.dependency_overrides[get_current_user] = lambda: SimpleNamespace(id='user-1')
+    app.dependency_overrides[get_supabase_client] = lambda: supabase
+    body = {'quotes': [{'text': 'フレーズ', 'activity_ids': [1]}], 'source_type': 'OTHER'}
+
+    try:
+        client = TestClient(app)
+        first = client.post('/api/quotes', json=body, headers={'Idempotency-Key': 'retry-test-1'})
+        second = client.post('/api/quotes', json=body, headers={'Idempotency-Key': 'retry-test-1'})
+        other = client.post(
+            '/api/quotes', json={**body, 'is_public': True}, headers={'Idempotency-Key': 'retry-test-1'}
+        )
+    finally:
+        app.dependency_overrides.clear()
+
+    assert first.status_code == 201
+    assert second.status_code == 201
+    assert second.json() == first.json()
+    assert second.headers['idempotent-replayed'] == 'true'
+    assert other.status_code == 422
+    assert len(supabase.calls) == 1
@@ -0,0 +1,76 @@
+"""
+SNSユーザーAPI（routes/sns_users.py）のテスト
+"""
+
+import asyncio
+from types import SimpleNamespace
+
+from routes.sns_users import get_sns_users
+
+
+class _FakeQuery:
+    def __init__(self, result):
+        self.result = result
+
+    def __getattr__(self, name):
+        return lambda *args, **kwargs: self
+
+    def execute(self):
+        return self.result
+
+
+class _FakeSupabase:
+    def __init__(self, sns_users, usage_counts):
+        self.sns_users = sns_users
+        self.usage_counts = usage_counts
+        self.tables = []
+        self.calls = []
+
+    def table(self, name):
+        self.tables.append(name)
+        return _FakeQuery(SimpleNamespace(data=self.sns_users, count=len(self.sns_users)))
+
+    def rpc(self, fn, params):
+        self.calls.append((fn, params))
+        return _FakeQuery(SimpleNamespace(data=self.usage_counts, count=None))
+
+
+def _sns_user(sns_user_id):
+    return {
+        'id': sns_user_id,
+        'user_id': 'user-1',
+        'platform': 'X',
+        'handle': f'user{sns_user_id}',
+        'display_name': f'ユーザー{sns_user_id}',
+        'created_at': '2026-01-01T00:00:00+00:00',
+        'updated_at': '2026-01-01T00:00:00+00:00',
+    }
+
+
+def test_get_sns_users_counts_usage_in_database():
+    """使用数はDB側の集計結果を使い、フレーズの行は取得しない"""
+    supabase = _FakeSupabase(
+        sns_users=[_sns_user(1), _sns_user(2)],
+        usage_counts=[{'sns_user_id': 1, 'usage_count': 3}],
+    )
+
+    result = asyncio.run(get_sns_users(
+        limit=50, offset=0, platform='', search='', user=SimpleNamespace(id='user-1'), supabase=supabase,
+    ))
+
+    assert supabase.tables == ['sns_users']
+    assert supabase.calls == [('count_quotes_by_sns_user', {'p_sns_user_ids': [1, 2]})]
+    assert [sns_user.usage_count for sns_user in result.sns_users] == [3, 0]
+    assert result.total == 2
+
+
+def test_get_sns_users_skips_count_when_empty():
+    """SNSユーザーがいない場合は集計を呼び出さない"""
+    supabase = _FakeSupabase(sns_users=[], usage_counts=[])
+
+    result = asyncio.run(get_sns_users(
+        limit=50, offset=0, platform='', search='', user=SimpleNamespace(id='user-1'), supabase=supabase,
+    ))
+
+    assert supabase.calls == []
+    assert result.sns_users == []
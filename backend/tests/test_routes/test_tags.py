@@ -0,0 +1,115 @@
+"""
+タグAPI（routes/tags.py）のテスト
+"""
+
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+from fastapi import HTTPException
+from postgrest.exceptions import APIError
+
+from models.tag import TagUpdate
+from routes.tags import delete_tag, get_tags, update_tag
+
+
+class _FakeQuery:
+    def __init__(self, supabase, table):
+        self.supabase = supabase
+        self.table = table
+
+    def __getattr__(self, name):
+        return lambda *args, **kwargs: self
+
+    def execute(self):
+        self.supabase.queried.append(self.table)
+        if self.supabase.error is not None:
+            raise self.supabase.error
+        return SimpleNamespace(data=self.supabase.rows, count=None)
+
+
+class _FakeSupabase:
+    def __init__(self, rows=None, error=None):
+        self.rows = rows or []
+        self.error = error
+        self.queried = []
+
+    def table(self, name):
+        return _FakeQuery(self, name)
+
+    def rpc(self, fn, params):
+        return _FakeQuery(self, fn)
+
+
+def test_update_tag_maps_unique_violation_to_conflict():
+    """同名のタグがある場合は一意制約違反を409として返す（事前の重複チェックは行わない）"""
+    supabase = _FakeSupabase(error=APIError({'code': '23505', 'message': 'duplicate key value'}))
+
+    with pytest.raises(HTTPException) as exc_info:
+        asyncio.run(update_tag(
+            tag_id=1, tag_data=TagUpdate(name='習慣'), user=SimpleNamespace(id='user-1'), supabase=supabase,
+        ))
+
+    assert exc_info.value.status_code == 409
+    assert supabase.queried == ['tags']
+
+
+def test_update_tag_not_found():
+    """更新された行がない場合は404"""
+    supabase = _FakeSupabase(rows=[])
+
+    with pytest.raises(HTTPException) as exc_info:
+        asyncio.run(update_tag(
+            tag_id=1, tag_data=TagUpdate(name='習慣'), user=SimpleNamespace(id='user-1'), supabase=supabase,
+        ))
+
+    assert exc_info.value.status_code == 404
+    assert supabase.queried == ['tags']
+
+
+def test_delete_tag_uses_single_rpc():
+    """タグの削除と関連付けの削除は1回のRPC（1トランザクション）で行う"""
+    supabase = _FakeSupabase(rows=True)
+
+    response = asyncio.run(delete_tag(tag_id=1, user=SimpleNamespace(id='user-1'), supabase=supabase))
+
+    assert response.success is True
+    assert supabase.queried == ['delete_tag']
+
+
+def test_delete_tag_not_found():
+    """対象のタグがない場合は404"""
+    supabase = _FakeSupabase(rows=False)
+
+    with pytest.raises(HTTPException) as exc_info:
+        asyncio.run(delete_tag(tag_id=1, user=SimpleNamespace(id='user-1'), supabase=supabase))
+
+    assert exc_info.value.status_code == 404
+    assert supabase.queried == ['delete_tag']
+
+
+def test_get_tags_aggregates_metadata_without_per_tag_queries():
+    """使用数と活動領域別分布はタグ数によらずまとめて取得して集計する"""
+    class _Supabase(_FakeSupabase):
+        def table(self, name):
+            self.rows = {
+                'tags': [
+                    {'id': 1, 'name': '#習慣', 'created_at': '2025-11-16T12:34:56+00:00'},
+                    {'id': 2, 'name': '#読書', 'created_at': '2025-11-16T12:34:56+00:00'},
+                ],
+                'quote_tags': [
+                    {'tag_id': 1, 'quotes': {'deleted_at': None, 'quote_activities': [{'activity_id': 3}]}},
+                    {'tag_id': 1, 'quotes': {'deleted_at': None, 'quote_activities': [{'activity_id': 3}, {'activity_id': 4}]}},
+                ],
+            }[name]
+            return super().table(name)
+
+    supabase = _Supabase()
+
+    response = asyncio.run(get_tags(
+        search=None, sort='usage_count', order='desc', user=SimpleNamespace(id='user-1'), supabase=supabase,
+    ))
+
+    assert supabase.queried == ['tags', 'quote_tags']
+    assert [(tag.id, tag.usage_count) for tag in response.tags] == [(1, 2), (2, 0)]
+    assert response.tags[0].activity_distribution == {3: 2, 4: 1}
@@ -0,0 +1,57 @@
+"""
+IN句の分割実行（chunked_query.py）のテスト
+"""
+
+import threading
+from types import SimpleNamespace
+
+from services.chunked_query import execute_in_chunks
+
+
+class _FakeQuery:
+    """IN句の値ごとに1行を返すクエリ（range指定時はその範囲のみ）"""
+
+    def __init__(self, values, log):
+        self.values = values
+        self.log = log
+        self.start = None
+        self.end = None
+
+    def range(self, start, end):
+        self.start, self.end = start, end
+        return self
+
+    def execute(self):
+        self.log.append((list(self.values), self.start, threading.get_ident()))
+        rows = [{'id': value} for value in self.values]
+        if self.start is not None:
+            rows = rows[self.start:self.end + 1]
+        return SimpleNamespace(data=rows)
+
+
+def test_splits_values_and_merges_results_in_order():
+    """値を分割して実行し、結果を分割の順に結合する（重複は除外）"""
+    log = []
+
+    rows = execute_in_chunks(lambda ids: _FakeQuery(ids, log), [1, 2, 3, 3, 4, 5], chunk_size=2, max_workers=2)
+
+    assert [row['id'] for row in rows] == [1, 2, 3, 4, 5]
+    assert sorted(values for values, _, _ in log) == [[1, 2], [3, 4], [5]]
+
+
+def test_pages_each_chunk_until_short_page():
+    """page_size を指定した場合は分割したクエリごとに全行を取得するまで繰り返す"""
+    log = []
+
+    rows = execute_in_chunks(lambda ids: _FakeQuery(ids, log), range(5), chunk_size=10, page_size=2)
+
+    assert [row['id'] for row in rows] == [0, 1, 2, 3, 4]
+    assert [start for _, start, _ in log] == [0, 2, 4]
+
+
+def test_empty_values_run_no_query():
+    """値がない場合はクエリを実行しない"""
+    log = []
+
+    assert execute_in_chunks(lambda ids: _FakeQuery(ids, log), []) == []
+    assert log == []
@@ -0,0 +1,86 @@
+"""
+条件付きGET（data_version.py）のテスト
+"""
+
+from types import SimpleNamespace
+
+import pytest
+from fastapi.testclient import TestClient
+
+from auth import get_current_user, get_supabase_client
+from main import app
+from services.data_version import etag_matches
+
+
+class FakeQuery:
+    def __init__(self, supabase, table):
+        self.supabase = supabase
+        self.table = table
+
+    def __getattr__(self, name):
+        return lambda *args, **kwargs: self
+
+    def execute(self):
+        self.supabase.queried.append(self.table)
+        if self.table == 'user_data_versions':
+            return SimpleNamespace(data=[{'version': self.supabase.version}], count=None)
+        return SimpleNamespace(data=[], count=0)
+
+
+class FakeSupabase:
+    def __init__(self, version):
+        self.version = version
+        self.queried = []
+
+    def table(self, name):
+        return FakeQuery(self, name)
+
+
+@pytest.fixture
+def fake_supabase():
+    supabase = FakeSupabase(version=3)
+    app.dependency_overrides[get_current_user] = lambda: SimpleNamespace(id='user-1')
+    app.dependency_overrides[get_supabase_client] = lambda: supabase
+    yield supabase
+    app.dependency_overrides.clear()
+
+
+def test_etag_matches():
+    """If-None-Matchは弱い比較・複数指定・* に対応する"""
+    etag = 'W/"abc"'
+
+    assert etag_matches('W/"abc"', etag)
+    assert etag_matches('"abc"', etag)
+    assert etag_matches('"xyz", W/"abc"', etag)
+    assert etag_matches('*', etag)
+    assert not etag_matches('W/"xyz"', etag)
+    assert not etag_matches(None, etag)
+
+
+def test_not_modified_skips_listing_query(fake_supabase):
+    """ETagが一致する場合は一覧を取得せずに304を返す"""
+    client = TestClient(app)
+
+    first = client.get('/api/books')
+    etag = first.headers['etag']
+    assert first.status_code == 200
+    assert 'books' in fake_supabase.queried
+
+    fake_supabase.queried.clear()
+    second = client.get('/api/books', headers={'If-None-Match': etag})
+    assert second.status_code == 304
+    assert second.headers['etag'] == etag
+    assert fake_supabase.queried == ['user_data_versions']
+
+
+def test_etag_changes_with_version_and_query(fake_supabase):
+    """データバージョンやクエリが変わるとETagも変わる"""
+    client = TestClient(app)
+
+    etag = client.get('/api/books').headers['etag']
+    assert client.get('/api/books?search=abc').headers['etag'] != etag
+
+    fake_supabase.version = 4
+    response = client.get('/api/books', headers={'If-None-Match': etag})
+    assert response.status_code == 200
+    assert response.headers['etag'] != etag
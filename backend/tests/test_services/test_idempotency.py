@@ -0,0 +1,84 @@
+"""
+冪等キーストア（idempotency.py）のテスト
+"""
+
+import pytest
+
+from services.idempotency import (
+    IdempotencyKeyInUse,
+    IdempotencyKeyMismatch,
+    IdempotencyStore,
+    MemoryIdempotencyStore,
+    SqliteIdempotencyStore,
+)
+
+
+@pytest.fixture(params=['memory', 'sqlite'])
+def store(request, tmp_path):
+    if request.param == 'memory':
+        return MemoryIdempotencyStore(ttl_seconds=60, max_entries=100)
+    return SqliteIdempotencyStore(ttl_seconds=60, path=str(tmp_path / 'idempotency.sqlite3'))
+
+
+def test_replay_returns_stored_response(store):
+    """処理が完了したキーは保存したレスポンスを返す"""
+    assert store.begin('user-1', 'key', 'fp') is None
+    store.complete('user-1', 'key', 201, {'created_count': 1})
+
+    stored = store.begin('user-1', 'key', 'fp')
+
+    assert stored.status_code == 201
+    assert stored.body == {'created_count': 1}
+    assert store.stats()['replays'] == 1
+
+
+def test_in_flight_key_is_rejected(store):
+    """処理中のキーは IdempotencyKeyInUse"""
+    store.begin('user-1', 'key', 'fp')
+
+    with pytest.raises(IdempotencyKeyInUse):
+        store.begin('user-1', 'key', 'fp')
+
+
+def test_different_request_with_same_key_is_rejected(store):
+    """同じキーで内容が異なるリクエストは IdempotencyKeyMismatch"""
+    store.begin('user-1', 'key', 'fp')
+    store.complete('user-1', 'key', 201, {})
+
+    with pytest.raises(IdempotencyKeyMismatch):
+        store.begin('user-1', 'key', 'other')
+
+
+def test_released_key_can_be_retried(store):
+    """失敗して解放したキーは再実行できる"""
+    store.begin('user-1', 'key', 'fp')
+    store.release('user-1', 'key')
+
+    assert store.begin('user-1', 'key', 'fp') is None
+
+
+def test_keys_are_scoped_per_user(store):
+    """キーはユーザーごとに独立"""
+    store.begin('user-1', 'key', 'fp')
+    store.complete('user-1', 'key', 201, {})
+
+    assert store.begin('user-2', 'key', 'fp') is None
+
+
+def test_expired_response_is_not_replayed():
+    """保存期間を過ぎたレスポンスは返さない"""
+    store = MemoryIdempotencyStore(ttl_seconds=0, max_entries=100)
+    store.begin('user-1', 'key', 'fp')
+    store.complete('user-1', 'key', 201, {})
+
+    assert store.begin('user-1', 'key', 'fp') is None
+
+
+def test_incomplete_store_cannot_be_created():
+    """begin / complete / release を実装していない保存先は生成時にエラー"""
+    class IncompleteStore(IdempotencyStore):
+        def begin(self, user_id, key, fingerprint):
+            return None
+
+    with pytest.raises(TypeError):
+        IncompleteStore(ttl_seconds=60)
@@ -0,0 +1,19 @@
+"""
+関連付けの変更行数の集計（junction_stats.py）のテスト
+"""
+
+from services.junction_stats import JunctionChangeStats
+
+
+def test_record_accumulates_changed_rows():
+    """追加・削除行数を累積し、差分がない更新は書き込みなしとして数える"""
+    stats = JunctionChangeStats()
+
+    stats.record({'activities_added': 1, 'activities_removed': 0, 'tags_added': 2, 'tags_removed': 1})
+    stats.record({'activities_added': 0, 'activities_removed': 0, 'tags_added': 0, 'tags_removed': 0})
+
+    result = stats.stats()
+    assert result['updates'] == 2
+    assert result['unchanged_updates'] == 1
+    assert result['rows_written'] == 4
+    assert result['tags_added'] == 2
@@ -0,0 +1,88 @@
+"""
+公開フレーズキャッシュ（public_feed_cache.py）のテスト
+"""
+
+import threading
+import time
+
+from services.public_feed_cache import PublicFeedCache, PublicFeedPool
+
+
+def _loader(calls, seed=1, delay=0.0):
+    def load():
+        calls.append(seed)
+        time.sleep(delay)
+        return PublicFeedPool(seed=seed, total=1, quotes=[{'id': 1}], complete=True)
+    return load
+
+
+def test_returns_cached_pool_within_ttl():
+    """TTL内は再取得せずにキャッシュを返す"""
+    cache = PublicFeedCache(ttl_seconds=60, max_stale_seconds=600)
+    calls = []
+
+    cache.get(_loader(calls))
+    pool = cache.get(_loader(calls))
+
+    assert pool.seed == 1
+    assert calls == [1]
+    assert cache.stats()['hits'] == 1
+    assert cache.stats()['misses'] == 1
+
+
+def test_get_nowait_does_not_load_on_miss():
+    """get_nowait はキャッシュがない場合に取得せずNoneを返す（イベントループ上でブロックしない）"""
+    cache = PublicFeedCache(ttl_seconds=60, max_stale_seconds=600)
+    calls = []
+
+    assert cache.get_nowait(_loader(calls)) is None
+    assert calls == []
+
+    cache.get(_loader(calls))
+    assert cache.get_nowait(_loader(calls)).seed == 1
+    assert calls == [1]
+
+
+def test_stale_pool_is_returned_while_refreshing():
+    """TTLを過ぎたキャッシュは古い内容を返しながらバックグラウンドで再取得する"""
+    cache = PublicFeedCache(ttl_seconds=60, max_stale_seconds=600)
+    calls = []
+    cache.get(_loader(calls, seed=1))
+    cache._pool.fetched_at -= 120
+
+    pool = cache.get(_loader(calls, seed=2))
+    cache._refresh_thread.join()
+
+    assert pool.seed == 1
+    assert cache.seed == 2
+    assert calls == [1, 2]
+    assert cache.stats()['stale_hits'] == 1
+
+
+def test_concurrent_misses_are_coalesced():
+    """キャッシュがない場合の同時リクエストは1回の取得にまとめる"""
+    cache = PublicFeedCache(ttl_seconds=60, max_stale_seconds=600)
+    calls = []
+    results = []
+
+    threads = [
+        threading.Thread(target=lambda: results.append(cache.get(_loader(calls, delay=0.05))))
+        for _ in range(5)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert calls == [1]
+    assert len(results) == 5
+    assert cache.stats()['coalesced'] + cache.stats()['hits'] == 4
+
+
+def test_disabled_cache_returns_none():
+    """TTLが0の場合は無効"""
+    cache = PublicFeedCache(ttl_seconds=0, max_stale_seconds=600)
+    calls = []
+
+    assert cache.get(_loader(calls)) is None
+    assert calls == []
@@ -0,0 +1,55 @@
+"""
+公開フレーズのスナップショット（public_feed_snapshot.py）のテスト
+"""
+
+import os
+
+import pytest
+
+from services.public_feed_snapshot import PublicFeedSnapshots
+
+
+def test_write_replaces_all_pages(tmp_path):
+    """書き出しは全ページを置き換え、一時ファイルを残さない"""
+    snapshots = PublicFeedSnapshots(directory=str(tmp_path), pages=2)
+
+    snapshots.write([b'{"page":0}', b'{"page":1}'])
+    snapshots.write([b'{"page":0,"v":2}', b'{"page":1,"v":2}'])
+
+    assert snapshots.path_for(0).read_bytes() == b'{"page":0,"v":2}'
+    assert snapshots.path_for(2) is None
+    assert sorted(path.name for path in tmp_path.iterdir()) == ['public-0.json', 'public-1.json']
+
+
+def test_refresh_counts_errors_and_keeps_previous_files(tmp_path):
+    """生成に失敗した場合は前回のファイルをそのまま残す"""
+    snapshots = PublicFeedSnapshots(directory=str(tmp_path), pages=1)
+    snapshots.refresh(lambda: [b'{"page":0}'])
+
+    def fail():
+        raise RuntimeError('db unavailable')
+
+    with pytest.raises(RuntimeError):
+        snapshots.refresh(fail)
+
+    assert snapshots.path_for(0).read_bytes() == b'{"page":0}'
+    assert snapshots.stats()['writes'] == 1
+    assert snapshots.stats()['write_errors'] == 1
+
+
+def test_etag_depends_only_on_content(tmp_path):
+    """ETagは内容から生成する（別のインスタンスが同じ内容を書き出した場合も同じ値）"""
+    first = PublicFeedSnapshots(directory=str(tmp_path / 'a'), pages=1)
+    second = PublicFeedSnapshots(directory=str(tmp_path / 'b'), pages=1)
+    first.write([b'{"page":0}'])
+    second.write([b'{"page":0}'])
+    os.utime(second.path_for(0), ns=(0, 0))
+
+    def etag(snapshots):
+        path = snapshots.path_for(0)
+        return snapshots.etag_for(path, os.stat(path))
+
+    assert etag(first) == etag(second)
+
+    second.write([b'{"page":0,"v":2}'])
+    assert etag(first) != etag(second)
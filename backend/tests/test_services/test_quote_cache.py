@@ -0,0 +1,45 @@
+"""
+フレーズ一覧キャッシュ（quote_cache.py）のテスト
+"""
+
+from services.quote_cache import UserQuoteCache
+
+
+def test_get_returns_cached_value_per_user():
+    """ユーザーとキーの組み合わせごとに値が保持される"""
+    cache = UserQuoteCache(max_bytes=10_000, ttl_seconds=60)
+
+    cache.set("user-a", "page-1", {"total": 1})
+
+    assert cache.get("user-a", "page-1") == {"total": 1}
+    assert cache.get("user-b", "page-1") is None
+
+
+def test_invalidate_user_removes_only_that_users_entries():
+    """更新時の破棄は対象ユーザーのエントリのみ"""
+    cache = UserQuoteCache(max_bytes=10_000, ttl_seconds=60)
+    cache.set("user-a", "page-1", {"total": 1})
+    cache.set("user-a", "page-2", {"total": 1})
+    cache.set("user-b", "page-1", {"total": 2})
+
+    cache.invalidate_user("user-a")
+
+    assert cache.get("user-a", "page-1") is None
+    assert cache.get("user-a", "page-2") is None
+    assert cache.get("user-b", "page-1") == {"total": 2}
+
+
+def test_evicts_least_recently_used_when_over_max_bytes():
+    """合計サイズが上限を超えると最も古く使われたエントリから破棄される"""
+    value = {"text": "x" * 100}
+    cache = UserQuoteCache(max_bytes=250, ttl_seconds=60)
+
+    cache.set("user-a", "page-1", value)
+    cache.set("user-a", "page-2", value)
+    cache.get("user-a", "page-1")
+    cache.set("user-a", "page-3", value)
+
+    assert cache.get("user-a", "page-2") is None
+    assert cache.get("user-a", "page-1") == value
+    assert cache.stats()["evictions"] == 1
+    assert cache.stats()["bytes"] <= 250
@@ -0,0 +1,60 @@
+"""
+フレーズインポート（quote_import.py）のテスト
+"""
+
+import asyncio
+
+import pytest
+
+from services.quote_import import iter_ndjson_lines, parse_import_line
+
+
+async def _chunks(*chunks: bytes):
+    for chunk in chunks:
+        yield chunk
+
+
+def collect(*chunks: bytes, max_line_bytes: int = 1024) -> list:
+    async def run():
+        return [item async for item in iter_ndjson_lines(_chunks(*chunks), max_line_bytes)]
+    return asyncio.run(run())
+
+
+def test_lines_split_across_chunks():
+    """チャンクの境界をまたぐ行も1行として取り出せる"""
+    assert collect(b'{"a"', b':1}\n{"b":2}\n{"c"', b':3}') == [
+        (1, b'{"a":1}'),
+        (2, b'{"b":2}'),
+        (3, b'{"c":3}'),
+    ]
+
+
+def test_blank_lines_are_skipped_but_counted():
+    """空行は返さないが行番号には含める"""
+    assert collect(b'{"a":1}\n\n  \n{"b":2}\n') == [(1, b'{"a":1}'), (4, b'{"b":2}')]
+
+
+def test_too_long_line_is_reported():
+    """最大サイズを超える行は None を返し、次の行から読み込みを再開する"""
+    assert collect(b'x' * 10, b'x' * 10 + b'\n{"b":2}\n', max_line_bytes=15) == [
+        (1, None),
+        (2, b'{"b":2}'),
+    ]
+
+
+def test_parse_import_line():
+    item = parse_import_line('{"text": "継続は力なり", "source_type": "BOOK", "book_id": 1, "activity_ids": [1]}'.encode())
+
+    assert item.text == "継続は力なり"
+    assert item.book_id == 1
+    assert item.tag_ids == []
+
+
+@pytest.mark.parametrize("line, message", [
+    (b'{"text": "a", "source_type": "BOOK", "activity_ids": [1]}', "book_id"),
+    (b'{"text": "a", "source_type": "OTHER", "activity_ids": []}', "activity_ids"),
+    (b'{"text": "a"', "line"),
+])
+def test_parse_import_line_rejects_invalid_lines(line, message):
+    with pytest.raises(ValueError, match=message):
+        parse_import_line(line)
@@ -0,0 +1,65 @@
+"""
+フレーズ検索インデックス（search_index.py）のテスト
+"""
+
+from services.search_index import NgramIndex
+
+
+def build_index():
+    index = NgramIndex()
+    index.add(1, ["継続は力なり", "習慣の力", "山田太郎"])
+    index.add(2, ["小さな習慣が人生を変える", None, None, "taro_x", "Taro Yamada"])
+    index.add(3, ["Stay hungry, stay foolish"])
+    return index
+
+
+def test_search_japanese_substring():
+    """日本語の部分一致で検索できる（フィールドは問わない）"""
+    index = build_index()
+
+    assert index.search("習慣") == {1, 2}
+    assert index.search("力なり") == {1}
+    assert index.search("山田") == {1}
+
+
+def test_search_single_character():
+    """1文字の検索語でも検索できる"""
+    index = build_index()
+
+    assert index.search("力") == {1}
+
+
+def test_search_multiple_terms_is_and():
+    """スペース区切りの検索語はAND条件"""
+    index = build_index()
+
+    assert index.search("習慣 人生") == {2}
+    assert index.search("習慣　継続") == {1}  # 全角スペース
+    assert index.search("習慣 存在しない") == set()
+
+
+def test_search_is_case_and_width_insensitive():
+    """大文字・小文字、全角・半角の違いを無視する"""
+    index = build_index()
+
+    assert index.search("STAY") == {3}
+    assert index.search("ＴＡＲＯ") == {2}
+
+
+def test_search_does_not_match_across_fields():
+    """フィールドをまたいだ文字列には一致しない"""
+    index = build_index()
+
+    assert index.search("の力山田") == set()
+
+
+def test_remove_and_readd():
+    """削除・再登録がインデックスに反映される"""
+    index = build_index()
+
+    index.remove(1)
+    assert index.search("継続") == set()
+
+    index.add(2, ["継続の習慣"])
+    assert index.search("継続") == {2}
+    assert index.search("人生") == set()
@@ -0,0 +1,119 @@
+"""
+フレーズ検索のベンチマーク
+
+旧実装（全フレーズに対するPythonの部分一致スキャン）と
+N-gramインデックス（services/search_index.py）の検索時間を比較する
+
+使い方:
+    cd backend
+    uv run python ../scripts/backend/benchmark_search.py
+"""
+
+import random
+import statistics
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[2] / 'backend'))
+
+from services.search_index import NgramIndex  # noqa: E402
+
+SIZES = [1_000, 10_000, 100_000]
+QUERIES = ['習慣', '継続は力', '人生 選択', 'stay', '山田', '存在しない言葉']
+REPEAT = 20
+
+WORDS = [
+    '習慣', '継続', '人生', '選択', '仕事', '学び', '時間', '言葉', '読書', '未来',
+    '失敗', '成功', '挑戦', '変化', '目的', '行動', '思考', '感情', '関係', '自分',
+]
+PARTICLES = ['は', 'が', 'を', 'に', 'の', 'で', 'と', 'も']
+AUTHORS = ['山田太郎', '佐藤花子', '鈴木一郎', '田中美咲', 'John Smith']
+LATIN = ['stay hungry', 'think different', 'move fast', 'keep going']
+
+
+def make_quotes(n: int, seed: int = 42) -> list[dict]:
+    """検索対象と同じ形のダミーフレーズを生成"""
+    rng = random.Random(seed)
+    quotes = []
+    for i in range(n):
+        text = ''.join(
+            rng.choice(WORDS) + rng.choice(PARTICLES)
+            for _ in range(rng.randint(4, 12))
+        )
+        if rng.random() < 0.1:
+            text += ' ' + rng.choice(LATIN)
+
+        quote = {'id': i, 'text': text, 'books': None, 'sns_users': None}
+        if rng.random() < 0.6:
+            quote['books'] = {'title': rng.choice(WORDS) + 'の本', 'author': rng.choice(AUTHORS)}
+        elif rng.random() < 0.5:
+            quote['sns_users'] = {'handle': f'user{i % 500}', 'display_name': rng.choice(AUTHORS)}
+        quotes.append(quote)
+    return quotes
+
+
+def linear_scan(quotes: list[dict], search: str) -> set[int]:
+    """旧実装と同じ部分一致スキャン（スペース区切りはAND条件として扱う）"""
+    terms = search.lower().split()
+    result = set()
+    for quote in quotes:
+        fields = [quote['text']]
+        if quote['books']:
+            fields += [quote['books']['title'], quote['books']['author']]
+        if quote['sns_users']:
+            fields += [quote['sns_users']['handle'], quote['sns_users']['display_name']]
+        lowered = [field.lower() for field in fields if field]
+        if all(any(term in field for field in lowered) for term in terms):
+            result.add(quote['id'])
+    return result
+
+
+def build_index(quotes: list[dict]) -> NgramIndex:
+    index = NgramIndex()
+    for quote in quotes:
+        book = quote['books'] or {}
+        sns_user = quote['sns_users'] or {}
+        index.add(quote['id'], [
+            quote['text'], book.get('title'), book.get('author'),
+            sns_user.get('handle'), sns_user.get('display_name'),
+        ])
+    return index
+
+
+def measure(fn, *args) -> float:
+    """中央値（ミリ秒）"""
+    timings = []
+    for _ in range(REPEAT):
+        start = time.perf_counter()
+        fn(*args)
+        timings.append((time.perf_counter() - start) * 1000)
+    return statistics.median(timings)
+
+
+def main():
+    print(f"{'件数':>8} | {'検索語':<14} | {'一致':>7} | {'線形スキャン(ms)':>16} | {'インデックス(ms)':>16} | {'倍率':>7}")
+    print('-' * 86)
+    for size in SIZES:
+        quotes = make_quotes(size)
+
+        start = time.perf_counter()
+        index = build_index(quotes)
+        build_ms = (time.perf_counter() - start) * 1000
+
+        for query in QUERIES:
+            expected = linear_scan(quotes, query)
+            assert index.search(query) == expected, query
+
+            scan_ms = measure(linear_scan, quotes, query)
+            index_ms = measure(index.search, query)
+            print(
+                f"{size:>8} | {query:<14} | {len(expected):>7} | "
+                f"{scan_ms:>16.3f} | {index_ms:>16.3f} | {scan_ms / max(index_ms, 1e-6):>6.1f}x"
+            )
+        print(f"{size:>8} | インデックス構築: {build_ms:.1f} ms / 推定サイズ: {index.estimated_bytes / 1024 / 1024:.1f} MiB")
+        print('-' * 86)
+
+
+if __name__ == '__main__':
+    main()
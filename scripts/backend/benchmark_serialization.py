@@ -0,0 +1,174 @@
+"""
+フレーズ一覧レスポンスのシリアライズのベンチマーク
+
+GET /api/quotes/grouped と GET /api/quotes/public のルート関数を呼び出し、
+FastAPIと同じ手順（response_modelでの検証 + JSON化）でレスポンスを生成するまでの
+フレーズ1件あたりのCPU時間を fast_serialization の有無で比較する
+（DBアクセスはダミーのクライアントで置き換え）
+
+使い方:
+    cd backend
+    uv run python ../scripts/backend/benchmark_serialization.py
+"""
+
+import asyncio
+import random
+import statistics
+import sys
+import time
+from pathlib import Path
+from types import SimpleNamespace
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[2] / 'backend'))
+
+from fastapi import Response  # noqa: E402
+from fastapi.routing import serialize_response  # noqa: E402
+from fastapi.utils import create_model_field  # noqa: E402
+
+from config import settings  # noqa: E402
+from models.quote import PublicQuotesResponse, QuotesGroupedResponse  # noqa: E402
+from routes.quotes import get_public_quotes, get_quotes_grouped  # noqa: E402
+from services.public_feed_cache import public_feed_cache  # noqa: E402
+from services.quote_cache import quote_cache  # noqa: E402
+
+SIZES = [100, 1_000, 10_000]
+REPEAT = 20
+
+ACTIVITIES = [{'id': i, 'name': f'活動{i}', 'icon': '📚'} for i in range(1, 11)]
+TAGS = [{'id': i, 'name': f'#タグ{i}'} for i in range(1, 31)]
+BOOKS = [
+    {'id': i, 'title': f'書籍タイトル{i}', 'author': f'著者{i}', 'cover_image_url': None}
+    for i in range(1, 51)
+]
+SNS_USERS = [
+    {'id': i, 'platform': 'X', 'handle': f'user{i}', 'display_name': f'ユーザー{i}'}
+    for i in range(1, 21)
+]
+
+
+def make_quotes(n: int, seed: int = 42) -> list[dict]:
+    """get_quotes_grouped_page が返すのと同じ形のダミーフレーズを生成"""
+    rng = random.Random(seed)
+    quotes = []
+    for i in range(n):
+        source_type = rng.choices(['BOOK', 'SNS', 'OTHER'], weights=[6, 3, 1])[0]
+        book = rng.choice(BOOKS) if source_type == 'BOOK' else None
+        sns_user = rng.choice(SNS_USERS) if source_type == 'SNS' else None
+        quotes.append({
+            'id': i + 1,
+            'text': '継続は力なり。小さな習慣が人生を変える。' * rng.randint(1, 4),
+            'source_type': source_type,
+            'book_id': book['id'] if book else None,
+            'sns_user_id': sns_user['id'] if sns_user else None,
+            'page_number': rng.randint(1, 300) if book else None,
+            'source_meta': {'source': '講演', 'note': None} if source_type == 'OTHER' else None,
+            'is_public': True,
+            'reference_link': None,
+            'created_at': f'2025-11-{i % 28 + 1:02d}T12:34:56.{i % 1000000:06d}+00:00',
+            'books': book,
+            'sns_users': sns_user,
+            'quote_activities': [{'activities': a} for a in rng.sample(ACTIVITIES, 2)],
+            'quote_tags': [{'tags': t} for t in rng.sample(TAGS, 3)],
+        })
+    return quotes
+
+
+class FakeQuery:
+    """ルーターが使うクエリビルダーのメソッドだけを持つダミー"""
+
+    def __init__(self, data):
+        self.data = data
+
+    def __getattr__(self, name):
+        return lambda *args, **kwargs: self
+
+    def execute(self):
+        return SimpleNamespace(data=self.data, count=None)
+
+
+class FakeSupabase:
+    def __init__(self, quotes: list[dict]):
+        self.quotes = quotes
+
+    def rpc(self, fn, params):
+        quotes = self.quotes[:params['p_limit']]
+        return FakeQuery({'total': len(self.quotes), 'page_end': len(quotes), 'quotes': quotes})
+
+    def table(self, name):
+        if name == 'quotes':
+            columns = ('id', 'text', 'source_type', 'book_id', 'sns_user_id', 'page_number',
+                       'source_meta', 'is_public', 'reference_link', 'created_at')
+            return FakeQuery([{key: q[key] for key in columns} for q in self.quotes])
+        if name == 'books':
+            return FakeQuery(BOOKS)
+        if name == 'sns_users':
+            return FakeQuery(SNS_USERS)
+        if name == 'quote_activities':
+            return FakeQuery([
+                {'quote_id': q['id'], **qa} for q in self.quotes for qa in q['quote_activities']
+            ])
+        if name == 'quote_tags':
+            return FakeQuery([
+                {'quote_id': q['id'], **qt} for q in self.quotes for qt in q['quote_tags']
+            ])
+        raise KeyError(name)
+
+
+async def render(call, response_model) -> bytes:
+    """ルート関数を呼び出し、FastAPIと同じ手順でJSONのバイト列を生成"""
+    result = await call()
+    if isinstance(result, Response):
+        return result.body
+    field = create_model_field('Response', response_model, mode='serialization')
+    return await serialize_response(field=field, response_content=result, dump_json=True)
+
+
+def measure(call, response_model) -> tuple[float, bytes]:
+    """CPU時間の中央値（ミリ秒）"""
+    timings = []
+    body = b''
+    for _ in range(REPEAT):
+        start = time.process_time()
+        body = asyncio.run(render(call, response_model))
+        timings.append((time.process_time() - start) * 1000)
+    return statistics.median(timings), body
+
+
+def main():
+    # 公開フレーズはDBからの取得・JSON化を計測するため共有キャッシュを無効にする
+    public_feed_cache.ttl_seconds = 0
+    user = SimpleNamespace(id='benchmark-user')
+    print(f"{'エンドポイント':<10} | {'件数':>6} | {'従来(ms)':>10} | {'高速(ms)':>10} | "
+          f"{'従来(µs/件)':>11} | {'高速(µs/件)':>11} | {'倍率':>6}")
+    print('-' * 86)
+    for name, response_model in [('grouped', QuotesGroupedResponse), ('public', PublicQuotesResponse)]:
+        for size in SIZES:
+            supabase = FakeSupabase(make_quotes(size))
+            if name == 'grouped':
+                def call():
+                    return get_quotes_grouped(
+                        limit=size, offset=0, search=None, source_type=None, activity_ids=None,
+                        tag_ids=None, pagination='offset', cursor=None, stream=False, user=user, supabase=supabase,
+                    )
+            else:
+                def call():
+                    return get_public_quotes(limit=size, offset=0, seed=None, stream=False, supabase=supabase)
+
+            results = {}
+            for fast in (False, True):
+                settings.fast_serialization = fast
+                quote_cache.clear()
+                results[fast] = measure(call, response_model)
+            settings.fast_serialization = False
+
+            slow_ms, fast_ms = results[False][0], results[True][0]
+            print(
+                f"{name:<10} | {size:>6} | {slow_ms:>10.2f} | {fast_ms:>10.2f} | "
+                f"{slow_ms * 1000 / size:>11.1f} | {fast_ms * 1000 / size:>11.1f} | "
+                f"{slow_ms / max(fast_ms, 1e-6):>5.1f}x"
+            )
+        print('-' * 86)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,143 @@
+"""
+フレーズ一覧のストリーミングレスポンスのベンチマーク
+
+GET /api/quotes/grouped と GET /api/quotes/public について、
+通常のレスポンスと stream=true の場合の最初のバイトまでの時間（TTFB）と
+レスポンス生成中のPythonのピークメモリ（tracemalloc）を比較する
+（DBアクセスはダミーのクライアントで置き換え）
+
+使い方:
+    cd backend
+    uv run python ../scripts/backend/benchmark_streaming.py
+"""
+
+import asyncio
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+from types import SimpleNamespace
+
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from benchmark_serialization import BOOKS, SNS_USERS, make_quotes, render  # noqa: E402
+from fastapi.responses import StreamingResponse  # noqa: E402
+
+from models.quote import PublicQuotesResponse, QuotesGroupedResponse  # noqa: E402
+from routes.quotes import get_public_quotes, get_quotes_grouped  # noqa: E402
+from services.public_feed_cache import public_feed_cache  # noqa: E402
+from services.quote_cache import quote_cache  # noqa: E402
+
+SIZES = [1_000, 10_000, 50_000]
+
+
+class FakeQuery:
+    """in_ での絞り込みだけを解釈するクエリビルダーのダミー"""
+
+    def __init__(self, rows: list[dict], columns=None):
+        self.rows = rows
+        self.columns = columns
+
+    def select(self, columns, **kwargs):
+        return FakeQuery(self.rows, None if columns == '*' else [c.strip() for c in columns.split(',')])
+
+    def in_(self, column, values):
+        values = set(values)
+        return FakeQuery([row for row in self.rows if row[column] in values], self.columns)
+
+    def __getattr__(self, name):
+        return lambda *args, **kwargs: self
+
+    def execute(self):
+        rows = self.rows
+        if self.columns == ['id']:
+            rows = [{'id': row['id']} for row in rows]
+        return SimpleNamespace(data=rows, count=None)
+
+
+class FakeSupabase:
+    def __init__(self, quotes: list[dict]):
+        self.quotes = quotes
+        columns = ('id', 'text', 'source_type', 'book_id', 'sns_user_id', 'page_number',
+                   'source_meta', 'is_public', 'reference_link', 'created_at')
+        self.tables = {
+            'quotes': [{key: q[key] for key in columns} for q in quotes],
+            'books': BOOKS,
+            'sns_users': SNS_USERS,
+            'quote_activities': [{'quote_id': q['id'], **qa} for q in quotes for qa in q['quote_activities']],
+            'quote_tags': [{'quote_id': q['id'], **qt} for q in quotes for qt in q['quote_tags']],
+        }
+
+    def rpc(self, fn, params):
+        quotes = self.quotes[:params['p_limit']]
+        page = {'total': len(self.quotes), 'page_end': len(quotes), 'quotes': quotes}
+        return SimpleNamespace(execute=lambda: SimpleNamespace(data=page))
+
+    def table(self, name):
+        # 通常のレスポンスでは行が書き換えられるため、呼び出しごとにコピーを返す
+        return FakeQuery([dict(row) for row in self.tables[name]])
+
+
+async def first_byte_and_total(call, response_model) -> tuple[float, float, int]:
+    """(TTFB[ms], 全体[ms], バイト数) を返す"""
+    start = time.perf_counter()
+    result = await call()
+    if not isinstance(result, StreamingResponse):
+        body = await render(lambda: _returning(result), response_model)
+        elapsed = (time.perf_counter() - start) * 1000
+        return elapsed, elapsed, len(body)
+
+    ttfb = None
+    size = 0
+    async for chunk in result.body_iterator:
+        if ttfb is None:
+            ttfb = (time.perf_counter() - start) * 1000
+        size += len(chunk.encode('utf-8'))
+    return ttfb, (time.perf_counter() - start) * 1000, size
+
+
+async def _returning(value):
+    return value
+
+
+def run(call, response_model) -> tuple[float, float, float]:
+    quote_cache.clear()
+    tracemalloc.start()
+    ttfb, total, _ = asyncio.run(first_byte_and_total(call, response_model))
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return ttfb, total, peak / 1024 / 1024
+
+
+def main():
+    # 公開フレーズはDBからの取得・JSON化を計測するため共有キャッシュを無効にする
+    public_feed_cache.ttl_seconds = 0
+    user = SimpleNamespace(id='benchmark-user')
+    print(f"{'エンドポイント':<10} | {'件数':>6} | {'方式':<6} | {'TTFB(ms)':>10} | {'全体(ms)':>10} | {'ピーク(MiB)':>11}")
+    print('-' * 72)
+    for name, response_model in [('grouped', QuotesGroupedResponse), ('public', PublicQuotesResponse)]:
+        for size in SIZES:
+            quotes = make_quotes(size)
+            supabase = FakeSupabase(quotes)
+            for stream in (False, True):
+                if name == 'grouped':
+                    # 1ページに全フレーズが含まれる（大きなグループを持つユーザー）場合
+                    def call():
+                        return get_quotes_grouped(
+                            limit=size, offset=0, search=None, source_type=None, activity_ids=None,
+                            tag_ids=None, pagination='offset', cursor=None, stream=stream,
+                            user=user, supabase=supabase,
+                        )
+                else:
+                    # 公開フレーズ全体の件数が多く、1ページ（100件）を取得する場合
+                    def call():
+                        return get_public_quotes(limit=100, offset=0, seed=None, stream=stream, supabase=supabase)
+
+                ttfb, total, peak = run(call, response_model)
+                label = 'stream' if stream else '通常'
+                print(f"{name:<10} | {size:>6} | {label:<6} | {ttfb:>10.1f} | {total:>10.1f} | {peak:>11.1f}")
+        print('-' * 72)
+
+
+if __name__ == '__main__':
+    main()
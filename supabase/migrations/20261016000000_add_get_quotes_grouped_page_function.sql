@@ -0,0 +1,167 @@
+-- ====================================
+-- グループ化フレーズ一覧のページ取得関数
+-- ====================================
+-- 検索・出典タイプ・活動領域・タグの絞り込み、件数カウント、ページングをDB側で実行し、
+-- 要求されたページに含まれるフレーズと総件数のみを返す
+--
+-- 並び順（APIのグループ化ルールと同じ）:
+--   1. 書籍グループ → SNSグループ → その他グループ
+--   2. 各グループは最新フレーズの登録日時の降順
+--   3. グループ内は登録日時の降順
+--
+-- ページングはフレーズ単位で、p_offset〜p_offset+p_limit の範囲に
+-- 1件でも含まれるグループはグループ全体を返す
+--
+-- 戻り値（JSONB）:
+--   total    : 絞り込み後のフレーズ総数
+--   page_end : 返却したグループの末尾位置（has_moreの判定に使用）
+--   quotes   : フレーズ配列（PostgRESTのネスト取得と同じ形式）
+
+CREATE OR REPLACE FUNCTION get_quotes_grouped_page(
+  p_limit INT DEFAULT 50,
+  p_offset INT DEFAULT 0,
+  p_search TEXT DEFAULT NULL,
+  p_source_type TEXT DEFAULT NULL,
+  p_activity_ids INT[] DEFAULT NULL,
+  p_tag_ids BIGINT[] DEFAULT NULL
+)
+RETURNS JSONB
+LANGUAGE sql
+STABLE
+SECURITY INVOKER
+SET search_path = public
+AS $$
+  WITH params AS (
+    SELECT
+      CASE
+        WHEN p_search IS NULL OR p_search = '' THEN NULL
+        -- LIKEのワイルドカードをエスケープして部分一致パターンを作成
+        ELSE '%' || replace(replace(replace(p_search, '\', '\\'), '%', '\%'), '_', '\_') || '%'
+      END AS pattern
+  ),
+  filtered AS (
+    SELECT
+      q.id,
+      q.created_at,
+      CASE q.source_type WHEN 'BOOK' THEN 0 WHEN 'SNS' THEN 1 ELSE 2 END AS group_rank,
+      CASE q.source_type
+        WHEN 'BOOK' THEN q.book_id::TEXT
+        WHEN 'SNS' THEN q.sns_user_id::TEXT
+        ELSE COALESCE(q.source_meta->>'source', '') || E'\x1f' || COALESCE(q.source_meta->>'note', '')
+      END AS group_key
+    FROM quotes q
+    CROSS JOIN params
+    LEFT JOIN books b ON b.id = q.book_id
+    LEFT JOIN sns_users s ON s.id = q.sns_user_id
+    WHERE q.user_id = auth.uid()
+      AND q.deleted_at IS NULL
+      AND (p_source_type IS NULL OR q.source_type = p_source_type)
+      -- フレーズテキスト、書籍タイトル・著者名、SNSアカウント名・表示名で部分一致検索
+      AND (
+        params.pattern IS NULL
+        OR q.text ILIKE params.pattern
+        OR b.title ILIKE params.pattern
+        OR b.author ILIKE params.pattern
+        OR s.handle ILIKE params.pattern
+        OR s.display_name ILIKE params.pattern
+      )
+      AND (
+        p_activity_ids IS NULL
+        OR EXISTS (
+          SELECT 1 FROM quote_activities qa
+          WHERE qa.quote_id = q.id AND qa.activity_id = ANY(p_activity_ids)
+        )
+      )
+      AND (
+        p_tag_ids IS NULL
+        OR EXISTS (
+          SELECT 1 FROM quote_tags qt
+          WHERE qt.quote_id = q.id AND qt.tag_id = ANY(p_tag_ids)
+        )
+      )
+  ),
+  numbered AS (
+    SELECT
+      f.*,
+      ROW_NUMBER() OVER (
+        ORDER BY f.group_rank, f.group_latest DESC, f.group_key, f.created_at DESC, f.id DESC
+      ) - 1 AS position
+    FROM (
+      SELECT
+        filtered.*,
+        MAX(filtered.created_at) OVER (PARTITION BY filtered.group_rank, filtered.group_key) AS group_latest
+      FROM filtered
+    ) f
+  ),
+  bounded AS (
+    SELECT
+      n.*,
+      MIN(n.position) OVER g AS group_start,
+      MAX(n.position) OVER g AS group_end
+    FROM numbered n
+    WINDOW g AS (PARTITION BY n.group_rank, n.group_key)
+  ),
+  page AS (
+    SELECT bounded.id, bounded.position, bounded.group_end
+    FROM bounded
+    WHERE bounded.group_start < p_offset + p_limit
+      AND bounded.group_end >= p_offset
+  )
+  SELECT jsonb_build_object(
+    'total', (SELECT COUNT(*) FROM filtered),
+    'page_end', COALESCE((SELECT MAX(page.group_end) + 1 FROM page), p_offset),
+    'quotes', COALESCE((
+      SELECT jsonb_agg(
+        jsonb_build_object(
+          'id', q.id,
+          'text', q.text,
+          'source_type', q.source_type,
+          'book_id', q.book_id,
+          'sns_user_id', q.sns_user_id,
+          'page_number', q.page_number,
+          'source_meta', q.source_meta,
+          'is_public', q.is_public,
+          'reference_link', q.reference_link,
+          'created_at', q.created_at,
+          'books', (
+            SELECT jsonb_build_object(
+              'id', b.id, 'title', b.title, 'author', b.author, 'cover_image_url', b.cover_image_url
+            )
+            FROM books b WHERE b.id = q.book_id
+          ),
+          'sns_users', (
+            SELECT jsonb_build_object(
+              'id', s.id, 'platform', s.platform, 'handle', s.handle, 'display_name', s.display_name
+            )
+            FROM sns_users s WHERE s.id = q.sns_user_id
+          ),
+          'quote_activities', COALESCE((
+            SELECT jsonb_agg(
+              jsonb_build_object('activities', jsonb_build_object('id', a.id, 'name', a.name, 'icon', a.icon))
+              ORDER BY qa.id
+            )
+            FROM quote_activities qa
+            JOIN activities a ON a.id = qa.activity_id
+            WHERE qa.quote_id = q.id
+          ), '[]'::JSONB),
+          'quote_tags', COALESCE((
+            SELECT jsonb_agg(
+              jsonb_build_object('tags', jsonb_build_object('id', t.id, 'name', t.name))
+              ORDER BY qt.id
+            )
+            FROM quote_tags qt
+            JOIN tags t ON t.id = qt.tag_id
+            WHERE qt.quote_id = q.id
+          ), '[]'::JSONB)
+        )
+        ORDER BY page.position
+      )
+      FROM page
+      JOIN quotes q ON q.id = page.id
+    ), '[]'::JSONB)
+  );
+$$;
+
+COMMENT ON FUNCTION get_quotes_grouped_page IS 'グループ化フレーズ一覧の絞り込み・件数カウント・ページングをDB側で実行';
+
+GRANT EXECUTE ON FUNCTION get_quotes_grouped_page TO authenticated;
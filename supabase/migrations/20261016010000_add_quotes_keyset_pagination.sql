@@ -0,0 +1,250 @@
+-- ====================================
+-- フレーズ一覧のキーセット（カーソル）ページネーション
+-- ====================================
+-- (created_at, id) をカーソルとして次ページを取得する
+-- OFFSETと異なり、深いページでも先頭ページと同じコストで取得でき、
+-- 取得中にフレーズが追加・削除されてもページ境界がずれない
+
+-- キーセット用インデックス（ORDER BY created_at DESC, id DESC に対応）
+CREATE INDEX IF NOT EXISTS quotes_user_created_id_idx
+  ON quotes(user_id, created_at DESC, id DESC)
+  WHERE deleted_at IS NULL;
+
+-- ====================================
+-- 共通関数
+-- ====================================
+
+-- 部分一致検索用のLIKEパターンを作成（ワイルドカードをエスケープ）
+CREATE OR REPLACE FUNCTION quote_search_pattern(p_search TEXT)
+RETURNS TEXT
+LANGUAGE sql
+IMMUTABLE
+AS $$
+  SELECT CASE
+    WHEN p_search IS NULL OR p_search = '' THEN NULL
+    ELSE '%' || replace(replace(replace(p_search, '\', '\\'), '%', '\%'), '_', '\_') || '%'
+  END;
+$$;
+
+-- フレーズが一覧の絞り込み条件に一致するか判定
+CREATE OR REPLACE FUNCTION quote_matches_filters(
+  q quotes,
+  p_pattern TEXT,
+  p_source_type TEXT,
+  p_activity_ids INT[],
+  p_tag_ids BIGINT[]
+)
+RETURNS BOOLEAN
+LANGUAGE sql
+STABLE
+AS $$
+  SELECT
+    (p_source_type IS NULL OR q.source_type = p_source_type)
+    -- フレーズテキスト、書籍タイトル・著者名、SNSアカウント名・表示名で部分一致検索
+    AND (
+      p_pattern IS NULL
+      OR q.text ILIKE p_pattern
+      OR EXISTS (
+        SELECT 1 FROM books b
+        WHERE b.id = q.book_id AND (b.title ILIKE p_pattern OR b.author ILIKE p_pattern)
+      )
+      OR EXISTS (
+        SELECT 1 FROM sns_users s
+        WHERE s.id = q.sns_user_id AND (s.handle ILIKE p_pattern OR s.display_name ILIKE p_pattern)
+      )
+    )
+    AND (
+      p_activity_ids IS NULL
+      OR EXISTS (
+        SELECT 1 FROM quote_activities qa
+        WHERE qa.quote_id = q.id AND qa.activity_id = ANY(p_activity_ids)
+      )
+    )
+    AND (
+      p_tag_ids IS NULL
+      OR EXISTS (
+        SELECT 1 FROM quote_tags qt
+        WHERE qt.quote_id = q.id AND qt.tag_id = ANY(p_tag_ids)
+      )
+    );
+$$;
+
+-- フレーズを出典・活動領域・タグ付きのJSONに変換（PostgRESTのネスト取得と同じ形式）
+CREATE OR REPLACE FUNCTION quote_detail_json(q quotes)
+RETURNS JSONB
+LANGUAGE sql
+STABLE
+AS $$
+  SELECT jsonb_build_object(
+    'id', q.id,
+    'text', q.text,
+    'source_type', q.source_type,
+    'book_id', q.book_id,
+    'sns_user_id', q.sns_user_id,
+    'page_number', q.page_number,
+    'source_meta', q.source_meta,
+    'is_public', q.is_public,
+    'reference_link', q.reference_link,
+    'created_at', q.created_at,
+    'books', (
+      SELECT jsonb_build_object(
+        'id', b.id, 'title', b.title, 'author', b.author, 'cover_image_url', b.cover_image_url
+      )
+      FROM books b WHERE b.id = q.book_id
+    ),
+    'sns_users', (
+      SELECT jsonb_build_object(
+        'id', s.id, 'platform', s.platform, 'handle', s.handle, 'display_name', s.display_name
+      )
+      FROM sns_users s WHERE s.id = q.sns_user_id
+    ),
+    'quote_activities', COALESCE((
+      SELECT jsonb_agg(
+        jsonb_build_object('activities', jsonb_build_object('id', a.id, 'name', a.name, 'icon', a.icon))
+        ORDER BY qa.id
+      )
+      FROM quote_activities qa
+      JOIN activities a ON a.id = qa.activity_id
+      WHERE qa.quote_id = q.id
+    ), '[]'::JSONB),
+    'quote_tags', COALESCE((
+      SELECT jsonb_agg(
+        jsonb_build_object('tags', jsonb_build_object('id', t.id, 'name', t.name))
+        ORDER BY qt.id
+      )
+      FROM quote_tags qt
+      JOIN tags t ON t.id = qt.tag_id
+      WHERE qt.quote_id = q.id
+    ), '[]'::JSONB)
+  );
+$$;
+
+-- ====================================
+-- get_quotes_grouped_page を共通関数で書き換え（動作は変更なし）
+-- ====================================
+CREATE OR REPLACE FUNCTION get_quotes_grouped_page(
+  p_limit INT DEFAULT 50,
+  p_offset INT DEFAULT 0,
+  p_search TEXT DEFAULT NULL,
+  p_source_type TEXT DEFAULT NULL,
+  p_activity_ids INT[] DEFAULT NULL,
+  p_tag_ids BIGINT[] DEFAULT NULL
+)
+RETURNS JSONB
+LANGUAGE sql
+STABLE
+SECURITY INVOKER
+SET search_path = public
+AS $$
+  WITH filtered AS (
+    SELECT
+      q.id,
+      q.created_at,
+      CASE q.source_type WHEN 'BOOK' THEN 0 WHEN 'SNS' THEN 1 ELSE 2 END AS group_rank,
+      CASE q.source_type
+        WHEN 'BOOK' THEN q.book_id::TEXT
+        WHEN 'SNS' THEN q.sns_user_id::TEXT
+        ELSE COALESCE(q.source_meta->>'source', '') || E'\x1f' || COALESCE(q.source_meta->>'note', '')
+      END AS group_key
+    FROM quotes q
+    WHERE q.user_id = auth.uid()
+      AND q.deleted_at IS NULL
+      AND quote_matches_filters(q, quote_search_pattern(p_search), p_source_type, p_activity_ids, p_tag_ids)
+  ),
+  numbered AS (
+    SELECT
+      f.*,
+      ROW_NUMBER() OVER (
+        ORDER BY f.group_rank, f.group_latest DESC, f.group_key, f.created_at DESC, f.id DESC
+      ) - 1 AS position
+    FROM (
+      SELECT
+        filtered.*,
+        MAX(filtered.created_at) OVER (PARTITION BY filtered.group_rank, filtered.group_key) AS group_latest
+      FROM filtered
+    ) f
+  ),
+  bounded AS (
+    SELECT
+      n.*,
+      MIN(n.position) OVER g AS group_start,
+      MAX(n.position) OVER g AS group_end
+    FROM numbered n
+    WINDOW g AS (PARTITION BY n.group_rank, n.group_key)
+  ),
+  page AS (
+    SELECT bounded.id, bounded.position, bounded.group_end
+    FROM bounded
+    WHERE bounded.group_start < p_offset + p_limit
+      AND bounded.group_end >= p_offset
+  )
+  SELECT jsonb_build_object(
+    'total', (SELECT COUNT(*) FROM filtered),
+    'page_end', COALESCE((SELECT MAX(page.group_end) + 1 FROM page), p_offset),
+    'quotes', COALESCE((
+      SELECT jsonb_agg(quote_detail_json(q) ORDER BY page.position)
+      FROM page
+      JOIN quotes q ON q.id = page.id
+    ), '[]'::JSONB)
+  );
+$$;
+
+-- ====================================
+-- キーセットページ取得関数
+-- ====================================
+-- 戻り値（JSONB）:
+--   total    : 絞り込み後のフレーズ総数（p_with_total = false の場合はNULL）
+--   has_more : 次ページが存在するか
+--   quotes   : 登録日時の降順のフレーズ配列（最大p_limit件）
+CREATE OR REPLACE FUNCTION get_quotes_cursor_page(
+  p_limit INT DEFAULT 50,
+  p_cursor_created_at TIMESTAMPTZ DEFAULT NULL,
+  p_cursor_id BIGINT DEFAULT NULL,
+  p_search TEXT DEFAULT NULL,
+  p_source_type TEXT DEFAULT NULL,
+  p_activity_ids INT[] DEFAULT NULL,
+  p_tag_ids BIGINT[] DEFAULT NULL,
+  p_with_total BOOLEAN DEFAULT TRUE
+)
+RETURNS JSONB
+LANGUAGE sql
+STABLE
+SECURITY INVOKER
+SET search_path = public
+AS $$
+  WITH page AS (
+    SELECT q.id, q.created_at
+    FROM quotes q
+    WHERE q.user_id = auth.uid()
+      AND q.deleted_at IS NULL
+      AND (
+        p_cursor_created_at IS NULL
+        OR (q.created_at, q.id) < (p_cursor_created_at, p_cursor_id)
+      )
+      AND quote_matches_filters(q, quote_search_pattern(p_search), p_source_type, p_activity_ids, p_tag_ids)
+    ORDER BY q.created_at DESC, q.id DESC
+    -- 1件多く取得して次ページの有無を判定
+    LIMIT p_limit + 1
+  )
+  SELECT jsonb_build_object(
+    'total', CASE WHEN p_with_total THEN (
+      SELECT COUNT(*)
+      FROM quotes q
+      WHERE q.user_id = auth.uid()
+        AND q.deleted_at IS NULL
+        AND quote_matches_filters(q, quote_search_pattern(p_search), p_source_type, p_activity_ids, p_tag_ids)
+    ) END,
+    'has_more', (SELECT COUNT(*) > p_limit FROM page),
+    'quotes', COALESCE((
+      SELECT jsonb_agg(quote_detail_json(q) ORDER BY q.created_at DESC, q.id DESC)
+      FROM (
+        SELECT page.id FROM page ORDER BY page.created_at DESC, page.id DESC LIMIT p_limit
+      ) p
+      JOIN quotes q ON q.id = p.id
+    ), '[]'::JSONB)
+  );
+$$;
+
+COMMENT ON FUNCTION get_quotes_cursor_page IS 'フレーズ一覧を(created_at, id)のキーセットでページ取得';
+
+GRANT EXECUTE ON FUNCTION get_quotes_cursor_page TO authenticated;
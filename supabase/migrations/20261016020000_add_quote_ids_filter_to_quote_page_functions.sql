@@ -0,0 +1,187 @@
+-- ====================================
+-- フレーズ一覧の取得関数に検索インデックス用のID絞り込みを追加
+-- ====================================
+-- 日本語の部分一致検索はAPIサーバー側のN-gramインデックスで行い、
+-- 一致したフレーズIDを p_quote_ids として渡す
+-- （p_search によるILIKE検索はインデックス無効時のフォールバックとして残す）
+--
+-- 引数が変わるため既存の関数を削除してから再作成する
+-- （同名の関数が複数あるとPostgRESTが呼び出し先を決定できないため）
+
+DROP FUNCTION IF EXISTS get_quotes_grouped_page(INT, INT, TEXT, TEXT, INT[], BIGINT[]);
+DROP FUNCTION IF EXISTS get_quotes_cursor_page(INT, TIMESTAMPTZ, BIGINT, TEXT, TEXT, INT[], BIGINT[], BOOLEAN);
+DROP FUNCTION IF EXISTS quote_matches_filters(quotes, TEXT, TEXT, INT[], BIGINT[]);
+
+-- フレーズが一覧の絞り込み条件に一致するか判定
+CREATE OR REPLACE FUNCTION quote_matches_filters(
+  q quotes,
+  p_pattern TEXT,
+  p_source_type TEXT,
+  p_activity_ids INT[],
+  p_tag_ids BIGINT[],
+  p_quote_ids BIGINT[]
+)
+RETURNS BOOLEAN
+LANGUAGE sql
+STABLE
+AS $$
+  SELECT
+    (p_source_type IS NULL OR q.source_type = p_source_type)
+    -- フレーズテキスト、書籍タイトル・著者名、SNSアカウント名・表示名で部分一致検索
+    AND (
+      p_pattern IS NULL
+      OR q.text ILIKE p_pattern
+      OR EXISTS (
+        SELECT 1 FROM books b
+        WHERE b.id = q.book_id AND (b.title ILIKE p_pattern OR b.author ILIKE p_pattern)
+      )
+      OR EXISTS (
+        SELECT 1 FROM sns_users s
+        WHERE s.id = q.sns_user_id AND (s.handle ILIKE p_pattern OR s.display_name ILIKE p_pattern)
+      )
+    )
+    AND (
+      p_activity_ids IS NULL
+      OR EXISTS (
+        SELECT 1 FROM quote_activities qa
+        WHERE qa.quote_id = q.id AND qa.activity_id = ANY(p_activity_ids)
+      )
+    )
+    AND (
+      p_tag_ids IS NULL
+      OR EXISTS (
+        SELECT 1 FROM quote_tags qt
+        WHERE qt.quote_id = q.id AND qt.tag_id = ANY(p_tag_ids)
+      )
+    )
+    -- 検索インデックスで絞り込んだフレーズID
+    AND (p_quote_ids IS NULL OR q.id = ANY(p_quote_ids));
+$$;
+
+-- グループ化フレーズ一覧のページ取得
+CREATE OR REPLACE FUNCTION get_quotes_grouped_page(
+  p_limit INT DEFAULT 50,
+  p_offset INT DEFAULT 0,
+  p_search TEXT DEFAULT NULL,
+  p_source_type TEXT DEFAULT NULL,
+  p_activity_ids INT[] DEFAULT NULL,
+  p_tag_ids BIGINT[] DEFAULT NULL,
+  p_quote_ids BIGINT[] DEFAULT NULL
+)
+RETURNS JSONB
+LANGUAGE sql
+STABLE
+SECURITY INVOKER
+SET search_path = public
+AS $$
+  WITH filtered AS (
+    SELECT
+      q.id,
+      q.created_at,
+      CASE q.source_type WHEN 'BOOK' THEN 0 WHEN 'SNS' THEN 1 ELSE 2 END AS group_rank,
+      CASE q.source_type
+        WHEN 'BOOK' THEN q.book_id::TEXT
+        WHEN 'SNS' THEN q.sns_user_id::TEXT
+        ELSE COALESCE(q.source_meta->>'source', '') || E'\x1f' || COALESCE(q.source_meta->>'note', '')
+      END AS group_key
+    FROM quotes q
+    WHERE q.user_id = auth.uid()
+      AND q.deleted_at IS NULL
+      AND quote_matches_filters(q, quote_search_pattern(p_search), p_source_type, p_activity_ids, p_tag_ids, p_quote_ids)
+  ),
+  numbered AS (
+    SELECT
+      f.*,
+      ROW_NUMBER() OVER (
+        ORDER BY f.group_rank, f.group_latest DESC, f.group_key, f.created_at DESC, f.id DESC
+      ) - 1 AS position
+    FROM (
+      SELECT
+        filtered.*,
+        MAX(filtered.created_at) OVER (PARTITION BY filtered.group_rank, filtered.group_key) AS group_latest
+      FROM filtered
+    ) f
+  ),
+  bounded AS (
+    SELECT
+      n.*,
+      MIN(n.position) OVER g AS group_start,
+      MAX(n.position) OVER g AS group_end
+    FROM numbered n
+    WINDOW g AS (PARTITION BY n.group_rank, n.group_key)
+  ),
+  page AS (
+    SELECT bounded.id, bounded.position, bounded.group_end
+    FROM bounded
+    WHERE bounded.group_start < p_offset + p_limit
+      AND bounded.group_end >= p_offset
+  )
+  SELECT jsonb_build_object(
+    'total', (SELECT COUNT(*) FROM filtered),
+    'page_end', COALESCE((SELECT MAX(page.group_end) + 1 FROM page), p_offset),
+    'quotes', COALESCE((
+      SELECT jsonb_agg(quote_detail_json(q) ORDER BY page.position)
+      FROM page
+      JOIN quotes q ON q.id = page.id
+    ), '[]'::JSONB)
+  );
+$$;
+
+COMMENT ON FUNCTION get_quotes_grouped_page IS 'グループ化フレーズ一覧の絞り込み・件数カウント・ページングをDB側で実行';
+
+GRANT EXECUTE ON FUNCTION get_quotes_grouped_page TO authenticated;
+
+-- キーセットページ取得
+CREATE OR REPLACE FUNCTION get_quotes_cursor_page(
+  p_limit INT DEFAULT 50,
+  p_cursor_created_at TIMESTAMPTZ DEFAULT NULL,
+  p_cursor_id BIGINT DEFAULT NULL,
+  p_search TEXT DEFAULT NULL,
+  p_source_type TEXT DEFAULT NULL,
+  p_activity_ids INT[] DEFAULT NULL,
+  p_tag_ids BIGINT[] DEFAULT NULL,
+  p_quote_ids BIGINT[] DEFAULT NULL,
+  p_with_total BOOLEAN DEFAULT TRUE
+)
+RETURNS JSONB
+LANGUAGE sql
+STABLE
+SECURITY INVOKER
+SET search_path = public
+AS $$
+  WITH page AS (
+    SELECT q.id, q.created_at
+    FROM quotes q
+    WHERE q.user_id = auth.uid()
+      AND q.deleted_at IS NULL
+      AND (
+        p_cursor_created_at IS NULL
+        OR (q.created_at, q.id) < (p_cursor_created_at, p_cursor_id)
+      )
+      AND quote_matches_filters(q, quote_search_pattern(p_search), p_source_type, p_activity_ids, p_tag_ids, p_quote_ids)
+    ORDER BY q.created_at DESC, q.id DESC
+    -- 1件多く取得して次ページの有無を判定
+    LIMIT p_limit + 1
+  )
+  SELECT jsonb_build_object(
+    'total', CASE WHEN p_with_total THEN (
+      SELECT COUNT(*)
+      FROM quotes q
+      WHERE q.user_id = auth.uid()
+        AND q.deleted_at IS NULL
+        AND quote_matches_filters(q, quote_search_pattern(p_search), p_source_type, p_activity_ids, p_tag_ids, p_quote_ids)
+    ) END,
+    'has_more', (SELECT COUNT(*) > p_limit FROM page),
+    'quotes', COALESCE((
+      SELECT jsonb_agg(quote_detail_json(q) ORDER BY q.created_at DESC, q.id DESC)
+      FROM (
+        SELECT page.id FROM page ORDER BY page.created_at DESC, page.id DESC LIMIT p_limit
+      ) p
+      JOIN quotes q ON q.id = p.id
+    ), '[]'::JSONB)
+  );
+$$;
+
+COMMENT ON FUNCTION get_quotes_cursor_page IS 'フレーズ一覧を(created_at, id)のキーセットでページ取得';
+
+GRANT EXECUTE ON FUNCTION get_quotes_cursor_page TO authenticated;
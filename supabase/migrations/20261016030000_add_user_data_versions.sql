@@ -0,0 +1,140 @@
+-- ====================================
+-- ユーザー単位のデータバージョン
+-- ====================================
+-- フレーズ・タグ・書籍・SNSユーザーと各ジャンクションテーブルが変更されるたびに
+-- ユーザーのバージョン番号を1つ進める
+-- APIは一覧のETagにこの番号を使い、1行の主キー検索だけで変更の有無を判定する
+-- （変更がなければ一覧の取得を行わずに 304 Not Modified を返す）
+
+CREATE TABLE IF NOT EXISTS user_data_versions (
+  user_id UUID PRIMARY KEY REFERENCES auth.users(id) ON DELETE CASCADE,
+  version BIGINT NOT NULL DEFAULT 0,
+  updated_at TIMESTAMPTZ NOT NULL DEFAULT now()
+);
+
+-- RLS有効化（参照のみ許可。更新はトリガーからのみ行う）
+ALTER TABLE user_data_versions ENABLE ROW LEVEL SECURITY;
+
+CREATE POLICY user_data_versions_select_policy ON user_data_versions
+  FOR SELECT
+  USING (auth.uid() = user_id);
+
+-- ====================================
+-- バージョン更新トリガー
+-- ====================================
+-- 一括登録で行数分の更新が発生しないよう、文単位のトリガーで遷移テーブルから
+-- 変更されたユーザーを集めて1ユーザー1回だけ更新する
+
+-- user_id を持つテーブル（quotes, tags, books, sns_users）用
+CREATE OR REPLACE FUNCTION bump_user_data_versions()
+RETURNS TRIGGER
+LANGUAGE plpgsql
+SECURITY DEFINER
+SET search_path = public
+AS $$
+BEGIN
+  IF TG_OP = 'DELETE' THEN
+    INSERT INTO user_data_versions (user_id, version)
+    SELECT DISTINCT old_rows.user_id, 1 FROM old_rows
+    ON CONFLICT (user_id) DO UPDATE
+      SET version = user_data_versions.version + 1, updated_at = now();
+  ELSE
+    INSERT INTO user_data_versions (user_id, version)
+    SELECT DISTINCT new_rows.user_id, 1 FROM new_rows
+    ON CONFLICT (user_id) DO UPDATE
+      SET version = user_data_versions.version + 1, updated_at = now();
+  END IF;
+  RETURN NULL;
+END;
+$$;
+
+-- ジャンクションテーブル（quote_activities, quote_tags）用（quotes経由でユーザーを特定）
+CREATE OR REPLACE FUNCTION bump_user_data_versions_by_quote()
+RETURNS TRIGGER
+LANGUAGE plpgsql
+SECURITY DEFINER
+SET search_path = public
+AS $$
+BEGIN
+  IF TG_OP = 'DELETE' THEN
+    INSERT INTO user_data_versions (user_id, version)
+    SELECT DISTINCT q.user_id, 1 FROM old_rows JOIN quotes q ON q.id = old_rows.quote_id
+    ON CONFLICT (user_id) DO UPDATE
+      SET version = user_data_versions.version + 1, updated_at = now();
+  ELSE
+    INSERT INTO user_data_versions (user_id, version)
+    SELECT DISTINCT q.user_id, 1 FROM new_rows JOIN quotes q ON q.id = new_rows.quote_id
+    ON CONFLICT (user_id) DO UPDATE
+      SET version = user_data_versions.version + 1, updated_at = now();
+  END IF;
+  RETURN NULL;
+END;
+$$;
+
+-- quotes
+CREATE TRIGGER quotes_bump_version_insert AFTER INSERT ON quotes
+  REFERENCING NEW TABLE AS new_rows
+  FOR EACH STATEMENT EXECUTE FUNCTION bump_user_data_versions();
+CREATE TRIGGER quotes_bump_version_update AFTER UPDATE ON quotes
+  REFERENCING NEW TABLE AS new_rows
+  FOR EACH STATEMENT EXECUTE FUNCTION bump_user_data_versions();
+CREATE TRIGGER quotes_bump_version_delete AFTER DELETE ON quotes
+  REFERENCING OLD TABLE AS old_rows
+  FOR EACH STATEMENT EXECUTE FUNCTION bump_user_data_versions();
+
+-- tags
+CREATE TRIGGER tags_bump_version_insert AFTER INSERT ON tags
+  REFERENCING NEW TABLE AS new_rows
+  FOR EACH STATEMENT EXECUTE FUNCTION bump_user_data_versions();
+CREATE TRIGGER tags_bump_version_update AFTER UPDATE ON tags
+  REFERENCING NEW TABLE AS new_rows
+  FOR EACH STATEMENT EXECUTE FUNCTION bump_user_data_versions();
+CREATE TRIGGER tags_bump_version_delete AFTER DELETE ON tags
+  REFERENCING OLD TABLE AS old_rows
+  FOR EACH STATEMENT EXECUTE FUNCTION bump_user_data_versions();
+
+-- books
+CREATE TRIGGER books_bump_version_insert AFTER INSERT ON books
+  REFERENCING NEW TABLE AS new_rows
+  FOR EACH STATEMENT EXECUTE FUNCTION bump_user_data_versions();
+CREATE TRIGGER books_bump_version_update AFTER UPDATE ON books
+  REFERENCING NEW TABLE AS new_rows
+  FOR EACH STATEMENT EXECUTE FUNCTION bump_user_data_versions();
+CREATE TRIGGER books_bump_version_delete AFTER DELETE ON books
+  REFERENCING OLD TABLE AS old_rows
+  FOR EACH STATEMENT EXECUTE FUNCTION bump_user_data_versions();
+
+-- sns_users
+CREATE TRIGGER sns_users_bump_version_insert AFTER INSERT ON sns_users
+  REFERENCING NEW TABLE AS new_rows
+  FOR EACH STATEMENT EXECUTE FUNCTION bump_user_data_versions();
+CREATE TRIGGER sns_users_bump_version_update AFTER UPDATE ON sns_users
+  REFERENCING NEW TABLE AS new_rows
+  FOR EACH STATEMENT EXECUTE FUNCTION bump_user_data_versions();
+CREATE TRIGGER sns_users_bump_version_delete AFTER DELETE ON sns_users
+  REFERENCING OLD TABLE AS old_rows
+  FOR EACH STATEMENT EXECUTE FUNCTION bump_user_data_versions();
+
+-- quote_activities
+CREATE TRIGGER quote_activities_bump_version_insert AFTER INSERT ON quote_activities
+  REFERENCING NEW TABLE AS new_rows
+  FOR EACH STATEMENT EXECUTE FUNCTION bump_user_data_versions_by_quote();
+CREATE TRIGGER quote_activities_bump_version_update AFTER UPDATE ON quote_activities
+  REFERENCING NEW TABLE AS new_rows
+  FOR EACH STATEMENT EXECUTE FUNCTION bump_user_data_versions_by_quote();
+CREATE TRIGGER quote_activities_bump_version_delete AFTER DELETE ON quote_activities
+  REFERENCING OLD TABLE AS old_rows
+  FOR EACH STATEMENT EXECUTE FUNCTION bump_user_data_versions_by_quote();
+
+-- quote_tags
+CREATE TRIGGER quote_tags_bump_version_insert AFTER INSERT ON quote_tags
+  REFERENCING NEW TABLE AS new_rows
+  FOR EACH STATEMENT EXECUTE FUNCTION bump_user_data_versions_by_quote();
+CREATE TRIGGER quote_tags_bump_version_update AFTER UPDATE ON quote_tags
+  REFERENCING NEW TABLE AS new_rows
+  FOR EACH STATEMENT EXECUTE FUNCTION bump_user_data_versions_by_quote();
+CREATE TRIGGER quote_tags_bump_version_delete AFTER DELETE ON quote_tags
+  REFERENCING OLD TABLE AS old_rows
+  FOR EACH STATEMENT EXECUTE FUNCTION bump_user_data_versions_by_quote();
+
+COMMENT ON TABLE user_data_versions IS 'ユーザーのデータ変更ごとに増えるバージョン番号（一覧APIのETag用）';
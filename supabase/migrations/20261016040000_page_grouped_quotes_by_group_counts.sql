@@ -0,0 +1,79 @@
+-- ====================================
+-- グループ化フレーズ一覧のページ範囲をグループ単位の件数で判定
+-- ====================================
+-- これまでは絞り込み後の全フレーズに ROW_NUMBER で通し番号を振ってから
+-- ページ範囲のグループを選択していたため、フレーズ総数分のソートが毎回発生していた
+--
+-- グループごとの件数と最新登録日時を集計し、グループ単位の累積件数で
+-- 各グループの開始位置を求める（ソート対象はグループ数のみ）
+-- フレーズの並び替えとJSON化はページ範囲に含まれるグループのフレーズだけで行う
+--
+-- 引数・戻り値・並び順・ページ範囲の判定は変更なし
+
+CREATE OR REPLACE FUNCTION get_quotes_grouped_page(
+  p_limit INT DEFAULT 50,
+  p_offset INT DEFAULT 0,
+  p_search TEXT DEFAULT NULL,
+  p_source_type TEXT DEFAULT NULL,
+  p_activity_ids INT[] DEFAULT NULL,
+  p_tag_ids BIGINT[] DEFAULT NULL,
+  p_quote_ids BIGINT[] DEFAULT NULL
+)
+RETURNS JSONB
+LANGUAGE sql
+STABLE
+SECURITY INVOKER
+SET search_path = public
+AS $$
+  WITH filtered AS (
+    SELECT
+      q.id,
+      q.created_at,
+      CASE q.source_type WHEN 'BOOK' THEN 0 WHEN 'SNS' THEN 1 ELSE 2 END AS group_rank,
+      CASE q.source_type
+        WHEN 'BOOK' THEN q.book_id::TEXT
+        WHEN 'SNS' THEN q.sns_user_id::TEXT
+        ELSE COALESCE(q.source_meta->>'source', '') || E'\x1f' || COALESCE(q.source_meta->>'note', '')
+      END AS group_key
+    FROM quotes q
+    WHERE q.user_id = auth.uid()
+      AND q.deleted_at IS NULL
+      AND quote_matches_filters(q, quote_search_pattern(p_search), p_source_type, p_activity_ids, p_tag_ids, p_quote_ids)
+  ),
+  -- グループごとの件数と最新登録日時
+  grouped AS (
+    SELECT
+      filtered.group_rank,
+      filtered.group_key,
+      COUNT(*) AS group_size,
+      MAX(filtered.created_at) AS group_latest
+    FROM filtered
+    GROUP BY filtered.group_rank, filtered.group_key
+  ),
+  -- グループの開始位置（それより前のグループのフレーズ数の合計）
+  positioned AS (
+    SELECT
+      g.*,
+      SUM(g.group_size) OVER (
+        ORDER BY g.group_rank, g.group_latest DESC, g.group_key
+        ROWS BETWEEN UNBOUNDED PRECEDING AND CURRENT ROW
+      ) - g.group_size AS group_start
+    FROM grouped g
+  ),
+  page_groups AS (
+    SELECT positioned.*
+    FROM positioned
+    WHERE positioned.group_start < p_offset + p_limit
+      AND positioned.group_start + positioned.group_size > p_offset
+  )
+  SELECT jsonb_build_object(
+    'total', COALESCE((SELECT SUM(grouped.group_size) FROM grouped), 0)::BIGINT,
+    'page_end', COALESCE((SELECT MAX(pg.group_start + pg.group_size) FROM page_groups pg), p_offset)::BIGINT,
+    'quotes', COALESCE((
+      SELECT jsonb_agg(quote_detail_json(q) ORDER BY pg.group_start, q.created_at DESC, q.id DESC)
+      FROM page_groups pg
+      JOIN filtered f ON f.group_rank = pg.group_rank AND f.group_key = pg.group_key
+      JOIN quotes q ON q.id = f.id
+    ), '[]'::JSONB)
+  );
+$$;
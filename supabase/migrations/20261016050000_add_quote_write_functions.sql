@@ -0,0 +1,141 @@
+-- ====================================
+-- フレーズの登録・更新関数
+-- ====================================
+-- フレーズと活動領域・タグの関連付けを1トランザクション・1回のRPCで実行する
+-- 途中で失敗した場合はすべてロールバックされる（APIサーバー側での手動ロールバックは不要）
+-- SECURITY INVOKER のため、RLS（auth.uid()）は通常のテーブル操作と同様に適用される
+
+-- ====================================
+-- フレーズ一括登録
+-- ====================================
+-- p_quotes: [{"text": "...", "activity_ids": [1, 2], "tag_ids": [3]}, ...]
+-- 戻り値（JSONB）: 登録したフレーズの配列（p_quotes と同じ順序）
+CREATE OR REPLACE FUNCTION create_quotes_with_relations(
+  p_quotes JSONB,
+  p_source_type TEXT,
+  p_book_id BIGINT DEFAULT NULL,
+  p_sns_user_id BIGINT DEFAULT NULL,
+  p_page_number INT DEFAULT NULL,
+  p_source_meta JSONB DEFAULT NULL,
+  p_is_public BOOLEAN DEFAULT FALSE,
+  p_reference_link TEXT DEFAULT NULL
+)
+RETURNS JSONB
+LANGUAGE plpgsql
+SECURITY INVOKER
+SET search_path = public
+AS $$
+DECLARE
+  v_user_id UUID := auth.uid();
+  v_item JSONB;
+  v_quote quotes;
+  v_created JSONB := '[]'::JSONB;
+BEGIN
+  IF v_user_id IS NULL THEN
+    RAISE EXCEPTION 'not authenticated' USING ERRCODE = '28000';
+  END IF;
+
+  FOR v_item IN
+    SELECT t.item FROM jsonb_array_elements(p_quotes) WITH ORDINALITY AS t(item, position)
+    ORDER BY t.position
+  LOOP
+    INSERT INTO quotes (
+      user_id, text, source_type, book_id, sns_user_id,
+      page_number, source_meta, is_public, reference_link
+    )
+    VALUES (
+      v_user_id,
+      v_item->>'text',
+      p_source_type,
+      CASE WHEN p_source_type = 'BOOK' THEN p_book_id END,
+      CASE WHEN p_source_type = 'SNS' THEN p_sns_user_id END,
+      p_page_number,
+      CASE WHEN p_source_type = 'OTHER' THEN p_source_meta END,
+      p_is_public,
+      p_reference_link
+    )
+    RETURNING * INTO v_quote;
+
+    INSERT INTO quote_activities (quote_id, activity_id)
+    SELECT DISTINCT v_quote.id, a.value::INT
+    FROM jsonb_array_elements_text(COALESCE(v_item->'activity_ids', '[]'::JSONB)) AS a(value);
+
+    INSERT INTO quote_tags (quote_id, tag_id)
+    SELECT DISTINCT v_quote.id, t.value::BIGINT
+    FROM jsonb_array_elements_text(COALESCE(v_item->'tag_ids', '[]'::JSONB)) AS t(value);
+
+    v_created := v_created || jsonb_build_array(to_jsonb(v_quote));
+  END LOOP;
+
+  RETURN v_created;
+END;
+$$;
+
+COMMENT ON FUNCTION create_quotes_with_relations IS 'フレーズと活動領域・タグの関連付けを1トランザクションで一括登録';
+
+GRANT EXECUTE ON FUNCTION create_quotes_with_relations TO authenticated;
+
+-- ====================================
+-- フレーズ更新
+-- ====================================
+-- NULLの引数は変更しない（p_activity_ids / p_tag_ids に空配列を渡すとすべて解除）
+-- 戻り値（JSONB）: 更新後のフレーズ（quote_detail_json の形式）
+--                  対象のフレーズが存在しない場合はNULL
+CREATE OR REPLACE FUNCTION update_quote_with_relations(
+  p_quote_id BIGINT,
+  p_text TEXT DEFAULT NULL,
+  p_is_public BOOLEAN DEFAULT NULL,
+  p_reference_link TEXT DEFAULT NULL,
+  p_activity_ids INT[] DEFAULT NULL,
+  p_tag_ids BIGINT[] DEFAULT NULL
+)
+RETURNS JSONB
+LANGUAGE plpgsql
+SECURITY INVOKER
+SET search_path = public
+AS $$
+DECLARE
+  v_quote quotes;
+BEGIN
+  IF p_text IS NOT NULL OR p_is_public IS NOT NULL OR p_reference_link IS NOT NULL THEN
+    UPDATE quotes
+    SET
+      text = COALESCE(p_text, text),
+      is_public = COALESCE(p_is_public, is_public),
+      reference_link = COALESCE(p_reference_link, reference_link)
+    WHERE id = p_quote_id
+      AND user_id = auth.uid()
+      AND deleted_at IS NULL
+    RETURNING * INTO v_quote;
+  ELSE
+    SELECT * INTO v_quote
+    FROM quotes
+    WHERE id = p_quote_id
+      AND user_id = auth.uid()
+      AND deleted_at IS NULL
+    FOR UPDATE;
+  END IF;
+
+  IF NOT FOUND THEN
+    RETURN NULL;
+  END IF;
+
+  IF p_activity_ids IS NOT NULL THEN
+    DELETE FROM quote_activities WHERE quote_id = p_quote_id;
+    INSERT INTO quote_activities (quote_id, activity_id)
+    SELECT DISTINCT p_quote_id, a.activity_id FROM unnest(p_activity_ids) AS a(activity_id);
+  END IF;
+
+  IF p_tag_ids IS NOT NULL THEN
+    DELETE FROM quote_tags WHERE quote_id = p_quote_id;
+    INSERT INTO quote_tags (quote_id, tag_id)
+    SELECT DISTINCT p_quote_id, t.tag_id FROM unnest(p_tag_ids) AS t(tag_id);
+  END IF;
+
+  RETURN quote_detail_json(v_quote);
+END;
+$$;
+
+COMMENT ON FUNCTION update_quote_with_relations IS 'フレーズと活動領域・タグの関連付けを1トランザクションで更新';
+
+GRANT EXECUTE ON FUNCTION update_quote_with_relations TO authenticated;
@@ -0,0 +1,77 @@
+-- ====================================
+-- フレーズ一括登録関数で出典をフレーズごとに指定可能にする
+-- ====================================
+-- インポート（POST /api/quotes/import）では1リクエストに出典の異なるフレーズが含まれるため、
+-- p_quotes の各要素に出典のキー（source_type, book_id, sns_user_id, page_number,
+-- source_meta, is_public, reference_link）がある場合はその値を使う
+-- キーがない場合は従来どおり引数の値を使う（POST /api/quotes は変更なし）
+
+CREATE OR REPLACE FUNCTION create_quotes_with_relations(
+  p_quotes JSONB,
+  p_source_type TEXT,
+  p_book_id BIGINT DEFAULT NULL,
+  p_sns_user_id BIGINT DEFAULT NULL,
+  p_page_number INT DEFAULT NULL,
+  p_source_meta JSONB DEFAULT NULL,
+  p_is_public BOOLEAN DEFAULT FALSE,
+  p_reference_link TEXT DEFAULT NULL
+)
+RETURNS JSONB
+LANGUAGE plpgsql
+SECURITY INVOKER
+SET search_path = public
+AS $$
+DECLARE
+  v_user_id UUID := auth.uid();
+  v_item JSONB;
+  v_source_type TEXT;
+  v_quote quotes;
+  v_created JSONB := '[]'::JSONB;
+BEGIN
+  IF v_user_id IS NULL THEN
+    RAISE EXCEPTION 'not authenticated' USING ERRCODE = '28000';
+  END IF;
+
+  FOR v_item IN
+    SELECT t.item FROM jsonb_array_elements(p_quotes) WITH ORDINALITY AS t(item, position)
+    ORDER BY t.position
+  LOOP
+    v_source_type := CASE WHEN v_item ? 'source_type' THEN v_item->>'source_type' ELSE p_source_type END;
+
+    INSERT INTO quotes (
+      user_id, text, source_type, book_id, sns_user_id,
+      page_number, source_meta, is_public, reference_link
+    )
+    VALUES (
+      v_user_id,
+      v_item->>'text',
+      v_source_type,
+      CASE WHEN v_source_type = 'BOOK' THEN
+        CASE WHEN v_item ? 'book_id' THEN (v_item->>'book_id')::BIGINT ELSE p_book_id END
+      END,
+      CASE WHEN v_source_type = 'SNS' THEN
+        CASE WHEN v_item ? 'sns_user_id' THEN (v_item->>'sns_user_id')::BIGINT ELSE p_sns_user_id END
+      END,
+      CASE WHEN v_item ? 'page_number' THEN (v_item->>'page_number')::INT ELSE p_page_number END,
+      CASE WHEN v_source_type = 'OTHER' THEN
+        CASE WHEN v_item ? 'source_meta' THEN NULLIF(v_item->'source_meta', 'null'::JSONB) ELSE p_source_meta END
+      END,
+      CASE WHEN v_item ? 'is_public' THEN COALESCE((v_item->>'is_public')::BOOLEAN, FALSE) ELSE p_is_public END,
+      CASE WHEN v_item ? 'reference_link' THEN v_item->>'reference_link' ELSE p_reference_link END
+    )
+    RETURNING * INTO v_quote;
+
+    INSERT INTO quote_activities (quote_id, activity_id)
+    SELECT DISTINCT v_quote.id, a.value::INT
+    FROM jsonb_array_elements_text(COALESCE(v_item->'activity_ids', '[]'::JSONB)) AS a(value);
+
+    INSERT INTO quote_tags (quote_id, tag_id)
+    SELECT DISTINCT v_quote.id, t.value::BIGINT
+    FROM jsonb_array_elements_text(COALESCE(v_item->'tag_ids', '[]'::JSONB)) AS t(value);
+
+    v_created := v_created || jsonb_build_array(to_jsonb(v_quote));
+  END LOOP;
+
+  RETURN v_created;
+END;
+$$;
@@ -0,0 +1,118 @@
+-- ====================================
+-- フレーズ一括登録でタグ名によるタグ指定を可能にする
+-- ====================================
+-- p_quotes の各要素に tag_names（タグ名の配列、#は自動付与）を指定できるようにする
+-- 全フレーズのタグ名をまとめて (user_id, name) の1回のUPSERTで解決する
+--   - 登録済みのタグ: そのまま使う（行は更新されるため updated_at は更新される）
+--   - 削除済みのタグ: deleted_at を NULL に戻して復活させる
+--   - 未登録のタグ: 新規作成する
+-- これまでは新しいタグごとに POST /api/tags（最大4クエリ）を呼んでからフレーズを登録していた
+-- tag_ids との併用も可能（重複は除外する）
+
+-- タグ名の正規化（先頭に#がなければ付与、POST /api/tags と同じ）
+CREATE OR REPLACE FUNCTION normalize_tag_name(p_name TEXT)
+RETURNS TEXT
+LANGUAGE sql
+IMMUTABLE
+AS $$
+  SELECT CASE WHEN p_name LIKE '#%' THEN p_name ELSE '#' || p_name END;
+$$;
+
+CREATE OR REPLACE FUNCTION create_quotes_with_relations(
+  p_quotes JSONB,
+  p_source_type TEXT,
+  p_book_id BIGINT DEFAULT NULL,
+  p_sns_user_id BIGINT DEFAULT NULL,
+  p_page_number INT DEFAULT NULL,
+  p_source_meta JSONB DEFAULT NULL,
+  p_is_public BOOLEAN DEFAULT FALSE,
+  p_reference_link TEXT DEFAULT NULL
+)
+RETURNS JSONB
+LANGUAGE plpgsql
+SECURITY INVOKER
+SET search_path = public
+AS $$
+DECLARE
+  v_user_id UUID := auth.uid();
+  v_item JSONB;
+  v_source_type TEXT;
+  v_quote quotes;
+  v_created JSONB := '[]'::JSONB;
+  v_tag_ids_by_name JSONB;
+BEGIN
+  IF v_user_id IS NULL THEN
+    RAISE EXCEPTION 'not authenticated' USING ERRCODE = '28000';
+  END IF;
+
+  -- 全フレーズのタグ名を1回のUPSERTで解決（タグ名 -> タグID）
+  -- 登録済みのタグも常に更新する（WHERE で除外すると RETURNING に含まれず、
+  -- 同時に別のトランザクションで作成されたタグのIDが取得できないため）
+  -- 更新した行は終了までロックされるため、解決したタグが途中で削除されることもない
+  WITH names AS (
+    SELECT DISTINCT normalize_tag_name(n.value) AS name
+    FROM jsonb_array_elements(p_quotes) AS q(item)
+    CROSS JOIN LATERAL jsonb_array_elements_text(COALESCE(q.item->'tag_names', '[]'::JSONB)) AS n(value)
+    WHERE n.value <> ''
+  ),
+  upserted AS (
+    INSERT INTO tags (user_id, name)
+    SELECT v_user_id, names.name FROM names
+    ON CONFLICT (user_id, name) DO UPDATE
+      SET deleted_at = NULL
+    RETURNING tags.id, tags.name
+  )
+  SELECT COALESCE(jsonb_object_agg(upserted.name, upserted.id), '{}'::JSONB)
+  INTO v_tag_ids_by_name
+  FROM upserted;
+
+  FOR v_item IN
+    SELECT t.item FROM jsonb_array_elements(p_quotes) WITH ORDINALITY AS t(item, position)
+    ORDER BY t.position
+  LOOP
+    v_source_type := CASE WHEN v_item ? 'source_type' THEN v_item->>'source_type' ELSE p_source_type END;
+
+    INSERT INTO quotes (
+      user_id, text, source_type, book_id, sns_user_id,
+      page_number, source_meta, is_public, reference_link
+    )
+    VALUES (
+      v_user_id,
+      v_item->>'text',
+      v_source_type,
+      CASE WHEN v_source_type = 'BOOK' THEN
+        CASE WHEN v_item ? 'book_id' THEN (v_item->>'book_id')::BIGINT ELSE p_book_id END
+      END,
+      CASE WHEN v_source_type = 'SNS' THEN
+        CASE WHEN v_item ? 'sns_user_id' THEN (v_item->>'sns_user_id')::BIGINT ELSE p_sns_user_id END
+      END,
+      CASE WHEN v_item ? 'page_number' THEN (v_item->>'page_number')::INT ELSE p_page_number END,
+      CASE WHEN v_source_type = 'OTHER' THEN
+        CASE WHEN v_item ? 'source_meta' THEN NULLIF(v_item->'source_meta', 'null'::JSONB) ELSE p_source_meta END
+      END,
+      CASE WHEN v_item ? 'is_public' THEN COALESCE((v_item->>'is_public')::BOOLEAN, FALSE) ELSE p_is_public END,
+      CASE WHEN v_item ? 'reference_link' THEN v_item->>'reference_link' ELSE p_reference_link END
+    )
+    RETURNING * INTO v_quote;
+
+    INSERT INTO quote_activities (quote_id, activity_id)
+    SELECT DISTINCT v_quote.id, a.value::INT
+    FROM jsonb_array_elements_text(COALESCE(v_item->'activity_ids', '[]'::JSONB)) AS a(value);
+
+    INSERT INTO quote_tags (quote_id, tag_id)
+    SELECT v_quote.id, t.tag_id
+    FROM (
+      SELECT t.value::BIGINT AS tag_id
+      FROM jsonb_array_elements_text(COALESCE(v_item->'tag_ids', '[]'::JSONB)) AS t(value)
+      UNION
+      SELECT (v_tag_ids_by_name->>normalize_tag_name(n.value))::BIGINT
+      FROM jsonb_array_elements_text(COALESCE(v_item->'tag_names', '[]'::JSONB)) AS n(value)
+      WHERE n.value <> ''
+    ) AS t;
+
+    v_created := v_created || jsonb_build_array(to_jsonb(v_quote));
+  END LOOP;
+
+  RETURN v_created;
+END;
+$$;
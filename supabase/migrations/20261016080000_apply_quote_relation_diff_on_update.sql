@@ -0,0 +1,123 @@
+-- ====================================
+-- フレーズ更新で関連付けの差分のみを反映
+-- ====================================
+-- これまでは p_activity_ids / p_tag_ids が指定されると、変更がなくても
+-- quote_activities / quote_tags の行をすべて削除して再登録していた
+-- （行の入れ替えとインデックス更新が毎回発生する）
+--
+-- 現在の関連付けと比較して追加・削除が必要なIDだけを反映し、
+-- 差分がない場合は書き込み自体を行わない（データバージョンも更新されない）
+--
+-- 戻り値には quote_detail_json に加えて、反映した行数を junction_changes として含める
+-- （{"activities_added": 0, "activities_removed": 0, "tags_added": 0, "tags_removed": 0}）
+-- 引数と対象のフレーズが存在しない場合の戻り値（NULL）は変更なし
+
+CREATE OR REPLACE FUNCTION update_quote_with_relations(
+  p_quote_id BIGINT,
+  p_text TEXT DEFAULT NULL,
+  p_is_public BOOLEAN DEFAULT NULL,
+  p_reference_link TEXT DEFAULT NULL,
+  p_activity_ids INT[] DEFAULT NULL,
+  p_tag_ids BIGINT[] DEFAULT NULL
+)
+RETURNS JSONB
+LANGUAGE plpgsql
+SECURITY INVOKER
+SET search_path = public
+AS $$
+DECLARE
+  v_quote quotes;
+  v_added_activity_ids INT[] := '{}';
+  v_removed_activity_ids INT[] := '{}';
+  v_added_tag_ids BIGINT[] := '{}';
+  v_removed_tag_ids BIGINT[] := '{}';
+BEGIN
+  IF p_text IS NOT NULL OR p_is_public IS NOT NULL OR p_reference_link IS NOT NULL THEN
+    UPDATE quotes
+    SET
+      text = COALESCE(p_text, text),
+      is_public = COALESCE(p_is_public, is_public),
+      reference_link = COALESCE(p_reference_link, reference_link)
+    WHERE id = p_quote_id
+      AND user_id = auth.uid()
+      AND deleted_at IS NULL
+    RETURNING * INTO v_quote;
+  ELSE
+    SELECT * INTO v_quote
+    FROM quotes
+    WHERE id = p_quote_id
+      AND user_id = auth.uid()
+      AND deleted_at IS NULL
+    FOR UPDATE;
+  END IF;
+
+  IF NOT FOUND THEN
+    RETURN NULL;
+  END IF;
+
+  IF p_activity_ids IS NOT NULL THEN
+    SELECT COALESCE(array_agg(qa.activity_id), '{}')
+    INTO v_removed_activity_ids
+    FROM quote_activities qa
+    WHERE qa.quote_id = p_quote_id
+      AND NOT (qa.activity_id = ANY (p_activity_ids));
+
+    SELECT COALESCE(array_agg(DISTINCT a.activity_id), '{}')
+    INTO v_added_activity_ids
+    FROM unnest(p_activity_ids) AS a(activity_id)
+    WHERE NOT EXISTS (
+      SELECT 1 FROM quote_activities qa
+      WHERE qa.quote_id = p_quote_id
+        AND qa.activity_id = a.activity_id
+    );
+
+    IF cardinality(v_removed_activity_ids) > 0 THEN
+      DELETE FROM quote_activities
+      WHERE quote_id = p_quote_id
+        AND activity_id = ANY (v_removed_activity_ids);
+    END IF;
+
+    IF cardinality(v_added_activity_ids) > 0 THEN
+      INSERT INTO quote_activities (quote_id, activity_id)
+      SELECT p_quote_id, a.activity_id FROM unnest(v_added_activity_ids) AS a(activity_id);
+    END IF;
+  END IF;
+
+  IF p_tag_ids IS NOT NULL THEN
+    SELECT COALESCE(array_agg(qt.tag_id), '{}')
+    INTO v_removed_tag_ids
+    FROM quote_tags qt
+    WHERE qt.quote_id = p_quote_id
+      AND NOT (qt.tag_id = ANY (p_tag_ids));
+
+    SELECT COALESCE(array_agg(DISTINCT t.tag_id), '{}')
+    INTO v_added_tag_ids
+    FROM unnest(p_tag_ids) AS t(tag_id)
+    WHERE NOT EXISTS (
+      SELECT 1 FROM quote_tags qt
+      WHERE qt.quote_id = p_quote_id
+        AND qt.tag_id = t.tag_id
+    );
+
+    IF cardinality(v_removed_tag_ids) > 0 THEN
+      DELETE FROM quote_tags
+      WHERE quote_id = p_quote_id
+        AND tag_id = ANY (v_removed_tag_ids);
+    END IF;
+
+    IF cardinality(v_added_tag_ids) > 0 THEN
+      INSERT INTO quote_tags (quote_id, tag_id)
+      SELECT p_quote_id, t.tag_id FROM unnest(v_added_tag_ids) AS t(tag_id);
+    END IF;
+  END IF;
+
+  RETURN quote_detail_json(v_quote) || jsonb_build_object(
+    'junction_changes', jsonb_build_object(
+      'activities_added', cardinality(v_added_activity_ids),
+      'activities_removed', cardinality(v_removed_activity_ids),
+      'tags_added', cardinality(v_added_tag_ids),
+      'tags_removed', cardinality(v_removed_tag_ids)
+    )
+  );
+END;
+$$;
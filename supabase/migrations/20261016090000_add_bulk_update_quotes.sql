@@ -0,0 +1,93 @@
+-- ====================================
+-- フレーズ一括更新関数
+-- ====================================
+-- 複数選択したフレーズに同じ変更（公開設定・参照リンク・活動領域/タグの追加と解除）を
+-- 1回のRPC・1トランザクションで適用する
+-- フレーズごとの更新ではなく、対象フレーズ全体に対する集合演算のSQLで反映する
+--
+-- NULLの引数・空配列は変更しない
+-- 戻り値（JSONB）: {"updated_ids": [...]}（存在しない・他ユーザー・削除済みのIDは含まない）
+-- SECURITY INVOKER のため、RLS（auth.uid()）は通常のテーブル操作と同様に適用される
+
+CREATE OR REPLACE FUNCTION bulk_update_quotes(
+  p_quote_ids BIGINT[],
+  p_is_public BOOLEAN DEFAULT NULL,
+  p_reference_link TEXT DEFAULT NULL,
+  p_add_activity_ids INT[] DEFAULT NULL,
+  p_remove_activity_ids INT[] DEFAULT NULL,
+  p_add_tag_ids BIGINT[] DEFAULT NULL,
+  p_remove_tag_ids BIGINT[] DEFAULT NULL
+)
+RETURNS JSONB
+LANGUAGE plpgsql
+SECURITY INVOKER
+SET search_path = public
+AS $$
+DECLARE
+  v_ids BIGINT[];
+BEGIN
+  -- 対象のフレーズをID順にロック（同時実行時のデッドロックを防ぐ）
+  SELECT COALESCE(array_agg(target.id), '{}')
+  INTO v_ids
+  FROM (
+    SELECT q.id
+    FROM quotes q
+    WHERE q.id = ANY (p_quote_ids)
+      AND q.user_id = auth.uid()
+      AND q.deleted_at IS NULL
+    ORDER BY q.id
+    FOR UPDATE
+  ) AS target;
+
+  IF cardinality(v_ids) = 0 THEN
+    RETURN jsonb_build_object('updated_ids', '[]'::JSONB);
+  END IF;
+
+  -- 値が変わるフレーズだけを更新
+  IF p_is_public IS NOT NULL OR p_reference_link IS NOT NULL THEN
+    UPDATE quotes
+    SET
+      is_public = COALESCE(p_is_public, is_public),
+      reference_link = COALESCE(p_reference_link, reference_link)
+    WHERE id = ANY (v_ids)
+      AND (
+        is_public IS DISTINCT FROM COALESCE(p_is_public, is_public)
+        OR reference_link IS DISTINCT FROM COALESCE(p_reference_link, reference_link)
+      );
+  END IF;
+
+  IF cardinality(p_remove_activity_ids) > 0 THEN
+    DELETE FROM quote_activities
+    WHERE quote_id = ANY (v_ids)
+      AND activity_id = ANY (p_remove_activity_ids);
+  END IF;
+
+  IF cardinality(p_add_activity_ids) > 0 THEN
+    INSERT INTO quote_activities (quote_id, activity_id)
+    SELECT target.id, a.activity_id
+    FROM unnest(v_ids) AS target(id)
+    CROSS JOIN (SELECT DISTINCT unnest(p_add_activity_ids) AS activity_id) AS a
+    ON CONFLICT (quote_id, activity_id) DO NOTHING;
+  END IF;
+
+  IF cardinality(p_remove_tag_ids) > 0 THEN
+    DELETE FROM quote_tags
+    WHERE quote_id = ANY (v_ids)
+      AND tag_id = ANY (p_remove_tag_ids);
+  END IF;
+
+  IF cardinality(p_add_tag_ids) > 0 THEN
+    INSERT INTO quote_tags (quote_id, tag_id)
+    SELECT target.id, t.tag_id
+    FROM unnest(v_ids) AS target(id)
+    CROSS JOIN (SELECT DISTINCT unnest(p_add_tag_ids) AS tag_id) AS t
+    ON CONFLICT (quote_id, tag_id) DO NOTHING;
+  END IF;
+
+  RETURN jsonb_build_object('updated_ids', to_jsonb(v_ids));
+END;
+$$;
+
+COMMENT ON FUNCTION bulk_update_quotes IS '複数のフレーズに同じ変更を1トランザクションで適用';
+
+GRANT EXECUTE ON FUNCTION bulk_update_quotes TO authenticated;
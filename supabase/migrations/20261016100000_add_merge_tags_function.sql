@@ -0,0 +1,87 @@
+-- ====================================
+-- タグ統合関数
+-- ====================================
+-- POST /api/tags/{source_tag_id}/merge の処理を1回のRPC・1トランザクションで実行する
+-- これまではAPIサーバーから統合元・統合先の存在確認、付け替え対象の取得、
+-- フレーズごとの重複確認と付け替え、統合元の削除、使用数の取得を個別に実行していた
+--
+-- 戻り値（JSONB）:
+--   成功時: {"merged_count": 3, "target_tag": {"id": 1, "name": "#習慣", "usage_count": 10}}
+--   統合元・統合先が存在しない（他ユーザー・削除済みを含む）場合: {"not_found": "source" | "target"}
+-- SECURITY INVOKER のため、RLS（auth.uid()）は通常のテーブル操作と同様に適用される
+
+CREATE OR REPLACE FUNCTION merge_tags(
+  p_source_tag_id BIGINT,
+  p_target_tag_id BIGINT
+)
+RETURNS JSONB
+LANGUAGE plpgsql
+SECURITY INVOKER
+SET search_path = public
+AS $$
+DECLARE
+  v_source tags;
+  v_target tags;
+  v_merged_count INT;
+BEGIN
+  -- 統合元・統合先をID順にロック（同時実行時のデッドロックを防ぐ）
+  PERFORM 1
+  FROM tags
+  WHERE id IN (p_source_tag_id, p_target_tag_id)
+    AND user_id = auth.uid()
+    AND deleted_at IS NULL
+  ORDER BY id
+  FOR UPDATE;
+
+  SELECT * INTO v_source
+  FROM tags
+  WHERE id = p_source_tag_id
+    AND user_id = auth.uid()
+    AND deleted_at IS NULL;
+
+  IF NOT FOUND THEN
+    RETURN jsonb_build_object('not_found', 'source');
+  END IF;
+
+  SELECT * INTO v_target
+  FROM tags
+  WHERE id = p_target_tag_id
+    AND user_id = auth.uid()
+    AND deleted_at IS NULL;
+
+  IF NOT FOUND THEN
+    RETURN jsonb_build_object('not_found', 'target');
+  END IF;
+
+  -- 統合先のタグが付いていないフレーズは統合元のタグを統合先に付け替え
+  UPDATE quote_tags qt
+  SET tag_id = p_target_tag_id
+  WHERE qt.tag_id = p_source_tag_id
+    AND NOT EXISTS (
+      SELECT 1 FROM quote_tags existing
+      WHERE existing.quote_id = qt.quote_id
+        AND existing.tag_id = p_target_tag_id
+    );
+
+  GET DIAGNOSTICS v_merged_count = ROW_COUNT;
+
+  -- 既に統合先のタグが付いているフレーズの統合元のタグは削除
+  DELETE FROM quote_tags WHERE tag_id = p_source_tag_id;
+
+  -- 統合元のタグを削除（ソフトデリート）
+  UPDATE tags SET deleted_at = now() WHERE id = p_source_tag_id;
+
+  RETURN jsonb_build_object(
+    'merged_count', v_merged_count,
+    'target_tag', jsonb_build_object(
+      'id', v_target.id,
+      'name', v_target.name,
+      'usage_count', (SELECT COUNT(*) FROM quote_tags WHERE tag_id = p_target_tag_id)
+    )
+  );
+END;
+$$;
+
+COMMENT ON FUNCTION merge_tags IS 'タグの統合（付け替えと統合元の削除）を1トランザクションで実行';
+
+GRANT EXECUTE ON FUNCTION merge_tags TO authenticated;
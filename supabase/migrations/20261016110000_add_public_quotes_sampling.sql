@@ -0,0 +1,99 @@
+-- ====================================
+-- 公開フレーズのランダム取得をDB側で行う
+-- ====================================
+-- これまでは GET /api/quotes/public で全ユーザーの公開フレーズを全件取得し、
+-- 出典・活動領域・タグを全件分取得してからAPIサーバーでシャッフルしていた
+-- （公開フレーズの総数に比例してコストが増える）
+--
+-- 各フレーズに一様乱数のソートキー（random_key）を持たせ、公開フレーズの部分インデックスから
+-- ランダムな開始位置以降のフレーズを p_limit 件だけ取得する（末尾に達した場合は先頭に戻る）
+--
+-- 制限: 並び順は random_key による1つの固定の循環順序を、開始位置を変えて切り出したものになる
+-- （呼び出しごとに全体をシャッフルしていたこれまでと異なり、隣り合うフレーズの組み合わせは常に同じ）
+-- random_key はフレーズの登録時に決まり、その後は変更しない
+--
+-- 列はNULL許容・デフォルトなしで追加してから（メタデータのみの変更）デフォルトを設定する
+-- （volatile な DEFAULT random() 付きで追加すると、テーブル全体の書き換えの間 ACCESS EXCLUSIVE ロックで
+--  参照もブロックされるため）
+-- 既存行の値の設定、インデックスと NOT NULL 制約の作成は次のマイグレーションで行う
+-- （マイグレーションは1ファイル1トランザクションのため、ファイルを分けて列の追加の ACCESS EXCLUSIVE ロックを
+--  このマイグレーションの終了時に解放する。ロックの詳細は次のマイグレーションを参照）
+
+ALTER TABLE quotes
+ADD COLUMN random_key DOUBLE PRECISION;
+
+-- 以降に登録されるフレーズには登録時に値を設定する
+ALTER TABLE quotes
+ALTER COLUMN random_key SET DEFAULT random();
+
+COMMENT ON COLUMN quotes.random_key IS '公開フレーズのランダム取得用のソートキー（0以上1未満の一様乱数）';
+
+-- ====================================
+-- 公開フレーズのランダム取得
+-- ====================================
+-- 戻り値（JSONB）: {"total": 公開フレーズ数, "quotes": [quote_detail_json の配列]}
+-- total はインデックスの統計情報による推定値（件数が少ない・統計情報がない場合は実件数）
+--
+-- 認証不要のエンドポイントから呼び出すため SECURITY DEFINER とし、
+-- 公開済み・未削除のフレーズのみを返す（出典・活動領域・タグはRLSに関係なく付与される）
+CREATE OR REPLACE FUNCTION get_public_quotes_sample(
+  p_limit INT DEFAULT 50
+)
+RETURNS JSONB
+LANGUAGE plpgsql
+VOLATILE
+SECURITY DEFINER
+SET search_path = public
+AS $$
+DECLARE
+  v_start DOUBLE PRECISION := random();
+  v_total BIGINT;
+BEGIN
+  SELECT c.reltuples::BIGINT INTO v_total
+  FROM pg_class c
+  WHERE c.oid = 'quotes_public_random_key_idx'::regclass;
+
+  -- 推定値の誤差が目立つ件数の場合は実件数（部分インデックスのみの走査）
+  IF v_total IS NULL OR v_total < 10000 THEN
+    SELECT COUNT(*) INTO v_total
+    FROM quotes
+    WHERE is_public = true AND deleted_at IS NULL;
+  END IF;
+
+  RETURN jsonb_build_object(
+    'total', v_total,
+    'quotes', COALESCE((
+      SELECT jsonb_agg(quote_detail_json(q) ORDER BY page.wrapped, page.random_key)
+      FROM (
+        SELECT picked.id, picked.random_key, picked.wrapped
+        FROM (
+          (
+            SELECT quotes.id, quotes.random_key, FALSE AS wrapped
+            FROM quotes
+            WHERE quotes.is_public = true AND quotes.deleted_at IS NULL
+              AND quotes.random_key >= v_start
+            ORDER BY quotes.random_key
+            LIMIT p_limit
+          )
+          UNION ALL
+          (
+            SELECT quotes.id, quotes.random_key, TRUE AS wrapped
+            FROM quotes
+            WHERE quotes.is_public = true AND quotes.deleted_at IS NULL
+              AND quotes.random_key < v_start
+            ORDER BY quotes.random_key
+            LIMIT p_limit
+          )
+        ) AS picked
+        ORDER BY picked.wrapped, picked.random_key
+        LIMIT p_limit
+      ) AS page
+      JOIN quotes q ON q.id = page.id
+    ), '[]'::JSONB)
+  );
+END;
+$$;
+
+COMMENT ON FUNCTION get_public_quotes_sample IS '公開フレーズをランダムな位置から指定件数取得（推定件数付き）';
+
+GRANT EXECUTE ON FUNCTION get_public_quotes_sample TO anon, authenticated;
@@ -0,0 +1,34 @@
+-- ====================================
+-- 既存フレーズの random_key の設定とインデックスの作成
+-- ====================================
+-- 20261016110000 で追加した quotes.random_key を既存のフレーズに設定する
+--
+-- このマイグレーションは1つのトランザクションで実行されるため、ロックはすべて終了まで保持される
+--   - UPDATE: 全行の新しいバージョンを書き込む（書き込み量はテーブルの書き換えと同程度）
+--     テーブルは ROW EXCLUSIVE ロックのため参照は可能だが、更新した行は終了までロックされ、
+--     同じフレーズへの更新・削除は終了まで待たされる
+--   - CREATE INDEX: SHARE ロック（参照は可能、書き込みは終了まで待たされる）
+--   - SET NOT NULL: ACCESS EXCLUSIVE ロック（全行を走査して確認し、以降は参照も終了まで待たされる）
+-- DEFAULT random() 付きで列を追加する場合と異なり、参照がブロックされるのは最後の NOT NULL の確認以降のみ
+--
+-- フレーズ数が多く書き込みの停止が許容できない環境では、このマイグレーションの適用前に
+-- トランザクションの外で（psql等で）バッチごとにコミットしながら random_key を設定し、
+-- CREATE INDEX CONCURRENTLY で quotes_public_random_key_idx を作成しておくこと
+-- （その場合、UPDATE は対象行がなく、インデックスは IF NOT EXISTS により作成されない）
+--
+-- 値の設定はデータの変更ではないため、トリガー（updated_at の更新・データバージョンの更新）は
+-- 実行しない（session_replication_role = replica はこのトランザクション内のみ有効）
+
+SET LOCAL session_replication_role = replica;
+
+UPDATE quotes
+SET random_key = random()
+WHERE random_key IS NULL;
+
+SET LOCAL session_replication_role = origin;
+
+CREATE INDEX IF NOT EXISTS quotes_public_random_key_idx ON quotes(random_key)
+WHERE is_public = true AND deleted_at IS NULL;
+
+ALTER TABLE quotes
+ALTER COLUMN random_key SET NOT NULL;
@@ -0,0 +1,82 @@
+-- ====================================
+-- 公開フレーズのランダム取得をシードで固定
+-- ====================================
+-- これまでは呼び出しごとに開始位置をランダムに決めていたため、
+-- offset を指定して次のページを取得してもページ間でフレーズが重複・欠落していた
+--
+-- シード（0以上1未満）を開始位置として random_key の順に並べ（末尾に達した場合は先頭に戻る）、
+-- 同じシードであれば同じ順序になるようにする
+-- （シードが異なっても random_key による同じ循環順序の開始位置が変わるだけで、隣り合うフレーズは同じ）
+-- 各ページは部分インデックス（quotes_public_random_key_idx）を開始位置から
+-- p_offset + p_limit 件だけ走査して取得する（並び順全体は生成しない）
+--
+-- 引数が変わるため既存の関数を削除してから作成する
+
+DROP FUNCTION IF EXISTS get_public_quotes_sample(INT);
+
+-- 戻り値（JSONB）: {"total": 公開フレーズ数, "quotes": [quote_detail_json の配列]}（変更なし）
+-- p_seed がNULLの場合はランダムな開始位置を使う
+CREATE OR REPLACE FUNCTION get_public_quotes_sample(
+  p_limit INT DEFAULT 50,
+  p_offset INT DEFAULT 0,
+  p_seed DOUBLE PRECISION DEFAULT NULL
+)
+RETURNS JSONB
+LANGUAGE plpgsql
+VOLATILE
+SECURITY DEFINER
+SET search_path = public
+AS $$
+DECLARE
+  v_start DOUBLE PRECISION := COALESCE(p_seed, random());
+  v_total BIGINT;
+BEGIN
+  SELECT c.reltuples::BIGINT INTO v_total
+  FROM pg_class c
+  WHERE c.oid = 'quotes_public_random_key_idx'::regclass;
+
+  -- 推定値の誤差が目立つ件数の場合は実件数（部分インデックスのみの走査）
+  IF v_total IS NULL OR v_total < 10000 THEN
+    SELECT COUNT(*) INTO v_total
+    FROM quotes
+    WHERE is_public = true AND deleted_at IS NULL;
+  END IF;
+
+  RETURN jsonb_build_object(
+    'total', v_total,
+    'quotes', COALESCE((
+      SELECT jsonb_agg(quote_detail_json(q) ORDER BY page.wrapped, page.random_key, page.id)
+      FROM (
+        SELECT picked.id, picked.random_key, picked.wrapped
+        FROM (
+          (
+            SELECT quotes.id, quotes.random_key, FALSE AS wrapped
+            FROM quotes
+            WHERE quotes.is_public = true AND quotes.deleted_at IS NULL
+              AND quotes.random_key >= v_start
+            ORDER BY quotes.random_key, quotes.id
+            LIMIT p_offset + p_limit
+          )
+          UNION ALL
+          (
+            SELECT quotes.id, quotes.random_key, TRUE AS wrapped
+            FROM quotes
+            WHERE quotes.is_public = true AND quotes.deleted_at IS NULL
+              AND quotes.random_key < v_start
+            ORDER BY quotes.random_key, quotes.id
+            LIMIT p_offset + p_limit
+          )
+        ) AS picked
+        ORDER BY picked.wrapped, picked.random_key, picked.id
+        OFFSET p_offset
+        LIMIT p_limit
+      ) AS page
+      JOIN quotes q ON q.id = page.id
+    ), '[]'::JSONB)
+  );
+END;
+$$;
+
+COMMENT ON FUNCTION get_public_quotes_sample IS '公開フレーズをシードで決まる順序で指定範囲取得（推定件数付き）';
+
+GRANT EXECUTE ON FUNCTION get_public_quotes_sample TO anon, authenticated;
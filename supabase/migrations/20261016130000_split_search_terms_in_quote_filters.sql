@@ -0,0 +1,95 @@
+-- ====================================
+-- フレーズ一覧のILIKE検索をN-gramインデックスの検索と同じ仕様にする
+-- ====================================
+-- APIサーバー側のN-gramインデックス（services/search_index.py）は
+-- 検索語をNFKC正規化・小文字化してスペースで分割し、すべての語を含むフレーズを返す（AND検索）
+-- DB側の検索（インデックス無効時・件数上限超過時・インデックス構築前のフォールバック）は
+-- 検索文字列全体を1つの部分文字列として扱っていたため、
+-- 「習慣 読書」のような複数語の検索結果がアーカイブの件数や設定によって変わっていた
+--
+-- DB側でも検索語を同じ正規化で分割し、各語がフレーズテキスト・書籍タイトル・著者名・
+-- SNSアカウント名・表示名のいずれかに含まれるフレーズのみを返す
+-- （小文字化はPostgreSQLの lower で行う。Pythonの casefold とは一部の文字（ß 等）で異なる）
+--
+-- 戻り値・引数の型が変わるため既存の関数を削除してから作成する
+-- （get_quotes_grouped_page / get_quotes_cursor_page は呼び出し時に解決されるため変更不要）
+
+DROP FUNCTION IF EXISTS quote_matches_filters(quotes, TEXT, TEXT, INT[], BIGINT[], BIGINT[]);
+DROP FUNCTION IF EXISTS quote_search_pattern(TEXT);
+
+-- 検索用にテキストを正規化（NFKC + 小文字化、NULLは空文字）
+CREATE OR REPLACE FUNCTION quote_search_normalize(p_text TEXT)
+RETURNS TEXT
+LANGUAGE sql
+IMMUTABLE
+AS $$
+  SELECT COALESCE(lower(normalize(p_text, NFKC)), '');
+$$;
+
+-- 検索文字列を正規化してスペース区切りの検索語に分割し、語ごとのLIKEパターンを作成
+-- （ワイルドカードをエスケープ。検索語がない場合はNULL）
+CREATE OR REPLACE FUNCTION quote_search_pattern(p_search TEXT)
+RETURNS TEXT[]
+LANGUAGE sql
+IMMUTABLE
+AS $$
+  SELECT NULLIF(ARRAY(
+    SELECT '%' || replace(replace(replace(term, '\', '\\'), '%', '\%'), '_', '\_') || '%'
+    FROM regexp_split_to_table(quote_search_normalize(p_search), '\s+') AS term
+    WHERE term <> ''
+  ), '{}');
+$$;
+
+-- フレーズが一覧の絞り込み条件に一致するか判定
+CREATE OR REPLACE FUNCTION quote_matches_filters(
+  q quotes,
+  p_patterns TEXT[],
+  p_source_type TEXT,
+  p_activity_ids INT[],
+  p_tag_ids BIGINT[],
+  p_quote_ids BIGINT[]
+)
+RETURNS BOOLEAN
+LANGUAGE sql
+STABLE
+AS $$
+  SELECT
+    (p_source_type IS NULL OR q.source_type = p_source_type)
+    -- すべての検索語が、フレーズテキスト、書籍タイトル・著者名、SNSアカウント名・表示名の
+    -- いずれかに含まれる（AND検索）
+    AND (
+      p_patterns IS NULL
+      OR NOT EXISTS (
+        SELECT 1 FROM unnest(p_patterns) AS pattern
+        WHERE NOT (
+          quote_search_normalize(q.text) LIKE pattern
+          OR EXISTS (
+            SELECT 1 FROM books b
+            WHERE b.id = q.book_id
+              AND (quote_search_normalize(b.title) LIKE pattern OR quote_search_normalize(b.author) LIKE pattern)
+          )
+          OR EXISTS (
+            SELECT 1 FROM sns_users s
+            WHERE s.id = q.sns_user_id
+              AND (quote_search_normalize(s.handle) LIKE pattern OR quote_search_normalize(s.display_name) LIKE pattern)
+          )
+        )
+      )
+    )
+    AND (
+      p_activity_ids IS NULL
+      OR EXISTS (
+        SELECT 1 FROM quote_activities qa
+        WHERE qa.quote_id = q.id AND qa.activity_id = ANY(p_activity_ids)
+      )
+    )
+    AND (
+      p_tag_ids IS NULL
+      OR EXISTS (
+        SELECT 1 FROM quote_tags qt
+        WHERE qt.quote_id = q.id AND qt.tag_id = ANY(p_tag_ids)
+      )
+    )
+    -- 検索インデックスで絞り込んだフレーズID
+    AND (p_quote_ids IS NULL OR q.id = ANY(p_quote_ids));
+$$;
@@ -0,0 +1,40 @@
+-- ====================================
+-- タグ削除関数
+-- ====================================
+-- DELETE /api/tags/{tag_id} の処理（タグのソフトデリートと関連付けの削除）を
+-- 1回のRPC・1トランザクションで実行する
+-- 個別のリクエストで実行すると、関連付けの削除に失敗した場合に削除済みのタグの関連付けが残り、
+-- 再実行しても未削除のタグのみを対象とする条件により404となって削除できなくなるため
+--
+-- 戻り値（BOOLEAN）: 削除した場合はTRUE、存在しない（他ユーザー・削除済みを含む）場合はFALSE
+-- SECURITY INVOKER のため、RLS（auth.uid()）は通常のテーブル操作と同様に適用される
+
+CREATE OR REPLACE FUNCTION delete_tag(
+  p_tag_id BIGINT
+)
+RETURNS BOOLEAN
+LANGUAGE plpgsql
+SECURITY INVOKER
+SET search_path = public
+AS $$
+BEGIN
+  -- 本人の未削除タグのみを条件にソフトデリート
+  UPDATE tags
+  SET deleted_at = now()
+  WHERE id = p_tag_id
+    AND user_id = auth.uid()
+    AND deleted_at IS NULL;
+
+  IF NOT FOUND THEN
+    RETURN FALSE;
+  END IF;
+
+  DELETE FROM quote_tags WHERE tag_id = p_tag_id;
+
+  RETURN TRUE;
+END;
+$$;
+
+COMMENT ON FUNCTION delete_tag IS 'タグのソフトデリートと関連付けの削除を1トランザクションで実行';
+
+GRANT EXECUTE ON FUNCTION delete_tag TO authenticated;
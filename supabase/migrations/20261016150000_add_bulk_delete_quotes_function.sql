@@ -0,0 +1,40 @@
+-- ====================================
+-- フレーズ一括削除関数
+-- ====================================
+-- DELETE /api/quotes の複数フレーズのソフトデリートを1回のRPC・1トランザクションで実行する
+-- PostgRESTのテーブル更新ではIDがURLのクエリパラメータ（id=in.(...)）になり、
+-- 最大1000件のIDではプロキシ等のURLの長さの上限を超えるため、IDはリクエストボディで受け取る
+--
+-- 戻り値（JSONB）: {"deleted_ids": [...]}（存在しない・他ユーザー・削除済みのIDは含まない）
+-- SECURITY INVOKER のため、RLS（auth.uid()）は通常のテーブル操作と同様に適用される
+
+CREATE OR REPLACE FUNCTION bulk_delete_quotes(
+  p_quote_ids BIGINT[]
+)
+RETURNS JSONB
+LANGUAGE plpgsql
+SECURITY INVOKER
+SET search_path = public
+AS $$
+DECLARE
+  v_ids BIGINT[];
+BEGIN
+  WITH deleted AS (
+    UPDATE quotes
+    SET deleted_at = now()
+    WHERE id = ANY (p_quote_ids)
+      AND user_id = auth.uid()
+      AND deleted_at IS NULL
+    RETURNING id
+  )
+  SELECT COALESCE(array_agg(deleted.id ORDER BY deleted.id), '{}')
+  INTO v_ids
+  FROM deleted;
+
+  RETURN jsonb_build_object('deleted_ids', to_jsonb(v_ids));
+END;
+$$;
+
+COMMENT ON FUNCTION bulk_delete_quotes IS '複数のフレーズを1トランザクションでソフトデリート';
+
+GRANT EXECUTE ON FUNCTION bulk_delete_quotes TO authenticated;
@@ -0,0 +1,30 @@
+-- ====================================
+-- SNSユーザーごとのフレーズ使用数集計関数
+-- ====================================
+-- GET /api/sns-users の使用数（usage_count）をDB側で集計する
+-- ページ内のSNSユーザーのフレーズを全件取得してAPIサーバーで数えると、
+-- フレーズの多いSNSユーザーほど転送量が増えるため、GROUP BY の結果（ユーザーごとに1行）のみを返す
+--
+-- 戻り値: sns_user_id と usage_count（削除済みフレーズは除外。使用数0のSNSユーザーは含まれない）
+-- SECURITY INVOKER のため、RLS（auth.uid()）は通常のテーブル操作と同様に適用される
+
+CREATE OR REPLACE FUNCTION count_quotes_by_sns_user(
+  p_sns_user_ids BIGINT[]
+)
+RETURNS TABLE (sns_user_id BIGINT, usage_count BIGINT)
+LANGUAGE sql
+STABLE
+SECURITY INVOKER
+SET search_path = public
+AS $$
+  SELECT q.sns_user_id, count(*) AS usage_count
+  FROM quotes q
+  WHERE q.sns_user_id = ANY(p_sns_user_ids)
+    AND q.user_id = auth.uid()
+    AND q.deleted_at IS NULL
+  GROUP BY q.sns_user_id;
+$$;
+
+COMMENT ON FUNCTION count_quotes_by_sns_user IS 'SNSユーザーごとの未削除フレーズ数を集計';
+
+GRANT EXECUTE ON FUNCTION count_quotes_by_sns_user TO authenticated;